@@ -0,0 +1,101 @@
+"""
+Benchmark filling in the standalone HTML template against the original
+implementation, on a 5 MB game and a 1 MB template, timing both and
+measuring their peak memory with tracemalloc.
+
+Usage:
+    python benchmarks/bench_build_html.py
+"""
+
+import sys
+import tracemalloc
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+ROOT = path.join(path.dirname(path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from psbs.htmlbuilder import html_chunks
+from psbs.utils import write_file
+from tests.reference import fill_placeholders
+
+GAME_SIZE = 5_000_000
+TEMPLATE_SIZE = 1_000_000
+ENGINE = "https://www.puzzlescript.net/"
+
+
+def make_game(size):
+    # The example game with levels added until it is size long
+    example = path.join(ROOT, "psbs", "example.txt")
+    with open(example, encoding="UTF-8") as file:
+        game = file.read()
+    level = "\n".join(["#" * 24] + ['#..@*O.P"\\.@*O.P"\\..####'] * 18)
+    levels = [game]
+    length = len(game)
+    while length < size:
+        levels.append(level)
+        length += len(level) + 2
+    return "\n\n".join(levels)
+
+
+def make_template(size):
+    # A standalone template with every placeholder, padded with script
+    head = (
+        "<html><head><title>__GAMETITLE__</title><style>body{background:"
+        "___BGCOLOR___;color:___TEXTCOLOR___}</style></head><body><a href="
+        '"__HOMEPAGE__">__HOMEPAGE_STRIPPED_PROTOCOL__</a> by __AUTHOR__'
+        "<script>"
+    )
+    tail = 'sourceCode="__GAMEDAT__";compile(["restart"],sourceCode);'
+    filler = "var x = 1; // filler\n"
+    padding = filler * ((size - len(head) - len(tail)) // len(filler))
+    return head + padding + tail + "</script></body></html>"
+
+
+def original(filename, template, game):
+    write_file(filename, fill_placeholders(template, game, ENGINE))
+
+
+def current(filename, template, game):
+    write_file(filename, html_chunks(template, game, ENGINE))
+
+
+def measure(function, *args, repeat=3):
+    # The quickest of several runs, and the peak memory of one more
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function(*args)
+        times.append(perf_counter() - start)
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def main():
+    game = make_game(GAME_SIZE)
+    template = make_template(TEMPLATE_SIZE)
+    print(f"Game: {len(game):,} characters")
+    print(f"Template: {len(template):,} characters")
+    with TemporaryDirectory() as directory:
+        results = {}
+        for name, function in (("original", original), ("current", current)):
+            filename = path.join(directory, name + ".html")
+            results[name] = measure(function, filename, template, game)
+            with open(filename, encoding="UTF-8") as file:
+                results[name] += (file.read(),)
+            seconds, peak = results[name][:2]
+            print(f"{name}: {seconds:.3f} s, {peak / 1e6:.1f} MB peak")
+    identical = results["original"][2] == results["current"][2]
+    print(f"identical: {identical}")
+    if not identical:
+        sys.exit("Output differs from the original implementation")
+    if results["current"][1] >= results["original"][1]:
+        sys.exit("Peak memory isn't below the original implementation")
+
+
+if __name__ == "__main__":
+    main()
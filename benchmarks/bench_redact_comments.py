@@ -0,0 +1,69 @@
+"""
+Benchmark PSParser.redact_comments against the original implementation on
+a 1 MB source full of comments, nested comments and messages.
+
+Usage:
+    python benchmarks/bench_redact_comments.py
+"""
+
+import sys
+from os import path
+from time import perf_counter
+
+ROOT = path.join(path.dirname(path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from psbs.psparser import PSParser
+from tests.reference import redact_comments
+
+SIZE = 1_000_000
+REQUIRED_SPEEDUP = 10
+
+
+def make_source(size):
+    # Repeat the example game, with comments added, until it is size long
+    example = path.join(ROOT, "psbs", "example.txt")
+    with open(example, encoding="UTF-8") as file:
+        game = file.read()
+    game = game.replace("[ > Player", "(push crates) [ > Player")
+    game = game.replace(
+        "#.O@.#",
+        "#.O@.#\nmessage well done (really)\n(level (nested) comment)",
+    )
+    return (game * (size // len(game) + 1))[:size]
+
+
+def best_time(function, *args, repeat=3):
+    # The quickest of several runs, and the result of the last
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        result = function(*args)
+        times.append(perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    source = make_source(SIZE)
+    print(f"Source: {len(source):,} characters")
+    slowest = None
+    for redact_char in [" ", ""]:
+        old_time, old = best_time(redact_comments, source, redact_char)
+        new_time, new = best_time(
+            PSParser.redact_comments, source, redact_char
+        )
+        speedup = old_time / new_time
+        slowest = speedup if slowest is None else min(slowest, speedup)
+        print(
+            f"redact_char={redact_char!r}: original {old_time:.3f} s, "
+            f"current {new_time:.4f} s, {speedup:.1f}x faster, "
+            f"identical: {old == new}"
+        )
+        if old != new:
+            sys.exit("Output differs from the original implementation")
+    if slowest < REQUIRED_SPEEDUP:
+        sys.exit(f"Speedup below {REQUIRED_SPEEDUP}x")
+
+
+if __name__ == "__main__":
+    main()
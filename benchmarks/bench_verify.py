@@ -0,0 +1,67 @@
+"""
+Benchmark verifying a game and reporting on its runtime costs and rules, on
+games of 250 KB and 1 MB made of many small levels, timing each from a
+fresh parse.
+
+Usage:
+    python benchmarks/bench_verify.py
+"""
+
+import sys
+from os import path
+from time import perf_counter
+
+ROOT = path.join(path.dirname(path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from psbs.analyzer import rule_report, runtime_report
+from psbs.psparser import PSParser
+from psbs.verifier import verify
+
+GAME_SIZES = [250_000, 1_000_000]
+# Verifying a game this large has to stay quick enough to run on every build
+VERIFY_BUDGET = 0.1
+
+
+def make_game(size):
+    # The example game with small levels added until it is size long
+    example = path.join(ROOT, "psbs", "example.txt")
+    with open(example, encoding="UTF-8") as file:
+        game = file.read()
+    level = "\n".join(["######"] + ["#.P*O#"] * 4 + ["######"])
+    levels = [game]
+    length = len(game)
+    while length < size:
+        levels.append(level)
+        length += len(level) + 2
+    return "\n\n".join(levels)
+
+
+def best_time(function, source, repeat=3):
+    # The quickest of several runs, each on a parser which has done nothing
+    times = []
+    for _ in range(repeat):
+        parser = PSParser(source)
+        start = perf_counter()
+        function(parser)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def main():
+    failed = False
+    for size in GAME_SIZES:
+        game = make_game(size)
+        lines = game.count("\n") + 1
+        print(f"Game: {len(game):,} characters, {lines:,} lines")
+        for function in (verify, runtime_report, rule_report):
+            seconds = best_time(function, game)
+            print(f"  {function.__name__}: {seconds * 1000:.1f} ms")
+            if function is verify and seconds > VERIFY_BUDGET:
+                failed = True
+    if failed:
+        sys.exit(f"Verifying took over {VERIFY_BUDGET * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+ANALYZER
+
+This file provides functions for estimating the cost of a PuzzleScript game
+without running it.
+
+The PuzzleScript compiler expands every rule written in a game into one
+compiled rule for each direction it applies in, and again for each member
+of the properties and each movement it has to carry from its left hand side
+to its right hand side. A single rule can easily become hundreds, which
+slows down both compiling the game and every turn of it. These estimates
+are worked out from the parsed rules and legend alone, so they are quick
+enough to run on every build.
+
+At runtime each level is held as a bitmask of objects and a bitmask of
+movements for every cell, and each undo step keeps a copy of the objects.
+The runtime estimates work out the size of these for every level at once
+from the parsed objects, collision layers and level spans.
+
+Example:
+    parser = PSParser(source)
+    print(rule_report(parser, top=5))
+    print(runtime_report(parser, {"max_cells": 1024}))
+
+"""
+
+from collections import namedtuple
+from math import ceil, prod
+
+import numpy
+
+from .gamemodel import code_points, is_whitespace
+from .psparser import PSParser
+
+
+class RuleCost(
+    namedtuple(
+        "RuleCost", ["rule", "line", "directions", "properties", "movements"]
+    )
+):
+    """
+    The estimated expansion of a rule.
+
+    Attributes:
+        rule (Rule): The rule, as parsed by PSParser.get_rules.
+        line (int): The line the rule is on.
+        directions (int): The number of directions the rule is compiled for.
+        properties (int): How many times properties multiply each direction.
+        movements (int): How many times movements multiply each direction.
+    """
+
+    __slots__ = ()
+
+    @property
+    def total(self):
+        """int: The estimated number of compiled rules."""
+        return self.directions * self.properties * self.movements
+
+
+class RuntimeCost(
+    namedtuple(
+        "RuntimeCost",
+        [
+            "object_words",
+            "movement_words",
+            "lines",
+            "heights",
+            "widths",
+            "cells",
+            "state_bytes",
+            "undo_bytes",
+        ],
+    )
+):
+    """
+    The estimated runtime cost of the levels of a game.
+
+    The per level attributes are NumPy arrays with an entry for each level.
+
+    Attributes:
+        object_words (int): The 32 bit words in the object mask of a cell.
+        movement_words (int): The 32 bit words in the movement mask of a
+            cell.
+        lines (numpy.ndarray): The line each level starts on.
+        heights (numpy.ndarray): The number of rows in each level.
+        widths (numpy.ndarray): The number of columns in each level.
+        cells (numpy.ndarray): The number of cells in each level.
+        state_bytes (numpy.ndarray): The memory used by the state of each
+            level.
+        undo_bytes (numpy.ndarray): The memory used by each undo step of
+            each level.
+    """
+
+    __slots__ = ()
+
+
+# Default limits for the runtime report, see runtime_report
+RUNTIME_BUDGETS = {
+    "max_cells": 2500,
+    "max_object_words": 4,
+    "max_movement_words": 2,
+    "max_state_bytes": 65536,
+}
+
+# Movements are stored in 5 bits for each layer, and a layer's bits never
+# span two words
+_LAYERS_PER_WORD = 6
+
+# The absolute directions each rule direction stands for
+_DIRECTIONS = {
+    "up": {"up"},
+    "down": {"down"},
+    "left": {"left"},
+    "right": {"right"},
+    "horizontal": {"left", "right"},
+    "vertical": {"up", "down"},
+    "orthogonal": {"up", "down", "left", "right"},
+}
+# Modifiers which only make sense relative to the direction of the rule
+_RELATIVE_MODIFIERS = {">", "<", "^", "v", "perpendicular", "parallel"}
+# Movements a modifier could be, for modifiers which stand for several
+_AMBIGUOUS_MOVEMENTS = {
+    "moving": 5,
+    "orthogonal": 4,
+    "horizontal": 2,
+    "vertical": 2,
+    "perpendicular": 2,
+    "parallel": 2,
+}
+
+
+def rule_costs(parser):
+    """
+    Estimate how many compiled rules each rule of a game expands into.
+
+    Args:
+        parser (PSParser): The parser for the game.
+
+    Returns:
+        list: A RuleCost for each rule, in the order they appear.
+
+    Raises:
+        PSParser.ParseError: If the legend refers back to itself.
+    """
+    properties = parser.get_legend()["properties"]
+    costs = []
+    for rule in parser.get_rules():
+        lhs_cells = [cell for row in rule.lhs for cell in row]
+        rhs_cells = [cell for row in rule.rhs for cell in row]
+
+        # Rules which look the same from every direction are only
+        # compiled once
+        directional = any(len(row) > 1 for row in rule.lhs) or any(
+            modifier in _RELATIVE_MODIFIERS
+            for cell in lhs_cells + rhs_cells
+            for modifier, _ in cell
+        )
+        directions = set()
+        for direction in rule.directions:
+            directions |= _DIRECTIONS[direction]
+        if not directional:
+            direction_count = 1
+        else:
+            direction_count = len(directions) or 4
+
+        # Properties and movements are only expanded when the right hand
+        # side has to know which one the left hand side matched
+        lhs_pairs = {pair for cell in lhs_cells for pair in cell}
+        rhs_pairs = {pair for cell in rhs_cells for pair in cell}
+        lhs_names = {name for _, name in lhs_pairs}
+        rhs_names = {name for _, name in rhs_pairs}
+        lhs_modifiers = {modifier for modifier, _ in lhs_pairs}
+        rhs_modifiers = {modifier for modifier, _ in rhs_pairs}
+        property_count = prod(
+            len(set(properties[name]))
+            for name in rhs_names & lhs_names
+            if name in properties
+        )
+        movement_count = prod(
+            _AMBIGUOUS_MOVEMENTS[modifier]
+            for modifier in rhs_modifiers & lhs_modifiers
+            if modifier in _AMBIGUOUS_MOVEMENTS
+        )
+
+        costs.append(
+            RuleCost(
+                rule,
+                parser.model.location(rule.span.start)[0],
+                direction_count,
+                property_count,
+                movement_count,
+            )
+        )
+    return costs
+
+
+def group_costs(costs):
+    """
+    Total the estimated expansion of each group of rules.
+
+    Args:
+        costs (list): The RuleCost of each rule, see rule_costs.
+
+    Returns:
+        dict: The estimated number of compiled rules in each group, keyed
+        by the line of the first rule in the group.
+    """
+    groups = {}
+    first_lines = {}
+    for cost in costs:
+        line = first_lines.setdefault(cost.rule.group, cost.line)
+        groups[line] = groups.get(line, 0) + cost.total
+    return groups
+
+
+def rule_report(parser, top=10):
+    """
+    Report the rules and groups of a game which expand the most.
+
+    Args:
+        parser (PSParser): The parser for the game.
+        top (int, optional): The number of rules and groups to list.
+            Defaults to 10.
+
+    Returns:
+        str: The report.
+    """
+    costs = rule_costs(parser)
+    groups = group_costs(costs)
+    total = sum(cost.total for cost in costs)
+    report = [
+        f"{len(costs)} rules in {len(groups)} groups expand to about "
+        f"{total} compiled rules"
+    ]
+    if not costs:
+        return report[0]
+
+    report += ["", "Most expanded rules:", "   line  rules  expansion"]
+    ranked = sorted(costs, key=lambda cost: (-cost.total, cost.line))
+    for cost in ranked[:top]:
+        expansion = (
+            f"{cost.directions} dir x {cost.properties} prop x "
+            f"{cost.movements} move"
+        )
+        text = parser.model.text(cost.rule.span)
+        if len(text) > 40:
+            text = text[:37] + "..."
+        report.append(
+            f"  {cost.line:>5}  {cost.total:>5}  {expansion:<26}  {text}"
+        )
+
+    report += ["", "Most expanded groups:", "   line  rules"]
+    ranked = sorted(groups.items(), key=lambda group: (-group[1], group[0]))
+    for line, group_total in ranked[:top]:
+        report.append(f"  {line:>5}  {group_total:>5}")
+    return "\n".join(report)
+
+
+def runtime_costs(parser):
+    """
+    Estimate the memory each level of a game uses when it is played.
+
+    Each cell holds a word for every 32 objects and a word for every 6
+    collision layers of movements, with two more movement sized masks kept
+    for rigid bodies. Each undo step copies the object masks. Every level is
+    measured at once from its span, with each row measured as Level reads
+    it, without comments or surrounding whitespace.
+
+    Args:
+        parser (PSParser): The parser for the game.
+
+    Returns:
+        RuntimeCost: The estimated cost of the levels.
+    """
+    model = parser.model
+    object_words = max(ceil(len(parser.get_objects()) / 32), 1)
+    layers = len(model.collisionlayers)
+    movement_words = max(ceil(layers / _LAYERS_PER_WORD), 1)
+
+    # Find the lines each level runs over
+    spans = numpy.asarray(model.levels.offsets, dtype=numpy.int64)
+    starts, ends = spans[0::2], spans[1::2]
+    line_starts = numpy.asarray(model.line_starts, dtype=numpy.int64)
+    first_lines = numpy.searchsorted(line_starts, starts, side="right") - 1
+    last_lines = numpy.searchsorted(line_starts, ends - 1, side="right") - 1
+    heights = numpy.where(ends > starts, last_lines - first_lines + 1, 0)
+    if not len(spans):
+        widths = numpy.zeros(0, dtype=numpy.int64)
+    else:
+        line_widths = _row_widths(
+            model.source, line_starts, starts.min(), ends.max()
+        )
+        bounds = numpy.ravel(numpy.column_stack([first_lines, last_lines + 1]))
+        widths = numpy.maximum.reduceat(line_widths, bounds)[0::2]
+
+    cells = heights * widths
+    return RuntimeCost(
+        object_words,
+        movement_words,
+        first_lines + 1,
+        heights,
+        widths,
+        cells,
+        4 * cells * (object_words + 3 * movement_words),
+        4 * cells * object_words,
+    )
+
+
+def _row_widths(source, line_starts, start, end):
+    """
+    Measure every line of part of a source as a row of a level.
+
+    Args:
+        source (str): The PuzzleScript source code.
+        line_starts (numpy.ndarray): The offset each line starts at.
+        start (int): The offset the part to measure starts at.
+        end (int): The offset the part to measure ends at.
+
+    Returns:
+        numpy.ndarray: The width of each line in cells once comments are
+        removed and surrounding whitespace is stripped, zero for lines
+        outside the part, with a trailing zero.
+    """
+    text = source[start:end]
+    if "(" in text:
+        # Redact with a character rows can't contain so offsets still line
+        # up with the source, then leave it out of the widths
+        text = PSParser.redact_comments(source, "\0")[start:end]
+    codes = code_points(text)
+    kept = codes != 0
+    content = numpy.flatnonzero(kept & ~is_whitespace(codes))
+    widths = numpy.zeros(len(line_starts) + 1, dtype=numpy.int64)
+    if not len(content):
+        return widths
+
+    # Each row runs from its first to its last character of content
+    first_line = numpy.searchsorted(line_starts, start, side="right") - 1
+    lines = numpy.cumsum(codes == 10)[content] + first_line
+    firsts = numpy.flatnonzero(numpy.diff(lines, prepend=-1))
+    lasts = numpy.append(firsts[1:], len(content)) - 1
+    kept_before = numpy.concatenate([[0], numpy.cumsum(kept)])
+    widths[lines[firsts]] = (
+        kept_before[content[lasts] + 1] - kept_before[content[firsts]]
+    )
+    return widths
+
+
+def runtime_report(parser, budgets=None, top=10):
+    """
+    Report the runtime cost of a game and the levels over budget.
+
+    Args:
+        parser (PSParser): The parser for the game.
+        budgets (dict, optional): Limits on max_cells, max_object_words,
+            max_movement_words and max_state_bytes, any left out use the
+            value in RUNTIME_BUDGETS. Defaults to None.
+        top (int, optional): The number of levels over budget to list.
+            Defaults to 10.
+
+    Returns:
+        str: The report.
+    """
+    budgets = {**RUNTIME_BUDGETS, **(budgets or {})}
+    costs = runtime_costs(parser)
+    report = [
+        f"{len(parser.get_objects())} objects take "
+        f"{costs.object_words} words per cell",
+        f"{len(parser.model.collisionlayers)} collision layers take "
+        f"{costs.movement_words} words of movements per cell",
+    ]
+    if costs.object_words > budgets["max_object_words"]:
+        report.append(
+            f"  Over budget of {budgets['max_object_words']} object words"
+        )
+    if costs.movement_words > budgets["max_movement_words"]:
+        report.append(
+            f"  Over budget of {budgets['max_movement_words']} movement words"
+        )
+    if not len(costs.cells):
+        return "\n".join(report)
+
+    largest = int(numpy.argmax(costs.state_bytes))
+    report += [
+        f"{len(costs.cells)} levels with {int(costs.cells.sum())} cells take "
+        f"{int(costs.state_bytes.sum())} bytes of state",
+        f"Largest level at line {costs.lines[largest]} is "
+        f"{costs.widths[largest]}x{costs.heights[largest]}, taking "
+        f"{costs.state_bytes[largest]} bytes of state and "
+        f"{costs.undo_bytes[largest]} bytes per undo step",
+    ]
+
+    over = (costs.cells > budgets["max_cells"]) | (
+        costs.state_bytes > budgets["max_state_bytes"]
+    )
+    over_levels = numpy.flatnonzero(over)
+    report += ["", f"{len(over_levels)} levels over budget"]
+    if not len(over_levels):
+        return "\n".join(report)
+    report.append("   line   size   cells    state     undo")
+    ranked = over_levels[numpy.argsort(-costs.state_bytes[over_levels])]
+    for level in ranked[:top]:
+        size = f"{costs.widths[level]}x{costs.heights[level]}"
+        report.append(
+            f"  {costs.lines[level]:>5}  {size:>5}  {costs.cells[level]:>6}"
+            f"  {costs.state_bytes[level]:>7}  {costs.undo_bytes[level]:>7}"
+        )
+    return "\n".join(report)
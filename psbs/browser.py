@@ -0,0 +1,321 @@
+"""
+BROWSER
+
+This file provides a pool of headless browser pages for compiling
+PuzzleScript games in a fork's editor.
+
+Launching Chromium and loading editor.html takes far longer than compiling
+a game, so rather than starting a browser for each compile the pool keeps
+one running with warm editor pages loaded, checks a page is still healthy
+before reusing it and restarts the browser if it has crashed. The shared
+pool lives for the rest of the process, so repeated builds only pay for
+the browser once.
+
+Example:
+    pool = BrowserPool.shared()
+    messages = pool.compile("https://www.puzzlescript.net/editor.html", src)
+    for message in messages:
+        print(message.severity, message.line, message.text)
+
+"""
+
+import atexit
+from collections import namedtuple
+from asyncio import Lock, TimeoutError as AsyncTimeoutError
+from asyncio import get_event_loop, wait_for
+
+from pyppeteer import launch
+from pyppeteer.errors import PyppeteerError
+
+from .errors import PSBSError
+
+ConsoleMessage = namedtuple("ConsoleMessage", ["text", "severity", "line"])
+ConsoleMessage.__doc__ = """
+A message from the PuzzleScript console.
+
+Attributes:
+    text (str): The text of the message.
+    severity (str): "error", "warning" or "info".
+    line (int): The line of the source the message is about, or None.
+"""
+
+# Clear the console, load and compile the source in the editor, then read
+# back every console message in the same round trip
+_COMPILE_SCRIPT = """(source) => {
+    if (typeof clearConsole === "function") {
+        clearConsole();
+    }
+    editor.setValue(source);
+    compile(["restart"]);
+    const elements = document.querySelectorAll("div#consoletextarea div");
+    return Array.from(elements, (element) => {
+        let severity = "info";
+        if (element.querySelector(".errorText")) {
+            severity = "error";
+        } else if (element.querySelector(".warningText")) {
+            severity = "warning";
+        }
+        const link = element.querySelector("[onclick*='jumpToLine']");
+        const match = link && /jumpToLine\\((\\d+)/.exec(
+            link.getAttribute("onclick")
+        );
+        const line = match ? Number(match[1]) : null;
+        return [element.textContent, severity, line];
+    });
+}"""
+
+# Whether the editor is loaded and ready to compile
+_HEALTH_SCRIPT = 'typeof compile === "function" && typeof editor === "object"'
+
+
+class BrowserPool:
+    """
+    A pool of headless browser pages with a PuzzleScript editor loaded.
+
+    Args:
+        max_pages (int, optional): The most idle pages kept loaded for each
+            editor. Defaults to 4.
+        timeout (float, optional): The seconds to wait for a page to load or
+            a game to compile. Defaults to 30.
+
+    Attributes:
+        max_pages (int): The most idle pages kept loaded for each editor.
+        timeout (float): The seconds to wait for a page to load or a game to
+            compile.
+
+    Methods:
+        shared(): Get the pool shared by the whole process.
+        compile(editor_url, source): Compile a game and return the console
+            messages.
+        compile_async(editor_url, source): Compile a game from a coroutine.
+        close(): Close the browser and all of its pages.
+    """
+
+    __shared = None
+
+    def __init__(self, max_pages=4, timeout=30):
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.__browser = None
+        self.__idle_pages = {}
+        self.__lock = None
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the pool shared by the whole process.
+
+        The pool is created on first use and its browser is closed when the
+        process exits.
+
+        Returns:
+            BrowserPool: The shared pool.
+        """
+        if cls.__shared is None:
+            cls.__shared = cls()
+            atexit.register(cls.__shared.close)
+        return cls.__shared
+
+    def compile(self, editor_url, source):
+        """
+        Compile a game in an editor page and return the console messages.
+
+        Args:
+            editor_url (str): The URL of the fork's editor.html.
+            source (str): The PuzzleScript source code to compile.
+
+        Returns:
+            list: A ConsoleMessage for each console message.
+
+        Raises:
+            PSBSError: If the browser can't be launched or the game can't be
+            compiled.
+        """
+        return get_event_loop().run_until_complete(
+            self.compile_async(editor_url, source)
+        )
+
+    async def compile_async(self, editor_url, source):
+        """
+        Compile a game in an editor page and return the console messages.
+
+        Several games can be compiled at once, each takes its own page.
+
+        Args:
+            editor_url (str): The URL of the fork's editor.html.
+            source (str): The PuzzleScript source code to compile.
+
+        Returns:
+            list: A ConsoleMessage for each console message.
+
+        Raises:
+            PSBSError: If the browser can't be launched or the game can't be
+            compiled.
+        """
+        # Try again on a fresh page if the first one fails part way through
+        for attempt in range(2):
+            page = await self.__acquire(editor_url)
+            try:
+                messages = await wait_for(
+                    self.__compile_page(page, source), self.timeout
+                )
+            except (PyppeteerError, AsyncTimeoutError) as err:
+                await self.__discard(page)
+                if attempt:
+                    raise PSBSError(
+                        f"Failed to compile game in headless Chromium\n  {err}"
+                    ) from err
+                continue
+            await self.__release(editor_url, page)
+            return messages
+        return []
+
+    def close(self):
+        """
+        Close the browser and all of its pages.
+        """
+        if self.__browser is None:
+            return
+        loop = get_event_loop()
+        if loop.is_closed() or loop.is_running():
+            return
+        loop.run_until_complete(self.__close_browser())
+
+    async def __acquire(self, editor_url):
+        """
+        Take a healthy page with the editor loaded, loading one if needed.
+
+        Args:
+            editor_url (str): The URL of the fork's editor.html.
+
+        Returns:
+            Page: The page.
+        """
+        if self.__lock is None:
+            self.__lock = Lock()
+        async with self.__lock:
+            if not self.__browser_alive():
+                await self.__restart_browser()
+            browser = self.__browser
+        idle_pages = self.__idle_pages.setdefault(editor_url, [])
+        while idle_pages:
+            page = idle_pages.pop()
+            if await self.__page_healthy(page):
+                return page
+            await self.__discard(page)
+        try:
+            page = await browser.newPage()
+            await page.goto(editor_url, timeout=self.timeout * 1000)
+        except (PyppeteerError, AsyncTimeoutError) as err:
+            raise PSBSError(
+                f"Failed to load {editor_url} in headless Chromium\n  {err}"
+            ) from err
+        return page
+
+    async def __release(self, editor_url, page):
+        """
+        Return a page to the pool once a compile is done with it, closing it
+        if the pool is full.
+
+        Args:
+            editor_url (str): The URL of the editor loaded in the page.
+            page (Page): The page.
+        """
+        idle_pages = self.__idle_pages.setdefault(editor_url, [])
+        if len(idle_pages) < self.max_pages:
+            idle_pages.append(page)
+        else:
+            await self.__discard(page)
+
+    @staticmethod
+    async def __compile_page(page, source):
+        """
+        Compile a game in a page and read back the console messages.
+
+        Args:
+            page (Page): A page with the editor loaded.
+            source (str): The PuzzleScript source code to compile.
+
+        Returns:
+            list: A ConsoleMessage for each console message.
+        """
+        return [
+            ConsoleMessage(*message)
+            for message in await page.evaluate(_COMPILE_SCRIPT, source)
+        ]
+
+    async def __page_healthy(self, page):
+        """
+        Check a page is still open and has the editor loaded.
+
+        Args:
+            page (Page): The page to check.
+
+        Returns:
+            bool: True if the page can be used to compile games.
+        """
+        if page.isClosed() or not self.__browser_alive():
+            return False
+        try:
+            return await wait_for(page.evaluate(_HEALTH_SCRIPT), 5)
+        except (PyppeteerError, AsyncTimeoutError):
+            return False
+
+    async def __discard(self, page):
+        """
+        Close a page, restarting the browser if it has crashed.
+
+        Args:
+            page (Page): The page to close.
+        """
+        if not self.__browser_alive():
+            await self.__restart_browser()
+            return
+        try:
+            await page.close()
+        except PyppeteerError:
+            pass
+
+    def __browser_alive(self):
+        """
+        Check the browser is running.
+
+        Returns:
+            bool: True if the browser has been launched and hasn't exited.
+        """
+        if self.__browser is None:
+            return False
+        process = self.__browser.process
+        return process is None or process.poll() is None
+
+    async def __restart_browser(self):
+        """
+        Close the browser if there is one, then launch a new one.
+
+        Raises:
+            PSBSError: If the browser can't be launched.
+        """
+        await self.__close_browser()
+        try:
+            # Attempt to launch headless browser
+            self.__browser = await launch()
+        except OSError as err:
+            err_message = [
+                f"Failed to launch headless Chromium instance\n  {err}",
+                "On Windows this may be caused by this issue:",
+                "https://github.com/pyppeteer/pyppeteer/issues/248",
+            ]
+            raise PSBSError("\n".join(err_message)) from err
+
+    async def __close_browser(self):
+        """
+        Close the browser and forget its pages.
+        """
+        browser, self.__browser = self.__browser, None
+        self.__idle_pages = {}
+        if browser is None:
+            return
+        try:
+            await browser.close()
+        except (PyppeteerError, OSError):
+            pass
@@ -7,6 +7,7 @@ This file provides functions for loading configuration settings.
 
 from .utils import read_yaml
 
+from .analyzer import RUNTIME_BUDGETS
 from .extension import Extension
 
 
@@ -32,6 +33,7 @@ def get_config(config_file=None):
         "engine": "https://www.puzzlescript.net/",
         "template": "main.pss",
         "user_extensions": [],
+        "runtime_budgets": dict(RUNTIME_BUDGETS),
     }
 
     defaults.update(Extension.get_extension_configs())
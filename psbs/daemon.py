@@ -0,0 +1,109 @@
+"""
+DAEMON
+
+This file provides the protocol spoken between psbs and the psbsd build
+daemon, and the client side of it.
+
+psbsd keeps projects loaded between requests, along with the modules they
+need, so a build sent to it skips starting Python's heavier dependencies
+and reloading the project's templates and extensions. Requests and
+responses are lines of JSON sent over a Unix socket. A request names its
+command, the project directory and the command's options:
+
+    {"psbs": "0.3.3", "command": "build", "directory": "/home/me/game",
+     "options": {"verify": false, "force": false}}
+
+The daemon answers with a line for each piece of output the command
+prints as it prints it, then a line with the result:
+
+    {"output": "Building script.txt\\n"}
+    {"status": "ok", "error": null, "milliseconds": 12.3}
+
+A status of "error" comes with the error message, and a status of
+"version" means the daemon is running a different version of PSBS and
+didn't handle the request.
+
+This module only imports the standard library, platformdirs and PSBS's
+utilities, so asking the daemon for a build is quick.
+
+Example:
+    result = request("build", {"verify": False, "force": False})
+    if result is None:
+        print("psbsd isn't running")
+
+"""
+
+import json
+import socket
+from os import environ, getcwd, path
+
+from platformdirs import user_data_dir
+
+from .errors import PSBSError
+from .utils import package_version
+
+# The commands the daemon accepts
+COMMANDS = ["build", "export", "verify"]
+
+
+def socket_path():
+    """
+    Get the path of the daemon's socket.
+
+    Returns:
+        str: The path set by the PSBSD_SOCKET environment variable, or
+        psbsd.sock in the user data directory.
+    """
+    return environ.get("PSBSD_SOCKET") or path.join(
+        user_data_dir(appname="psbs", appauthor="psbs"), "psbsd.sock"
+    )
+
+
+def request(command, options, directory=None):
+    """
+    Ask the daemon to run a command, if it is running.
+
+    The command's output is printed as the daemon sends it.
+
+    Args:
+        command (str): The command, one of COMMANDS.
+        options (dict): The command's options.
+        directory (str, optional): The project directory. Defaults to the
+            current working directory.
+
+    Returns:
+        dict: The result, with the status, error message and milliseconds
+        the daemon took, or None if the daemon isn't running or is running
+        a different version of PSBS.
+
+    Raises:
+        PSBSError: If the daemon stops before finishing the command.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    message = {
+        "psbs": package_version("psbs"),
+        "command": command,
+        "directory": path.abspath(directory or getcwd()),
+        "options": options,
+    }
+    try:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path())
+    except OSError:
+        return None
+    try:
+        with connection, connection.makefile("rwb") as stream:
+            stream.write(json.dumps(message).encode("UTF-8") + b"\n")
+            stream.flush()
+            for line in stream:
+                response = json.loads(line)
+                if "output" in response:
+                    print(response["output"], end="", flush=True)
+                elif response.get("status") == "version":
+                    return None
+                else:
+                    return response
+    except (OSError, ValueError) as err:
+        raise PSBSError(f"Error: Lost connection to psbsd\n  {err}") from err
+    raise PSBSError("Error: psbsd stopped before finishing the request")
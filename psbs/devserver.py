@@ -0,0 +1,270 @@
+"""
+DEV SERVER
+
+This file provides a local web server for playing a game while it is being
+worked on.
+
+The game is served as the engine's standalone HTML page, built from the
+local mirror of the engine, so no network connection is needed. Each page
+served listens for new versions of the game with server-sent events, when
+the game is rebuilt it is sent to every open tab and recompiled in place,
+the same as pressing rebuild in the editor, so the tabs never need to load
+the page again.
+
+Example:
+    server = DevServer(standalone_html, engine, source, port=8000)
+    print(f"Play at {server.url}")
+    server.publish(new_source)
+    server.close()
+
+"""
+
+import json
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Thread
+from urllib.parse import parse_qs, urlsplit
+
+from .errors import PSBSError
+from .htmlbuilder import html_chunks
+
+# The seconds between comments sent to keep an event stream open
+_KEEPALIVE = 15
+
+# Listen for new versions of the game, recompiling it in place if the
+# engine can, otherwise loading the page again
+_RELOAD_SCRIPT = """<script>
+(function () {
+    var events = new EventSource("/events?version=%d");
+    events.addEventListener("script", function (event) {
+        if (typeof compile === "function") {
+            compile(["rebuild"], JSON.parse(event.data));
+        } else {
+            location.reload();
+        }
+    });
+})();
+</script>
+"""
+
+
+class DevServer:
+    """
+    A local web server which plays a game and reloads it when it changes.
+
+    The server runs in background threads until closed.
+
+    Args:
+        standalone_html (str): The engine's standalone inlined HTML
+            template.
+        engine (str): The base URL of the PuzzleScript engine.
+        source (str): The PuzzleScript source code of the game.
+        port (int, optional): The port to listen on, or 0 for any free
+            port. Defaults to 8000.
+
+    Attributes:
+        url (str): The URL the game is played at.
+        version (int): The number of times the game has been published.
+
+    Methods:
+        publish(source): Send a new version of the game to every open tab.
+        page(): Get the page which plays the latest version of the game.
+        source(): Get the latest version of the game.
+        events(version): Wait for versions of the game newer than a tab's.
+        listeners(): Get the number of tabs listening for new versions.
+        close(): Stop the server.
+
+    Raises:
+        PSBSError: If the server can't listen on the port.
+    """
+
+    def __init__(self, standalone_html, engine, source, port=8000):
+        self.version = 0
+        self.__standalone_html = standalone_html
+        self.__engine = engine
+        self.__source = None
+        self.__page = None
+        self.__listeners = 0
+        self.__closed = False
+        self.__condition = Condition()
+        self.publish(source)
+
+        handler = partial(_DevRequestHandler, dev_server=self)
+        try:
+            self.__server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        except OSError as err:
+            raise PSBSError(
+                f"Error: Unable to start server on port {port}\n  {err}"
+            ) from err
+        host, port = self.__server.server_address[:2]
+        self.url = f"http://{host}:{port}/"
+        Thread(target=self.__server.serve_forever, daemon=True).start()
+
+    def publish(self, source):
+        """
+        Send a new version of the game to every open tab.
+
+        Args:
+            source (str): The PuzzleScript source code of the game.
+
+        Returns:
+            bool: True if the game changed and was sent, False if it is the
+            same as the version already published.
+        """
+        if source == self.__source:
+            return False
+        page = "".join(
+            html_chunks(self.__standalone_html, source, self.__engine)
+        )
+        with self.__condition:
+            self.version += 1
+            self.__source = source
+            self.__page = _add_reload_script(page, self.version).encode(
+                "UTF-8"
+            )
+            self.__condition.notify_all()
+        return True
+
+    def listeners(self):
+        """
+        Get the number of tabs listening for new versions of the game.
+
+        Returns:
+            int: The number of tabs.
+        """
+        with self.__condition:
+            return self.__listeners
+
+    def close(self):
+        """
+        Stop the server, closing every event stream.
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def page(self):
+        """
+        Get the page which plays the latest version of the game.
+
+        Returns:
+            bytes: The HTML page.
+        """
+        with self.__condition:
+            return self.__page
+
+    def source(self):
+        """
+        Get the latest version of the game.
+
+        Returns:
+            str: The PuzzleScript source code.
+        """
+        with self.__condition:
+            return self.__source
+
+    def events(self, version):
+        """
+        Wait for versions of the game newer than the one a tab has.
+
+        Args:
+            version (int): The version the tab has.
+
+        Yields:
+            tuple: The newest version and its source code, or None for both
+            if nothing changed for a while and the stream should be kept
+            open.
+        """
+        with self.__condition:
+            self.__listeners += 1
+        try:
+            while True:
+                with self.__condition:
+                    self.__condition.wait_for(
+                        lambda: self.__closed or self.version > version,
+                        _KEEPALIVE,
+                    )
+                    if self.__closed:
+                        return
+                    if self.version > version:
+                        version = self.version
+                        update = (version, self.__source)
+                    else:
+                        update = (None, None)
+                yield update
+        finally:
+            with self.__condition:
+                self.__listeners -= 1
+
+
+class _DevRequestHandler(BaseHTTPRequestHandler):
+    # Serve the game page, its source and its event stream
+
+    def __init__(self, *args, dev_server, **kwargs):
+        self.dev_server = dev_server
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path in ("/", "/index.html"):
+            self.__send(self.dev_server.page(), "text/html; charset=utf-8")
+        elif url.path == "/script.txt":
+            self.__send(
+                self.dev_server.source().encode("UTF-8"),
+                "text/plain; charset=utf-8",
+            )
+        elif url.path == "/events":
+            self.__stream_events(url.query)
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args):
+        pass
+
+    def __send(self, content, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def __stream_events(self, query):
+        # Reconnecting browsers say which version they last received
+        version = self.headers.get("Last-Event-ID") or parse_qs(query).get(
+            "version", ["0"]
+        )[0]
+        try:
+            version = int(version)
+        except ValueError:
+            version = 0
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self.wfile.write(b"retry: 500\n\n")
+            self.wfile.flush()
+            for new_version, source in self.dev_server.events(version):
+                if new_version is None:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    self.wfile.write(
+                        f"id: {new_version}\nevent: script\n"
+                        f"data: {json.dumps(source)}\n\n".encode("UTF-8")
+                    )
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def _add_reload_script(page, version):
+    # Add the script which listens for new versions to the end of the body
+    script = _RELOAD_SCRIPT % version
+    body_end = page.lower().rfind("</body>")
+    if body_end < 0:
+        return page + script
+    return page[:body_end] + script + page[body_end:]
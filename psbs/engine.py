@@ -0,0 +1,499 @@
+"""
+ENGINE
+
+This file provides a local mirror of a PuzzleScript engine.
+
+Verifying and exporting a game both need files from the engine the project
+uses: the editor to compile the game in and the standalone template to
+export it with. Rather than fetching these from the engine's website every
+time, the mirror keeps a copy of the editor, the player and the standalone
+template along with the scripts, styles and images they load under the
+user data directory. Copies are kept for each engine URL and version, and
+are only downloaded again when updated.
+
+The mirror is served to the headless browser by a small local HTTP server.
+Pages can also be revalidated on their own with a conditional request, so
+an up to date copy costs no more than a "304 Not Modified" response, or
+nothing at all while the server says it is still fresh.
+
+Example:
+    engine = EngineCache("https://www.puzzlescript.net/")
+    engine.ensure()
+    print(engine.url("editor.html"))
+
+"""
+
+import json
+import re
+from functools import partial
+from hashlib import sha256
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from os import listdir, makedirs, path, replace, walk
+from shutil import copytree, rmtree
+from tempfile import mkdtemp
+from threading import Thread
+from time import time
+
+from platformdirs import user_data_dir
+from requests import RequestException, get
+
+from .errors import PSBSError
+from .utils import url_join
+
+# The pages of the engine which are always mirrored
+ENGINE_PAGES = ["editor.html", "play.html", "standalone_inlined.txt"]
+
+# The names of finished version directories, downloads in progress are kept
+# in hidden directories alongside them
+_VERSION_PATTERN = re.compile(r"[0-9a-f]{12}")
+
+# How long a response may be used without revalidating it
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)", flags=re.IGNORECASE)
+
+# Files loaded by a page, relative links to scripts, styles and media
+_ASSET_PATTERN = re.compile(
+    r"""(?:src|href)\s*=\s*["']"""
+    r"""(?![a-z][a-z0-9+.-]*:|/)([^"'#?]+\.(?:js|css|png|gif|jpe?g|ico|svg"""
+    r"""|woff2?|ttf|json|wav|mp3|ogg))["'#?]""",
+    flags=re.IGNORECASE,
+)
+
+
+class EngineCache:
+    """
+    A local mirror of a PuzzleScript engine.
+
+    Args:
+        engine (str): The base URL of the PuzzleScript engine.
+        cache_dir (str, optional): The directory mirrors are kept in.
+            Defaults to the engines directory in the user data directory.
+
+    Attributes:
+        engine (str): The base URL of the PuzzleScript engine.
+        cache_dir (str): The directory mirrors are kept in.
+        directory (str): The directory the mirrors of this engine are kept
+            in.
+
+    Methods:
+        version(): Get the version of the engine that is mirrored.
+        update(): Download the engine, replacing the mirrored version.
+        ensure(): Download the engine if it isn't mirrored yet.
+        revalidate(name, offline=False): Read a mirrored page, updating it
+            first if the engine has a newer one.
+        local_path(name): Get the path of a mirrored file.
+        read(name): Read a mirrored file.
+        url(name): Get a local URL that serves a mirrored file.
+    """
+
+    __server = None
+
+    def __init__(self, engine, cache_dir=None):
+        self.engine = url_join(engine, "")
+        self.cache_dir = cache_dir or path.join(
+            user_data_dir(appname="psbs", appauthor="psbs"), "engines"
+        )
+        key = sha256(self.engine.encode("UTF-8")).hexdigest()[:16]
+        self.directory = path.join(self.cache_dir, key)
+
+    def version(self):
+        """
+        Get the version of the engine that is mirrored.
+
+        Returns:
+            str: The version, or None if the engine isn't mirrored.
+        """
+        current = self.__read_current()
+        return current["version"] if current else None
+
+    def update(self):
+        """
+        Download the engine, replacing the mirrored version.
+
+        The pages in ENGINE_PAGES are downloaded along with the files they
+        load. The version is a hash of every file downloaded, so an unchanged
+        engine keeps its version and a change to any of its scripts or styles
+        gives a new one.
+
+        Returns:
+            str: The version of the engine that is now mirrored.
+
+        Raises:
+            PSBSError: If the engine's pages can't be downloaded or saved.
+        """
+        print(f"Downloading engine from {self.engine}")
+        try:
+            makedirs(self.directory, exist_ok=True)
+            download_dir = mkdtemp(dir=self.directory, prefix=".download-")
+        except OSError as err:
+            raise PSBSError(
+                f"Error: Unable to create engine cache\n  {err}"
+            ) from err
+
+        try:
+            pages = {}
+            validators = {}
+            for name in ENGINE_PAGES:
+                pages[name], validators[name] = self.__download(name)
+            assets = set()
+            for name in ("editor.html", "play.html"):
+                assets.update(
+                    _ASSET_PATTERN.findall(pages[name].decode("UTF-8"))
+                )
+            files = dict(pages)
+            for asset in sorted(assets):
+                if ".." in asset.split("/"):
+                    continue
+                try:
+                    files[asset] = self.__download(asset)[0]
+                except PSBSError:
+                    print(f"Warning: unable to download {asset}")
+
+            for name, content in files.items():
+                file_path = path.join(download_dir, *name.split("/"))
+                makedirs(path.dirname(file_path), exist_ok=True)
+                with open(file_path, "wb") as file:
+                    file.write(content)
+            version = _version(download_dir)
+            self.__install(
+                download_dir,
+                {
+                    "engine": self.engine,
+                    "version": version,
+                    "validators": validators,
+                },
+            )
+        except OSError as err:
+            raise PSBSError(
+                f"Error: Unable to write engine cache\n  {err}"
+            ) from err
+        finally:
+            rmtree(download_dir, ignore_errors=True)
+        version_dir = path.join(self.directory, version)
+        print(f"Engine version {version} cached in {version_dir}")
+        return version
+
+    def ensure(self):
+        """
+        Download the engine if it isn't mirrored yet.
+
+        Returns:
+            str: The version of the engine that is mirrored.
+
+        Raises:
+            PSBSError: If the engine needed downloading and couldn't be.
+        """
+        return self.version() or self.update()
+
+    def revalidate(self, name, offline=False):
+        """
+        Read a mirrored page, updating it first if the engine has a newer one.
+
+        The page is requested with the ETag and Last-Modified date it was
+        last downloaded with, so the server only sends it again if it has
+        changed, and isn't requested at all while the server's max-age says
+        it is still fresh. If the engine can't be reached the mirrored copy
+        is used.
+
+        Args:
+            name (str): The name of a page in ENGINE_PAGES.
+            offline (bool, optional): If True, use the mirrored copy without
+                contacting the engine. Defaults to False.
+
+        Returns:
+            bytes: The content of the page.
+
+        Raises:
+            PSBSError: If the page isn't mirrored and can't be downloaded.
+        """
+        current = self.__read_current()
+        if current is None:
+            if offline:
+                raise PSBSError(
+                    f"Error: Engine {self.engine} is not cached\n"
+                    "  Run without --offline to download it"
+                )
+            self.update()
+            return self.read(name)
+
+        validators = current.setdefault("validators", {}).get(name, {})
+        fresh = time() - validators.get("checked", 0) < validators.get(
+            "max_age", 0
+        )
+        if offline or fresh:
+            return self.read(name)
+
+        try:
+            content, new_validators = self.__download(name, validators)
+        except PSBSError as err:
+            print(f"Warning: using cached {name}, unable to check for update")
+            print(f"  {str(err).splitlines()[-1].strip()}")
+            return self.read(name)
+
+        try:
+            if content is not None:
+                current["validators"][name] = new_validators
+                self.__update_page(current, name, content)
+            else:
+                # Not modified, keep validators the response left out
+                current["validators"][name] = {**validators, **new_validators}
+                self.__write_current(current)
+        except OSError as err:
+            raise PSBSError(
+                f"Error: Unable to write engine cache\n  {err}"
+            ) from err
+        return content if content is not None else self.read(name)
+
+    def local_path(self, name):
+        """
+        Get the path of a mirrored file.
+
+        Args:
+            name (str): The name of the file relative to the engine's URL.
+
+        Returns:
+            str: The path of the file.
+
+        Raises:
+            PSBSError: If the engine isn't mirrored.
+        """
+        version = self.version()
+        if version is None:
+            raise PSBSError(
+                f"Error: Engine {self.engine} is not cached\n"
+                "  Run 'psbs engine update' to download it"
+            )
+        return path.join(self.directory, version, *name.split("/"))
+
+    def read(self, name):
+        """
+        Read a mirrored file.
+
+        Args:
+            name (str): The name of the file relative to the engine's URL.
+
+        Returns:
+            bytes: The content of the file.
+
+        Raises:
+            PSBSError: If the file isn't mirrored.
+        """
+        try:
+            with open(self.local_path(name), "rb") as file:
+                return file.read()
+        except OSError as err:
+            raise PSBSError(
+                f"Error: Unable to read cached engine file\n  {err}"
+            ) from err
+
+    def url(self, name):
+        """
+        Get a local URL that serves a mirrored file.
+
+        The first call starts a local HTTP server for the engine cache,
+        which runs for the rest of the process.
+
+        Args:
+            name (str): The name of the file relative to the engine's URL.
+
+        Returns:
+            str: The URL of the file.
+
+        Raises:
+            PSBSError: If the engine isn't mirrored.
+        """
+        relative_path = path.relpath(self.local_path(name), self.cache_dir)
+        return url_join(
+            EngineCache.__serve(self.cache_dir),
+            *relative_path.split(path.sep),
+        )
+
+    def __download(self, name, validators=None):
+        """
+        Download a file from the engine.
+
+        Args:
+            name (str): The name of the file relative to the engine's URL.
+            validators (dict, optional): The validators the file was last
+                downloaded with, to only download it if it has changed.
+                Defaults to None.
+
+        Returns:
+            tuple: The content of the file, or None if it hasn't changed,
+            and the validators to download it with next time.
+
+        Raises:
+            PSBSError: If the file can't be downloaded.
+        """
+        file_url = url_join(self.engine, name)
+        headers = {}
+        if validators and validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators and validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        try:
+            response = get(file_url, headers=headers, timeout=10)
+        except RequestException as err:
+            raise PSBSError(
+                f"Error: Unable to download {file_url}\n  {err}"
+            ) from err
+        if response.status_code not in (200, 304) or (
+            response.status_code == 304 and not headers
+        ):
+            raise PSBSError(
+                f"Error: Unable to download {file_url}\n"
+                f"  Server response: {response.status_code}"
+            )
+
+        new_validators = {"checked": time()}
+        if response.headers.get("ETag"):
+            new_validators["etag"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            new_validators["last_modified"] = response.headers["Last-Modified"]
+        max_age = _MAX_AGE_PATTERN.search(
+            response.headers.get("Cache-Control", "")
+        )
+        if max_age and "no-cache" not in response.headers["Cache-Control"]:
+            new_validators["max_age"] = int(max_age.group(1))
+        if response.status_code == 304:
+            return None, new_validators
+        return response.content, new_validators
+
+    def __update_page(self, current, name, content):
+        """
+        Mirror a new version of the engine with one page changed.
+
+        The mirrored version is copied with the new page into a new version
+        directory which is swapped in once complete, so a version always
+        names the same content and the old one stays whole for anything
+        still reading it.
+
+        Args:
+            current (dict): The record of the mirrored version, with the new
+                page's validators.
+            name (str): The name of the page in ENGINE_PAGES.
+            content (bytes): The new content of the page.
+
+        Raises:
+            OSError: If the new version can't be written.
+        """
+        download_dir = mkdtemp(dir=self.directory, prefix=".download-")
+        try:
+            copytree(
+                path.join(self.directory, current["version"]),
+                download_dir,
+                dirs_exist_ok=True,
+            )
+            with open(path.join(download_dir, name), "wb") as file:
+                file.write(content)
+            self.__install(
+                download_dir, {**current, "version": _version(download_dir)}
+            )
+        finally:
+            rmtree(download_dir, ignore_errors=True)
+
+    def __install(self, download_dir, current):
+        """
+        Make a downloaded version the mirrored one and remove older ones.
+
+        A version which is already mirrored is kept as it is. Downloads other
+        processes may still be writing are left alone.
+
+        Args:
+            download_dir (str): The directory the complete version was
+                written to.
+            current (dict): The engine, version and validators of the new
+                version.
+
+        Raises:
+            OSError: If the version can't be swapped in.
+        """
+        version = current["version"]
+        version_dir = path.join(self.directory, version)
+        if not path.isdir(version_dir):
+            replace(download_dir, version_dir)
+        self.__write_current(current)
+        for entry in listdir(self.directory):
+            entry_path = path.join(self.directory, entry)
+            if (
+                entry != version
+                and _VERSION_PATTERN.fullmatch(entry)
+                and path.isdir(entry_path)
+            ):
+                rmtree(entry_path, ignore_errors=True)
+
+    def __read_current(self):
+        """
+        Read the record of the mirrored version of the engine.
+
+        Returns:
+            dict: The engine, version and validators of the mirror, or None
+            if the engine isn't mirrored.
+        """
+        try:
+            with open(
+                path.join(self.directory, "current.json"), encoding="UTF-8"
+            ) as file:
+                current = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(current, dict) or not path.isdir(
+            path.join(self.directory, str(current.get("version")))
+        ):
+            return None
+        return current
+
+    def __write_current(self, current):
+        """
+        Write the record of the mirrored version of the engine.
+
+        Args:
+            current (dict): The engine, version and validators of the mirror.
+
+        Raises:
+            OSError: If the record can't be written.
+        """
+        current_path = path.join(self.directory, "current.json")
+        with open(current_path + ".new", "w", encoding="UTF-8") as file:
+            json.dump(current, file)
+        replace(current_path + ".new", current_path)
+
+    @classmethod
+    def __serve(cls, directory):
+        """
+        Serve a directory over HTTP on localhost.
+
+        Args:
+            directory (str): The directory to serve.
+
+        Returns:
+            str: The base URL of the server.
+        """
+        if cls.__server is None or cls.__server[0] != directory:
+            handler = partial(_QuietRequestHandler, directory=directory)
+            server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            Thread(target=server.serve_forever, daemon=True).start()
+            cls.__server = (directory, server)
+        host, port = cls.__server[1].server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+def _version(directory):
+    # The version of a mirrored engine, a hash of every file and its name
+    digest = sha256()
+    for root, directories, filenames in walk(directory):
+        directories.sort()
+        for filename in sorted(filenames):
+            file_path = path.join(root, filename)
+            name = path.relpath(file_path, directory).replace(path.sep, "/")
+            with open(file_path, "rb") as file:
+                content = file.read()
+            digest.update(f"{name}\0{len(content)}\0".encode("UTF-8"))
+            digest.update(content)
+    return digest.hexdigest()[:12]
+
+
+class _QuietRequestHandler(SimpleHTTPRequestHandler):
+    # Serve files without logging every request to the console
+
+    def log_message(self, *args):
+        pass
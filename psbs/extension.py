@@ -19,8 +19,8 @@ class Extension:
     A class for loading and managing PSBS extensions.
 
     This class provides functionality for registering extension methods,
-    filters, and post-processing functions, as well as loading both built-in
-    and user-defined extensions.
+    filters, post-processing functions and the files extensions read, as
+    well as loading both built-in and user-defined extensions.
 
     Args:
         config (dict): Configuration settings for the extension.
@@ -29,12 +29,15 @@ class Extension:
         methods (dict): A dictionary to store registered extension methods.
         filters (dict): A dictionary to store registered extension filters.
         post (list): A list to store registered post-processing functions.
+        inputs (list): A list of files the extension has read.
         config (dict): Configuration settings for the extension.
 
     Methods:
         register(self, name, function): Registers an extension method.
         register_filter(self, name, function): Registers an extension filter.
         register_post(self, function): Registers a post-processing function.
+        register_input(self, filename): Registers a file read by the
+        extension.
         get_config(cls): Returns the configuration settings for the extension.
         get_extensions(cls, user_extensions=""): Loads and returns extensions.
         get_extension_configs(cls, user_extensions=""): Returns configuration
@@ -45,6 +48,7 @@ class Extension:
         self.methods = {}
         self.filters = {}
         self.post = []
+        self.inputs = []
         # Replace missing or None config values with default values
         self.config = {
             key: value if config.get(key) is None else config.get(key, value)
@@ -80,6 +84,19 @@ class Extension:
         """
         self.post.append(function)
 
+    def register_input(self, filename):
+        """
+        Register a file read by the extension.
+
+        Incremental builds rebuild the project when a registered file
+        changes, so extensions should register every file they read while
+        rendering a template.
+
+        Args:
+            filename (str): The path to the file.
+        """
+        self.inputs.append(filename)
+
     @staticmethod
     def get_config():
         """
@@ -99,6 +116,10 @@ class Extension:
         """
         Load and return available extensions.
 
+        Only the built-in extensions and those defined by the given user
+        extension files are returned, so projects loaded in the same process
+        don't run each other's user extensions.
+
         Args:
             user_extensions (list, optional): List of paths to user-defined
             extension files. Defaults to None.
@@ -107,11 +128,17 @@ class Extension:
             list: A list of Extension subclass instances.
         """
         import_path = join(dirname(__file__), "extensions")
+        modules = []
 
         # Import built-in extensions
         for extension in glob.glob(join(import_path, "*.py")):
             if isfile(extension) and not extension.endswith("__init__.py"):
-                import_module(f"psbs.extensions.{basename(extension)[:-3]}")
+                modules.append(
+                    import_module(
+                        f"psbs.extensions.{basename(extension)[:-3]}"
+                    )
+                )
+        builtin_names = {module.__name__ for module in modules}
 
         # Import user-defined extensions
         if isinstance(user_extensions, str):
@@ -126,10 +153,28 @@ class Extension:
             )
             if spec and spec.loader:
                 module = util.module_from_spec(spec)
-                sys.modules[module_name] = module
+                # Keep built-in extensions importable for later calls, which
+                # may be for a project without this user extension
+                if module_name not in builtin_names:
+                    sys.modules[module_name] = module
                 spec.loader.exec_module(module)
-
-        return cls.__subclasses__()
+                modules.append(module)
+
+        # Only return classes the modules define now, leaving out those of
+        # earlier versions of reloaded user extensions and of other projects'
+        # user extensions, which remain subclasses until they are garbage
+        # collected
+        defined = {
+            value
+            for module in modules
+            for value in vars(module).values()
+            if isinstance(value, type)
+        }
+        return [
+            extension
+            for extension in cls.__subclasses__()
+            if extension in defined
+        ]
 
     @classmethod
     def get_extension_configs(cls, user_extensions=None):
@@ -6,6 +6,8 @@ debugging and release builds.
 """
 
 from psbs.extension import Extension
+from psbs.minifier import minify_report, rename_objects
+from psbs.psparser import PSParser
 
 
 class Build(Extension):
@@ -25,6 +27,9 @@ class Build(Extension):
         get_build(): Get the current build type.
         is_debug(): Check if the current build type is 'debug'.
         is_release(): Check if the current build type is 'release'.
+        minifies_script(): Check if minify_script minifies built scripts.
+        minify_script(input_str): Minify the built script of a release
+            build.
     """
 
     def __init__(self, config):
@@ -32,6 +37,7 @@ class Build(Extension):
         self.register("build", self.get_build)
         self.register("debug", self.is_debug)
         self.register("release", self.is_release)
+        self.register_post(self.minify_script)
 
     @staticmethod
     def get_config():
@@ -41,7 +47,7 @@ class Build(Extension):
         Returns:
             dict: A dictionary containing default configuration values.
         """
-        return {"name": "debug"}
+        return {"name": "debug", "minify": True, "rename_objects": False}
 
     def get_build(self):
         """
@@ -69,3 +75,37 @@ class Build(Extension):
             bool: True if current build type is 'release', False otherwise.
         """
         return self.get_build() == "release"
+
+    def minifies_script(self):
+        """
+        Check if minify_script minifies built scripts, which it does for
+        release builds unless the minify option is turned off.
+
+        Returns:
+            bool: True if built scripts are minified, False otherwise.
+        """
+        return self.is_release() and bool(self.config["minify"])
+
+    def minify_script(self, input_str):
+        """
+        Minify the built script of a release build.
+
+        Comments and redundant whitespace are removed, and if the
+        rename_objects option is set objects are given short names too.
+        Other build types are left as they are.
+
+        Args:
+            input_str (str): The built PuzzleScript source code.
+
+        Returns:
+            str: The minified source code.
+        """
+        if not self.minifies_script():
+            return input_str
+        print("Minifying script.txt")
+        output = PSParser.minify(input_str)
+        if self.config["rename_objects"]:
+            output, renamed = rename_objects(output)
+            print(f"Shortened {len(renamed)} names")
+        print(minify_report(input_str, output))
+        return output
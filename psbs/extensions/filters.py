@@ -5,11 +5,11 @@ This file provides an extension class that provides various filters for use
 within PSBS Templates.
 """
 
-import re
 from textwrap import wrap
-from itertools import chain
+from itertools import chain, islice
 
 from psbs.extension import Extension
+from psbs.level import Level
 from psbs.psparser import PSParser
 
 
@@ -88,12 +88,12 @@ class Filters(Extension):
         Returns:
             list: A list of levels.
         """
-        levels_string = PSParser.redact_comments(levels_string, redact_char="")
-        output = []
-        for line in levels_string.splitlines():
-            # Remove messages from output
-            output.append(line.split("message")[0].strip())
-        return re.split(r"(?<=\S)\n+\n+(?=\S)", "\n".join(output))
+        # Messages are removed from the output
+        return [
+            "\n".join(level.rows)
+            for level in PSParser.iter_levels(levels_string)
+            if level.rows
+        ]
 
     def combine_levels(self, levels_list, columns=0):
         """
@@ -108,8 +108,18 @@ class Filters(Extension):
             str: The combined levels.
         """
         if isinstance(levels_list, str):
-            # Convert to list if passed a string
-            levels_list = self.levels_to_list(levels_list)
+            # Stream levels from the string rather than building a list
+            levels = (
+                Level.from_rows(level.rows)
+                for level in PSParser.iter_levels(levels_list)
+                if level.rows
+            )
+            if columns > 0:
+                rows = self.__split_rows(levels, columns)
+            else:
+                rows = [levels]
+            return self.__combine_rows(rows)
+
         try:
             # In case we get passed some other kind of iterable
             levels_list = list(levels_list)
@@ -128,21 +138,45 @@ class Filters(Extension):
 
         if columns > 0:
             # Break up list into rows by number of columns
-            rows = list(
-                levels_list[pos : pos + columns]
-                for pos in range(0, len(levels_list), columns)
-            )
+            rows = self.__split_rows(levels_list, columns)
+
+        return self.__combine_rows(rows)
+
+    @staticmethod
+    def __split_rows(levels, columns):
+        """
+        Lazily break levels up into rows of a number of columns.
+
+        Args:
+            levels (iterable): The levels to be broken up.
+            columns (int): Number of columns in each row.
 
-        def combine_row(input_list):
-            level_lines = []
-            for level in input_list:
-                level = level.strip()
-                for line_number, line in enumerate(level.splitlines()):
-                    line = line.strip()
-                    if len(level_lines) <= line_number:
-                        level_lines.append(line)
-                    else:
-                        level_lines[line_number] += line
-            return "\n".join(level_lines)
-
-        return "\n".join([combine_row(row) for row in rows])
+        Yields:
+            list: The levels in each row.
+        """
+        levels = iter(levels)
+        while True:
+            row = list(islice(levels, columns))
+            if not row:
+                return
+            yield row
+
+    @staticmethod
+    def __combine_rows(rows):
+        """
+        Combine rows of levels into one level.
+
+        Args:
+            rows (iterable): The rows to combine, each an iterable of levels
+                as strings or Level objects.
+
+        Returns:
+            str: The combined levels.
+        """
+        return Level.vstack(
+            Level.hstack(
+                level if isinstance(level, Level) else Level.from_text(level)
+                for level in row
+            )
+            for row in rows
+        ).to_text()
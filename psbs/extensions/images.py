@@ -1,18 +1,22 @@
+from os import path
 from textwrap import wrap
 
 from PIL import Image
 from psbs.extension import Extension
+from psbs.psparser import PSParser
 
 
 class Images(Extension):
     def __init__(self, config):
         super().__init__(config)
         self.register("image", self.image_to_object)
+        self.register_post(self.compact_duplicate_sprites)
         self.loaded_images = {}
+        self.__parser = None
 
     @staticmethod
     def get_config():
-        return {"alpha": False, "max_colors": 10}
+        return {"alpha": False, "max_colors": 10, "copy_duplicates": False}
 
     def __rgba_to_hex(self, rgba_tuple):
         if rgba_tuple[3] == 0:
@@ -56,8 +60,15 @@ class Images(Extension):
             print("Warning: max_colors config values over 36 not supported")
             self.config["max_colors"] = 36
 
-        if file in self.loaded_images:
-            image = self.loaded_images[file]
+        # Reuse images loaded by earlier builds unless they have changed
+        self.register_input(file)
+        try:
+            modified = path.getmtime(file)
+        except OSError:
+            modified = None
+        loaded = self.loaded_images.get(file)
+        if modified is not None and loaded and loaded[0] == modified:
+            image = loaded[1]
         else:
             try:
                 image = Image.open(file, "r")
@@ -65,7 +76,7 @@ class Images(Extension):
                 raise self.ExtensionError(
                     f"Unable to read image file\n  {err}"
                 )
-            self.loaded_images[file] = image
+            self.loaded_images[file] = (modified, image)
 
         # Crop image if needed
         right = left + width if width else image.size[0]
@@ -98,3 +109,94 @@ class Images(Extension):
             colors.remove("transparent")
 
         return f'{" ".join(colors)}\n{sprite}'
+
+    def compact_duplicate_sprites(self, input_str):
+        # Only the prelude and objects are needed, and parsing the source up
+        # to the end of the objects gives them at the same offsets, so the
+        # rest of a large game is never split or cleaned
+        objects_str = PSParser(input_str).read_through("objects")
+        if self.__parser is None:
+            parser = PSParser(objects_str)
+        elif self.__parser.source != objects_str:
+            # Reuse unchanged sections from the last build
+            parser = self.__parser.reparse(objects_str)
+        else:
+            parser = self.__parser
+        self.__parser = parser
+        try:
+            ps_objects = parser.get_objects()
+        except (LookupError, ValueError) as err:
+            # Leave objects which can't be parsed for the engine to report
+            print("Warning: unable to parse objects, sprites left as they are")
+            print(f"  {err!r}")
+            return input_str
+
+        # Most games have no duplicates, which only takes the parsed objects
+        # to tell
+        sprites = [obj["body"] for obj in ps_objects.values() if obj["body"]]
+        if len(set(sprites)) == len(sprites):
+            return input_str
+        model = parser.model
+
+        # Find the first object drawn with each sprite
+        originals = {}
+        duplicates = []
+        for span in model.objects:
+            text = model.text(span)
+            if "(" in text:
+                text = PSParser.redact_comments(text)
+            lines = text.split("\n")
+            tokens = lines[0].split()
+            name = tokens[0]
+            if "case_sensitive" not in parser.prelude_options:
+                name = name.lower()
+            body = ps_objects.get(name, {}).get("body")
+            if not body:
+                continue
+            original = originals.setdefault(body, tokens[0])
+            if original == tokens[0] or any(
+                token.startswith("copy:") for token in tokens
+            ):
+                continue
+            # Keep the object up to the end of its colours, if the sprite
+            # after them is longer than the reference and free of comments,
+            # which only the original text still has
+            end = len(lines[0])
+            for line in lines[1:]:
+                end += len(line) + 1
+                if line.strip():
+                    break
+            sprite = model.text(span)[end:]
+            if (
+                "(" not in sprite
+                and ")" not in sprite
+                and len(sprite) > len(f" copy:{original}")
+            ):
+                duplicates.append((span, end, original))
+        if not duplicates:
+            return input_str
+
+        if not self.config["copy_duplicates"]:
+            print(
+                f"Warning: {len(duplicates)} objects have the same sprite as"
+                " an earlier object"
+            )
+            for span, _, original in duplicates:
+                line = model.location(span.start)[0]
+                name = model.text(span).partition("\n")[0].strip()
+                print(f"  line {line}: {name} has the sprite of {original}")
+            print("  Set copy_duplicates to use PuzzleScript+ copy: instead")
+            return input_str
+
+        # Replace the sprite of each duplicate with a reference to the
+        # original, keeping its colours
+        output = []
+        position = 0
+        for span, end, original in duplicates:
+            header, _, colors = model.text(span)[:end].partition("\n")
+            output.append(input_str[position : span.start])
+            output.append(f"{header} copy:{original}\n{colors}")
+            position = span.end
+        output.append(input_str[position:])
+        print(f"Replaced {len(duplicates)} duplicate sprites with copy:")
+        return "".join(output)
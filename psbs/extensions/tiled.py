@@ -3,9 +3,10 @@ import shutil
 from xml.etree import ElementTree
 from xml.dom import minidom
 from PIL import Image, ImageColor
-from numpy import array, uint8
+from numpy import array, uint8, uint32, zeros
 from psbs.errors import PSBSError
 from psbs.extension import Extension
+from psbs.level import Level
 from psbs.psparser import PSParser
 from psbs.utils import make_dir, write_file
 
@@ -15,6 +16,7 @@ class Tiled(Extension):
         super().__init__(config)
         self.register("tiled", self.parse_level)
         self.register_post(self.write_tileset_files)
+        self.__parser = None
 
     @staticmethod
     def get_config():
@@ -479,7 +481,14 @@ class Tiled(Extension):
         return pretty_xml
 
     def write_tileset_files(self, input_str):
-        parser = PSParser(input_str)
+        if not self.config["generate_tileset"]:
+            return input_str
+        # Reuse unchanged sections from the last build
+        if self.__parser is None:
+            parser = PSParser(input_str)
+        else:
+            parser = self.__parser.reparse(input_str)
+        self.__parser = parser
         sprite_size = 5
         if "sprite_size" in parser.prelude_options:
             if parser.prelude_options["sprite_size"].isdigit():
@@ -487,8 +496,6 @@ class Tiled(Extension):
         color_palette = parser.prelude_options.get(
             "color_palette", "arnecolors"
         )
-        if not self.config["generate_tileset"]:
-            return input_str
         print("Creating tileset")
         tileset_dir = path.join("bin", "tileset")
         images_dir = path.join(tileset_dir, "images")
@@ -541,6 +548,7 @@ class Tiled(Extension):
         return input_str
 
     def parse_level(self, file):
+        self.register_input(file)
         try:
             level_xml = ElementTree.parse(file)
         except IOError as err:
@@ -548,7 +556,8 @@ class Tiled(Extension):
             return ""
         source = level_xml.getroot()[0].attrib["source"]
         level_csv = level_xml.getroot()[1][0].text
-        tileset_file = path.abspath(path.join(path.dirname(file), source))
+        tileset_file = path.normpath(path.join(path.dirname(file), source))
+        self.register_input(tileset_file)
         try:
             tileset_xml = ElementTree.parse(tileset_file)
         except IOError as err:
@@ -562,12 +571,33 @@ class Tiled(Extension):
                 except (KeyError, IndexError):
                     print("Warning: Incompatible level file")
                     return ""
-        output = ""
-        if level_csv is not None:
-            level_lines = level_csv.strip().split(",\n")
-            for line in level_lines:
-                level_tiles = line.split(",")
-                for tile in level_tiles:
-                    output += tileset[str(int(tile) - 1)]
-                output += "\n"
-        return output
+        if level_csv is None:
+            return ""
+        # Map every tile to the code point of its glyph in one lookup
+        glyph_codes = zeros(max(map(int, tileset), default=-1) + 1, uint32)
+        for tile_id, glyph in tileset.items():
+            if len(glyph) != 1:
+                print("Warning: Incompatible level file")
+                return ""
+            glyph_codes[int(tile_id)] = ord(glyph)
+        try:
+            tiles = (
+                array(
+                    [
+                        line.split(",")
+                        for line in level_csv.strip().split(",\n")
+                    ],
+                    dtype=int,
+                )
+                - 1
+            )
+        except ValueError:
+            print("Warning: Incompatible level file")
+            return ""
+        # Tiles outside the tileset, including empty ones, have no glyph
+        if ((tiles < 0) | (tiles >= len(glyph_codes))).any() or (
+            glyph_codes[tiles] == 0
+        ).any():
+            print("Warning: Level uses tiles missing from its tileset")
+            return ""
+        return Level(glyph_codes[tiles]).to_text() + "\n"
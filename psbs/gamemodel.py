@@ -0,0 +1,260 @@
+"""
+GAME MODEL
+
+This file provides a compact, offset based model of a PuzzleScript game.
+
+Rather than holding copies of the text of each section, the model records
+where every object, legend entry, collision layer, rule, win condition,
+level and message starts and ends in the original source. Spans are kept
+in flat arrays of offsets and a table of line offsets lets any offset be
+turned back into a line and column, so consumers get exact source
+locations without the model holding more than the source itself.
+
+Example:
+    model = PSParser(source).model
+    for span in model.objects:
+        line, column = model.location(span.start)
+        print(f"{line}:{column} {model.text(span).splitlines()[0]}")
+
+"""
+
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+import numpy
+
+Span = namedtuple("Span", ["start", "end"])
+Span.__doc__ = """A half open range of offsets into the game source."""
+
+LevelRecord = namedtuple("LevelRecord", ["rows", "messages", "line"])
+LevelRecord.__doc__ = """
+A level streamed from a levels section.
+
+Attributes:
+    rows (list): The rows of the level with comments removed.
+    messages (list): The text of each message shown before the level.
+    line (int): The line the first row of the level is on.
+"""
+
+Rule = namedtuple(
+    "Rule",
+    [
+        "prefixes",
+        "directions",
+        "lhs",
+        "rhs",
+        "commands",
+        "message",
+        "group",
+        "span",
+    ],
+)
+Rule.__doc__ = """
+A rule parsed from a rules section.
+
+Each side of a rule is a tuple of rows, each row a tuple of cells and each
+cell a tuple of (modifier, object) pairs, where the modifier is "" if the
+object has none. An ellipsis is a cell holding the single pair ("", "...").
+
+Attributes:
+    prefixes (tuple): The prefixes of the rule, such as "late" or "+".
+    directions (tuple): The directions the rule is limited to.
+    lhs (tuple): The rows of cells the rule matches.
+    rhs (tuple): The rows of cells the matches are replaced with.
+    commands (tuple): The commands the rule runs, such as "again".
+    message (str): The text of the message the rule shows, or None.
+    group (int): The index of the group the rule belongs to, rules joined
+        with "+" share a group.
+    span (Span): Where the rule is in the source.
+"""
+
+
+def _typecode(source):
+    # Use 32 bit offsets unless the source is too large for them
+    return "I" if len(source) < 2**32 else "Q"
+
+
+# Whether str.strip removes each character up to U+3001, which is the
+# first after the last whitespace character
+_WHITESPACE = numpy.array([chr(code).isspace() for code in range(0x3002)])
+
+
+def code_points(text):
+    """
+    Get the code points of a string as an array, to look at every character
+    at once.
+
+    Args:
+        text (str): The string.
+
+    Returns:
+        numpy.ndarray: The code point of each character, as bytes if the
+        string is ASCII.
+    """
+    if text.isascii():
+        return numpy.frombuffer(text.encode("ascii"), dtype=numpy.uint8)
+    return numpy.frombuffer(
+        text.encode("UTF-32-LE", "surrogatepass"), dtype=numpy.uint32
+    )
+
+
+def is_whitespace(codes):
+    """
+    Find the characters str.strip removes, such as those around the rows of
+    a level.
+
+    Args:
+        codes (numpy.ndarray): Code points as given by code_points.
+
+    Returns:
+        numpy.ndarray: Whether each character is whitespace.
+    """
+    if codes.dtype != numpy.uint8:
+        codes = numpy.minimum(codes, len(_WHITESPACE) - 1)
+    return _WHITESPACE[codes]
+
+
+class SpanList:
+    """
+    A compact list of spans.
+
+    Spans are stored as pairs of offsets in a single flat array rather than
+    as individual objects, and are only turned into Span tuples when read.
+
+    Args:
+        typecode (str, optional): The array typecode used to store offsets.
+            Defaults to "Q".
+    """
+
+    def __init__(self, typecode="Q"):
+        self.__offsets = array(typecode)
+
+    def append(self, start, end):
+        """
+        Append a span to the list.
+
+        Args:
+            start (int): The offset the span starts at.
+            end (int): The offset the span ends at, exclusive.
+        """
+        self.__offsets.append(start)
+        self.__offsets.append(end)
+
+    def extend(self, offsets):
+        """
+        Append spans given as one flat sequence of offsets.
+
+        Args:
+            offsets (numpy.ndarray): The start and end offset of each span,
+                one after another.
+        """
+        self.__offsets.frombytes(
+            numpy.asarray(offsets, dtype=self.__offsets.typecode).tobytes()
+        )
+
+    @property
+    def offsets(self):
+        """array: The start and end offset of each span, one after another."""
+        return self.__offsets
+
+    def __len__(self):
+        return len(self.__offsets) // 2
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("span index out of range")
+        return Span(self.__offsets[index * 2], self.__offsets[index * 2 + 1])
+
+    def __iter__(self):
+        offsets = iter(self.__offsets)
+        return (Span(start, end) for start, end in zip(offsets, offsets))
+
+    def __repr__(self):
+        return f"SpanList({list(self)!r})"
+
+
+class GameModel:
+    """
+    A compact, offset based model of a PuzzleScript game.
+
+    Every entry is a Span into the original source, use text() to read it
+    and location() to find its line and column.
+
+    Args:
+        source (str): The PuzzleScript source code the spans refer to.
+
+    Attributes:
+        source (str): The PuzzleScript source code.
+        line_starts (array): The offset at which each line starts.
+        sections (dict): The content of each block of each section, mapping
+        section names to SpanLists.
+        objects (SpanList): Each object, from its name to its sprite.
+        legend (SpanList): Each line of the legend.
+        collisionlayers (SpanList): Each collision layer.
+        rules (SpanList): Each line of the rules.
+        winconditions (SpanList): Each win condition.
+        levels (SpanList): Each level, from its first to its last row.
+        messages (SpanList): Each message line in the levels section.
+
+    Methods:
+        text(span): Get the source text of a span.
+        location(offset): Get the line and column of an offset.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        typecode = _typecode(source)
+
+        # Build the line offset table from every newline at once
+        self.line_starts = array(typecode, [0])
+        self.line_starts.frombytes(
+            (numpy.flatnonzero(code_points(source) == 10) + 1)
+            .astype(typecode)
+            .tobytes()
+        )
+
+        self.sections = {}
+        self.objects = SpanList(typecode)
+        self.legend = SpanList(typecode)
+        self.collisionlayers = SpanList(typecode)
+        self.rules = SpanList(typecode)
+        self.winconditions = SpanList(typecode)
+        self.levels = SpanList(typecode)
+        self.messages = SpanList(typecode)
+
+    def new_span_list(self):
+        """
+        Create an empty SpanList suited to the size of the source.
+
+        Returns:
+            SpanList: An empty list of spans.
+        """
+        return SpanList(_typecode(self.source))
+
+    def text(self, span):
+        """
+        Get the source text of a span.
+
+        Args:
+            span (Span): The span to read.
+
+        Returns:
+            str: The text of the span.
+        """
+        return self.source[span.start : span.end]
+
+    def location(self, offset):
+        """
+        Get the line and column of an offset in the source.
+
+        Args:
+            offset (int): The offset into the source.
+
+        Returns:
+            tuple: The line and column, both counted from 1.
+        """
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
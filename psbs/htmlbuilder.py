@@ -2,9 +2,12 @@
 HTML BUILDER
 
 This file provides a function to build an HTML game from PuzzleScript
-source code. The function fetches the standalone inlined HTML template from
-the provided PuzzleScript engine and replaces placeholders in the template
-with the actual game data and options.
+source code. The function reads the standalone inlined HTML template from
+the local mirror of the provided PuzzleScript engine and replaces
+placeholders in the template with the actual game data and options. The
+game can be minified on the way in and compressed copies written alongside
+it for web servers which serve precompressed files. The placeholders can
+also be filled in without writing a file, for serving the game directly.
 
 Example:
     filename = build_html("https://www.puzzlescript.net/", puzzle_script_code)
@@ -12,26 +15,49 @@ Example:
 
 """
 
+import re
+from gzip import GzipFile
 from json import dumps
 from os import path
-from requests import get
+from shutil import copyfileobj
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .engine import EngineCache
 from .errors import PSBSError
 from .psparser import PSParser
-from .utils import write_file, url_join
+from .utils import write_file
+
+# The size of the blocks files are compressed in
+_BLOCK_SIZE = 1 << 16
 
 
-def build_html(engine, source):
+def build_html(engine, source, offline=False, minify=False, compress=False):
     """
     Build an HTML game from PuzzleScript source code.
 
-    This function fetches the standalone inlined HTML template from the
-    provided PuzzleScript engine and then replaces placeholders in the
-    template with the actual game data and options.
+    This function reads the standalone inlined HTML template from the local
+    mirror of the provided PuzzleScript engine, revalidating it with the
+    engine unless offline, and then replaces placeholders in the template
+    with the actual game data and options.
+
+    All placeholders are replaced in a single pass and the result is written
+    to the file as it is produced, so the whole game is never copied into
+    one string.
 
     Args:
         engine (str): The base URL of the PuzzleScript engine.
         source (str): The PuzzleScript source code.
+        offline (bool, optional): If True, use the mirrored template without
+            contacting the engine. Defaults to False.
+        minify (bool, optional): If True, remove comments and redundant
+            whitespace from the game data. Defaults to False.
+        compress (bool, optional): If True, also write gzip and brotli
+            compressed copies of the HTML file, see compress_file. Defaults
+            to False.
 
     Returns:
         str: The filename of the generated HTML file.
@@ -39,21 +65,47 @@ def build_html(engine, source):
     Raises:
         PSBSError: If any errors occur during the building process.
     """
-    # Fetch the standalone inlined HTML template
-    standalone_url = url_join(engine, "standalone_inlined.txt")
-    response = get(standalone_url, timeout=5)
-    if response.status_code != 200:
-        err_message = []
-        err_message.append("Error: Can't build html game")
-        err_message.append(f"  Unable to download {standalone_url}")
-        err_message.append(f"  Server response: {response.status_code}")
-        raise PSBSError("\n".join(err_message))
-
-    standalone_html = response.content.decode("UTF-8")
-    parser = PSParser(source)
-    prelude_options = parser.prelude_options
-
-    # Placeholder replacements
+    # Read the standalone inlined HTML template from the engine mirror
+    standalone_html = (
+        EngineCache(engine)
+        .revalidate("standalone_inlined.txt", offline=offline)
+        .decode("UTF-8")
+    )
+    if minify:
+        before = len(source.encode("UTF-8"))
+        source = PSParser.minify(source)
+        after = len(source.encode("UTF-8"))
+        print(f"Minified game data from {before:,} to {after:,} bytes")
+
+    # Write the generated HTML file
+    title = PSParser(source).prelude_options.get("title", "My Game")
+    filename = path.join("bin", title + ".html")
+    write_file(filename, html_chunks(standalone_html, source, engine))
+    print(f"Wrote {filename} ({path.getsize(filename):,} bytes)")
+    if compress:
+        for compressed_filename in compress_file(filename):
+            print(
+                f"Wrote {compressed_filename} "
+                f"({path.getsize(compressed_filename):,} bytes)"
+            )
+    return filename
+
+
+def html_chunks(standalone_html, source, engine):
+    """
+    Fill in the placeholders of a standalone HTML template.
+
+    Args:
+        standalone_html (str): The standalone inlined HTML template.
+        source (str): The PuzzleScript source code.
+        engine (str): The base URL of the PuzzleScript engine, the homepage
+            of games which don't set one.
+
+    Yields:
+        str: The template between placeholders and their values in turn.
+    """
+    prelude_options = PSParser(source).prelude_options
+    game_data = dumps(source)
     replacements = {
         "__GAMETITLE__": prelude_options.get("title", "My Game"),
         "__AUTHOR__": prelude_options.get("author", ""),
@@ -63,17 +115,66 @@ def build_html(engine, source):
         ).split("://", 1)[-1],
         "___BGCOLOR___": prelude_options.get("background_color", "black"),
         "___TEXTCOLOR___": prelude_options.get("text_color", "lightblue"),
-        '"__GAMEDAT__"': dumps(source),
-        "__GAMEDAT__": dumps(source),
+        '"__GAMEDAT__"': game_data,
+        "__GAMEDAT__": game_data,
     }
+    # Match longer placeholders first so quoted game data wins
+    placeholder_pattern = re.compile(
+        "|".join(
+            re.escape(placeholder)
+            for placeholder in sorted(replacements, key=len, reverse=True)
+        )
+    )
+    position = 0
+    for match in placeholder_pattern.finditer(standalone_html):
+        yield standalone_html[position : match.start()]
+        yield replacements[match.group()]
+        position = match.end()
+    yield standalone_html[position:]
 
-    # Replace placeholders with actual values
-    for placeholder, value in replacements.items():
-        standalone_html = standalone_html.replace(placeholder, value)
 
-    # Write the generated HTML file
-    filename = path.join(
-        "bin", prelude_options.get("title", "My Game") + ".html"
-    )
-    write_file(filename, standalone_html)
-    return filename
+def compress_file(filename):
+    """
+    Write gzip and brotli compressed copies of a file.
+
+    The copies are written next to the file with .gz and .br added to its
+    name. The gzip copy leaves out the file's name and modification time so
+    that identical files always compress the same. Brotli is optional, if
+    the brotli module isn't installed only the gzip copy is written.
+
+    Args:
+        filename (str): The path to the file to compress.
+
+    Returns:
+        list: The filenames of the compressed copies.
+
+    Raises:
+        PSBSError: If the file can't be read or a copy can't be written.
+    """
+    compressed_filenames = [filename + ".gz"]
+    try:
+        with open(filename, "rb") as file, open(
+            filename + ".gz", "wb"
+        ) as gz_file:
+            with GzipFile(
+                filename="", mode="wb", fileobj=gz_file, mtime=0
+            ) as gzip_stream:
+                copyfileobj(file, gzip_stream, _BLOCK_SIZE)
+
+        if brotli is None:
+            print("Warning: brotli is not installed, skipping .br file")
+            return compressed_filenames
+        compressor = brotli.Compressor()
+        with open(filename, "rb") as file, open(
+            filename + ".br", "wb"
+        ) as br_file:
+            for block in iter(lambda: file.read(_BLOCK_SIZE), b""):
+                br_file.write(compressor.process(block))
+            br_file.write(compressor.finish())
+        compressed_filenames.append(filename + ".br")
+    except OSError as err:
+        raise PSBSError(
+            f"Error: Unable to write compressed file\n  {err}"
+        ) from err
+    return compressed_filenames
+
@@ -0,0 +1,208 @@
+"""
+LEVEL
+
+This file provides the Level class, a PuzzleScript level held as a grid of
+glyphs in a NumPy array.
+
+Levels are stored as a 2D array of Unicode code points, one per cell, so
+combining, padding and cropping them are a few array operations rather than
+rebuilding strings line by line. Cells with a code of 0 are empty, they pad
+out ragged rows and are left out when a level is turned back into text.
+
+Example:
+    level = Level.hstack([Level.from_text(first), Level.from_text(second)])
+    print(level.pad(1, 1, 1, 1, glyph="#").to_text())
+
+"""
+
+import numpy
+
+EMPTY = 0  # Code of an empty cell
+
+
+class Level:
+    """
+    A PuzzleScript level held as a grid of glyph codes.
+
+    Args:
+        cells (numpy.ndarray): A 2D array of the code point of the glyph in
+            each cell, 0 for empty cells.
+
+    Attributes:
+        cells (numpy.ndarray): The code point of the glyph in each cell.
+
+    Methods:
+        from_rows(rows): Create a level from a list of rows.
+        from_text(text): Create a level from PuzzleScript text.
+        hstack(levels): Combine levels side by side.
+        vstack(levels): Combine levels one above another.
+        to_text(): Convert the level to PuzzleScript text.
+        pad(top, right, bottom, left, glyph): Add cells around the level.
+        crop(top, left, height, width): Cut out part of the level.
+    """
+
+    def __init__(self, cells):
+        self.cells = numpy.asarray(cells, dtype=numpy.uint32)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Create a level from a list of rows.
+
+        Rows shorter than the longest one are padded with empty cells.
+
+        Args:
+            rows (list): The rows of the level as strings.
+
+        Returns:
+            Level: The level.
+        """
+        rows = list(rows)
+        width = max((len(row) for row in rows), default=0)
+        if not width:
+            return cls(numpy.zeros((len(rows), 0), dtype=numpy.uint32))
+        # Fixed width strings are stored as padded UTF-32 code points
+        text = numpy.array(rows, dtype=f"U{width}")
+        return cls(text.view(numpy.uint32).reshape(len(rows), width))
+
+    @classmethod
+    def from_text(cls, text):
+        """
+        Create a level from PuzzleScript text.
+
+        Surrounding whitespace is stripped from the level and each row.
+
+        Args:
+            text (str): The level as PuzzleScript text.
+
+        Returns:
+            Level: The level.
+        """
+        return cls.from_rows(row.strip() for row in text.strip().splitlines())
+
+    @classmethod
+    def hstack(cls, levels):
+        """
+        Combine levels side by side, aligned at the top.
+
+        Args:
+            levels (iterable): The levels to combine.
+
+        Returns:
+            Level: The combined level.
+        """
+        levels = list(levels)
+        if not levels:
+            return cls(numpy.zeros((0, 0), dtype=numpy.uint32))
+        height = max(level.height for level in levels)
+        return cls(
+            numpy.hstack(
+                [
+                    level.pad(bottom=height - level.height).cells
+                    for level in levels
+                ]
+            )
+        )
+
+    @classmethod
+    def vstack(cls, levels):
+        """
+        Combine levels one above another, aligned on the left.
+
+        Args:
+            levels (iterable): The levels to combine.
+
+        Returns:
+            Level: The combined level.
+        """
+        levels = list(levels)
+        if not levels:
+            return cls(numpy.zeros((0, 0), dtype=numpy.uint32))
+        width = max(level.width for level in levels)
+        return cls(
+            numpy.vstack(
+                [
+                    level.pad(right=width - level.width).cells
+                    for level in levels
+                ]
+            )
+        )
+
+    @property
+    def height(self):
+        """int: The number of rows in the level."""
+        return self.cells.shape[0]
+
+    @property
+    def width(self):
+        """int: The number of columns in the level."""
+        return self.cells.shape[1]
+
+    def to_text(self):
+        """
+        Convert the level to PuzzleScript text.
+
+        Returns:
+            str: The rows of the level joined by newlines.
+        """
+        if not self.width:
+            return "\n" * (self.height - 1) if self.height else ""
+        rows = numpy.ascontiguousarray(self.cells).view(f"U{self.width}")
+        return "\n".join(
+            str(row).replace("\0", "") for row in rows.reshape(self.height)
+        )
+
+    def pad(self, top=0, right=0, bottom=0, left=0, glyph=None):
+        """
+        Add cells around the level.
+
+        Args:
+            top (int, optional): Rows to add above. Defaults to 0.
+            right (int, optional): Columns to add on the right. Defaults to 0.
+            bottom (int, optional): Rows to add below. Defaults to 0.
+            left (int, optional): Columns to add on the left. Defaults to 0.
+            glyph (str, optional): The glyph of the new cells, if None they
+                are empty. Defaults to None.
+
+        Returns:
+            Level: The padded level.
+        """
+        if not (top or right or bottom or left):
+            return self
+        return Level(
+            numpy.pad(
+                self.cells,
+                ((top, bottom), (left, right)),
+                constant_values=EMPTY if glyph is None else ord(glyph),
+            )
+        )
+
+    def crop(self, top=0, left=0, height=None, width=None):
+        """
+        Cut out part of the level.
+
+        Args:
+            top (int, optional): The first row to keep. Defaults to 0.
+            left (int, optional): The first column to keep. Defaults to 0.
+            height (int, optional): The number of rows to keep, if None keep
+                the rest. Defaults to None.
+            width (int, optional): The number of columns to keep, if None
+                keep the rest. Defaults to None.
+
+        Returns:
+            Level: The cropped level.
+        """
+        bottom = None if height is None else top + height
+        right = None if width is None else left + width
+        return Level(self.cells[top:bottom, left:right])
+
+    def __eq__(self, other):
+        if not isinstance(other, Level):
+            return NotImplemented
+        return numpy.array_equal(self.cells, other.cells)
+
+    def __str__(self):
+        return self.to_text()
+
+    def __repr__(self):
+        return f"Level.from_text({self.to_text()!r})"
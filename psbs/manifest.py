@@ -0,0 +1,174 @@
+"""
+MANIFEST
+
+This file provides a record of the files a build reads and writes, so that
+a build can be skipped when none of them have changed.
+
+Each file is recorded with its modification time, its size and a hash of
+its content. A file whose size and modification time are unchanged is
+taken to be unchanged without reading it, otherwise the hash decides, so
+saving a file without editing it doesn't cause a rebuild. Files which were
+looked for and didn't exist are recorded too, creating one is a change.
+
+Example:
+    manifest = BuildManifest(path.join("bin", ".manifest.json"))
+    changes = manifest.changes()
+    if changes == []:
+        print("Nothing to do")
+    else:
+        build()
+        manifest.save(inputs, outputs)
+
+"""
+
+import json
+from hashlib import sha256
+from os import replace, stat
+from time import time_ns
+
+from .errors import PSBSError
+from .utils import package_version
+
+# Files modified this close to being recorded may have changed again within
+# the resolution of their modification time, so they are always hashed
+_RACY_NS = 2 * 10**9
+
+
+class BuildManifest:
+    """
+    A record of the files a build reads and writes.
+
+    Args:
+        filename (str): The path to the manifest file.
+
+    Attributes:
+        filename (str): The path to the manifest file.
+
+    Methods:
+        changes(): Get the files which have changed since the recorded build.
+        save(inputs, outputs): Record the files a build read and wrote.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def changes(self):
+        """
+        Get the files which have changed since the recorded build.
+
+        Returns:
+            list: The path of each input or output which has changed, or
+            None if there is no recorded build to compare against.
+        """
+        try:
+            with open(self.filename, "r", encoding="UTF-8") as file:
+                manifest = json.load(file)
+            saved = manifest["saved"]
+            files = {**manifest["inputs"], **manifest["outputs"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if manifest.get("psbs") != package_version("psbs"):
+            return ["psbs version"]
+        return [
+            filename
+            for filename, entry in files.items()
+            if BuildManifest.__changed(filename, entry, saved)
+        ]
+
+    def save(self, inputs, outputs):
+        """
+        Record the files a build read and wrote.
+
+        Args:
+            inputs (list): The paths of the files the build read, or looked
+                for and didn't find.
+            outputs (list): The paths of the files the build wrote.
+
+        Raises:
+            PSBSError: If the manifest can't be written.
+        """
+        manifest = {
+            "psbs": package_version("psbs"),
+            "saved": time_ns(),
+            "inputs": {name: BuildManifest.__entry(name) for name in inputs},
+            "outputs": {name: BuildManifest.__entry(name) for name in outputs},
+        }
+        try:
+            with open(self.filename + ".new", "w", encoding="UTF-8") as file:
+                json.dump(manifest, file, indent=1)
+            replace(self.filename + ".new", self.filename)
+        except OSError as err:
+            raise PSBSError(
+                f"Error: Unable to write build manifest\n  {err}"
+            ) from err
+
+    @staticmethod
+    def __entry(filename):
+        """
+        Record the state of a file.
+
+        Args:
+            filename (str): The path to the file.
+
+        Returns:
+            dict: The modification time, size and hash of the file, or None
+            if it doesn't exist.
+        """
+        try:
+            status = stat(filename)
+            return {
+                "mtime": status.st_mtime_ns,
+                "size": status.st_size,
+                "sha256": BuildManifest.__hash(filename),
+            }
+        except OSError:
+            return None
+
+    @staticmethod
+    def __changed(filename, entry, saved):
+        """
+        Check whether a file has changed since it was recorded.
+
+        Args:
+            filename (str): The path to the file.
+            entry (dict): The recorded state of the file, see __entry.
+            saved (int): When the file was recorded, in nanoseconds.
+
+        Returns:
+            bool: True if the file has changed.
+        """
+        try:
+            status = stat(filename)
+        except OSError:
+            return entry is not None
+        if entry is None or status.st_size != entry["size"]:
+            return True
+        if (
+            status.st_mtime_ns == entry["mtime"]
+            and saved - entry["mtime"] >= _RACY_NS
+        ):
+            return False
+        try:
+            return BuildManifest.__hash(filename) != entry["sha256"]
+        except OSError:
+            return True
+
+    @staticmethod
+    def __hash(filename):
+        """
+        Hash the content of a file.
+
+        Args:
+            filename (str): The path to the file.
+
+        Returns:
+            str: The SHA-256 hash of the file.
+
+        Raises:
+            OSError: If the file can't be read.
+        """
+        digest = sha256()
+        with open(filename, "rb") as file:
+            for block in iter(lambda: file.read(1 << 16), b""):
+                digest.update(block)
+        return digest.hexdigest()
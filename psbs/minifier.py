@@ -0,0 +1,230 @@
+"""
+MINIFIER
+
+This file provides functions for shrinking PuzzleScript source code for
+release builds.
+
+Comments and redundant whitespace are removed with PSParser.minify, and the
+long, descriptive names objects are usually given can be swapped for short
+ones. Renaming is done consistently across the objects, legend, sounds,
+collisionlayers, rules and winconditions sections, the most used names get
+the shortest replacements. Single character names are left alone as they
+are the glyphs levels are drawn with, so levels and messages are kept
+exactly as they are written.
+
+Example:
+    source, names = rename_objects(PSParser.minify(source))
+    print(minify_report(original_source, source))
+
+"""
+
+import re
+from collections import Counter
+from contextlib import redirect_stdout
+from io import StringIO
+from itertools import count, product
+from string import ascii_lowercase
+from time import perf_counter
+
+from .psparser import PSParser
+
+# Names which are never renamed, the engine looks for these objects
+_KEPT_NAMES = {"background", "player"}
+
+# Words with a meaning of their own, which replacement names must avoid
+_RESERVED_WORDS = {
+    "+",
+    "...",
+    "action",
+    "again",
+    "all",
+    "and",
+    "any",
+    "background",
+    "cancel",
+    "cantmove",
+    "checkpoint",
+    "closemessage",
+    "copy",
+    "create",
+    "destroy",
+    "down",
+    "endgame",
+    "endlevel",
+    "endloop",
+    "horizontal",
+    "late",
+    "left",
+    "message",
+    "move",
+    "moving",
+    "no",
+    "on",
+    "or",
+    "orthogonal",
+    "parallel",
+    "perpendicular",
+    "player",
+    "random",
+    "randomdir",
+    "restart",
+    "right",
+    "rigid",
+    "showmessage",
+    "some",
+    "startgame",
+    "startlevel",
+    "startloop",
+    "stationary",
+    "titlescreen",
+    "undo",
+    "up",
+    "v",
+    "vertical",
+    "win",
+}
+
+# Words as they are separated in the legend, collisionlayers and rules
+_NAME_PATTERN = re.compile(r"[^\s,=\[\]|]+")
+
+# The message a rule ends with, which is left as it is
+_MESSAGE_PATTERN = re.compile(r"(?<!\S)message(?!\S)", flags=re.IGNORECASE)
+
+# Sections which refer to objects by name
+_NAMED_SECTIONS = ("legend", "sounds", "collisionlayers", "winconditions")
+
+
+def rename_objects(source):
+    """
+    Rename objects, properties and aggregates to short names.
+
+    Names of more than one character are replaced with the shortest names
+    not already in use, the most used names first. Objects the engine looks
+    for by name and names used in the prelude keep their names. Games with
+    PuzzleScript+ tags or mappings sections aren't renamed, as those refer
+    to objects in ways which can't be renamed safely.
+
+    Args:
+        source (str): The PuzzleScript source code.
+
+    Returns:
+        tuple: The renamed source code and a dictionary mapping each old
+        name to its new name.
+    """
+    parser = PSParser(source)
+    model = parser.model
+    redacted = PSParser.redact_comments(source)
+    lowercase = "case_sensitive" not in parser.prelude_options
+
+    for section in ("tags", "mappings"):
+        spans = model.sections.get(section, ())
+        if any(span.end > span.start for span in spans):
+            print(f"Warning: not renaming objects, game has {section}")
+            return source, {}
+    try:
+        legend = parser.get_legend()
+    except PSParser.ParseError as err:
+        print(f"Warning: not renaming objects, {err}")
+        return source, {}
+
+    def key(word):
+        return word.lower() if lowercase else word
+
+    # Find the spans of the source which refer to objects by name, the
+    # first line of each object and rules up to their messages
+    regions = []
+    for span in model.objects:
+        line_end = redacted.find("\n", span.start, span.end)
+        regions.append((span.start, span.end if line_end < 0 else line_end))
+    for section in _NAMED_SECTIONS:
+        regions += model.sections.get(section, ())
+    for span in model.rules:
+        message = _MESSAGE_PATTERN.search(redacted, span.start, span.end)
+        regions.append((span.start, message.start() if message else span.end))
+    regions.sort()
+
+    # Count how often each name is used
+    names = (
+        legend["synonyms"].keys()
+        | legend["properties"].keys()
+        | legend["aggregates"].keys()
+    )
+    kept = {
+        key(word) for word in _NAME_PATTERN.findall(parser.sections["prelude"])
+    }
+    kept |= _KEPT_NAMES
+    words = []
+    uses = Counter()
+    for start, end in regions:
+        for word in _NAME_PATTERN.finditer(redacted, start, end):
+            name_start = word.start()
+            if word.group().startswith("copy:"):
+                name_start += len("copy:")
+            name = key(redacted[name_start : word.end()])
+            if name in names and len(name) > 1 and name not in kept:
+                words.append((name_start, word.end(), name))
+                uses[name] += 1
+
+    # Give the most used names the shortest replacements
+    taken = names | kept | _RESERVED_WORDS
+    replacements = (
+        "".join(letters)
+        for length in count(1)
+        for letters in product(ascii_lowercase, repeat=length)
+        if "".join(letters) not in taken
+    )
+    renamed = {}
+    replacement = next(replacements)
+    for name, _ in uses.most_common():
+        if len(replacement) < len(name):
+            renamed[name] = replacement
+            replacement = next(replacements)
+
+    output = []
+    position = 0
+    for start, end, name in words:
+        if name in renamed:
+            output.append(source[position:start])
+            output.append(renamed[name])
+            position = end
+    output.append(source[position:])
+    return "".join(output), renamed
+
+
+def minify_report(before, after):
+    """
+    Report how much smaller and quicker to parse a minified game is.
+
+    Parsing is timed as building the model of the game and parsing its
+    objects, legend and rules.
+
+    Args:
+        before (str): The PuzzleScript source code before minifying.
+        after (str): The PuzzleScript source code after minifying.
+
+    Returns:
+        str: The report.
+    """
+    sizes = [len(source.encode("UTF-8")) for source in (before, after)]
+    times = [_parse_time(source) * 1000 for source in (before, after)]
+    saved = 100 * (1 - sizes[1] / sizes[0]) if sizes[0] else 0
+    return (
+        f"Minified from {sizes[0]:,} to {sizes[1]:,} bytes ({saved:.0f}% "
+        f"smaller), parsing in {times[1]:.1f} ms rather than "
+        f"{times[0]:.1f} ms"
+    )
+
+
+def _parse_time(source):
+    # Time parsing a game from scratch in seconds, keeping any warnings
+    # the parser prints out of the report
+    with redirect_stdout(StringIO()):
+        start = perf_counter()
+        parser = PSParser(source)
+        parser.get_objects()
+        parser.get_rules()
+        try:
+            parser.get_legend()
+        except PSParser.ParseError:
+            pass
+        return perf_counter() - start
@@ -8,23 +8,30 @@ Example:
     project.build(verify=True)
     project.export()
     project.run(editor=False)
+    project.watch()
+    project.serve(port=8000)
 
 """
 
 from os import path
 from shutil import rmtree
 from pathlib import PurePath
-from asyncio import get_event_loop
-from json import dumps
-
-from pyppeteer import launch
+from time import perf_counter
 
+from .analyzer import rule_report, runtime_report
+from .browser import BrowserPool
 from .config import get_config
+from .devserver import DevServer
+from .engine import EngineCache
 from .errors import PSBSError
+from .extensions.build import Build
 from .htmlbuilder import build_html
 from .gister import Gister
+from .manifest import BuildManifest
 from .psparser import PSParser
 from .template import Template
+from .verifier import verify as verify_source
+from .watcher import FileWatcher
 from .utils import (
     read_file,
     write_file,
@@ -53,12 +60,21 @@ class PSBSProject:
         filename (str): The compiled HTML filename, if applicable.
 
     Methods:
-        build(verify=False): Build the PuzzleScript game files in the 'bin'
-            directory.
-        export(): Export the PuzzleScript game to HTML or update a gist.
+        build(verify=False, force=False): Build the PuzzleScript game files in
+            the 'bin' directory, unless nothing has changed.
+        export(offline=False, minify=False, compress=False): Export the
+            PuzzleScript game to HTML or update a gist.
         run(editor=False): Run the PuzzleScript game in a web browser.
-        print_ps_console(source): Print the PuzzleScript console output using
-            a headless browser.
+        watch(verify=False, poll=False): Rebuild the project whenever its
+            files change.
+        serve(port=8000, verify=False, poll=False): Play the game in a web
+            browser, reloading it whenever it changes.
+        analyze(top=10, runtime=False): Print an estimate of how far the rules
+            of the built game expand, or of its runtime cost.
+        print_ps_console(source): Print and return the PuzzleScript console
+            output using a headless browser.
+        print_static_problems(source): Print the problems found by the
+            static verifier.
         create(project_name, gist_id=None, file=None, new_gist=False): Create
             a PSBS project directory and populate it with necessary files.
     """
@@ -66,8 +82,10 @@ class PSBSProject:
     def __init__(self, config_filename="config.yaml"):
         self.config = get_config(config_file=config_filename)
         self.filename = None
+        self.__config_filename = config_filename
+        self.__template = None
 
-    def build(self, verify=False):
+    def build(self, verify=False, force=False):
         """
         Build the PuzzleScript game files in the 'bin' directory.
 
@@ -77,9 +95,17 @@ class PSBSProject:
         'script.txt' file is generated from the template specified in the
         configuration.
 
+        Every file the build reads is recorded in a manifest in the 'bin'
+        directory. If none of them have changed since the last build, and
+        neither have the files it wrote, the build is skipped.
+
         Args:
-            verify (bool, optional): If True, verify the built game using the
-                print_ps_console method. Defaults to False.
+            verify (bool or str, optional): If True or "browser", verify the
+                built game using the print_ps_console method. If "static",
+                verify it offline using the print_static_problems method.
+                Defaults to False.
+            force (bool, optional): If True, build even if nothing has
+                changed. Defaults to False.
         """
         # Check for target directory
         if not path.exists("bin"):
@@ -89,6 +115,19 @@ class PSBSProject:
         readme_path = path.join("bin", "readme.txt")
         script_path = path.join("bin", "script.txt")
 
+        # Skip the build if nothing it depends on has changed
+        manifest = BuildManifest(path.join("bin", ".manifest.json"))
+        changes = None if force else manifest.changes()
+        if changes == []:
+            print("Nothing has changed since the last build")
+            if verify:
+                self.__verify(read_file(script_path), verify)
+            return
+        if changes:
+            print("Rebuilding, changed since last build:")
+            for change in changes:
+                print(f"  {change}")
+
         # Build the readme.txt
         editor_url = url_join(self.config["engine"], "editor.html")
         print(f"Writing file {readme_path}")
@@ -99,29 +138,72 @@ class PSBSProject:
 
         # Build the script.txt
         print("Building script.txt")
-        source = Template(
-            path.join("src", self.config["template"]), self.config
-        ).render()
+        # Keep the template, its environment and extensions for later builds
+        if self.__template is None:
+            self.__template = Template(
+                path.join("src", self.config["template"]),
+                self.config,
+                cache_dir=path.join(".psbs-cache", "jinja"),
+            )
+        template = self.__template
+        source = template.render()
 
         print(f"Writing file {script_path}")
         write_file(script_path, source)
+        manifest.save(
+            [
+                self.__config_filename,
+                *self.config["user_extensions"],
+                *template.get_inputs(),
+            ],
+            [readme_path, script_path],
+        )
         if verify:
+            self.__verify(source, verify)
+
+    def __verify(self, source, verify):
+        """
+        Verify the built game.
+
+        Args:
+            source (str): The PuzzleScript source code of the game.
+            verify (bool or str): "static" to verify it offline using the
+                print_static_problems method, otherwise verify it using the
+                print_ps_console method.
+        """
+        if verify == "static":
+            self.print_static_problems(source)
+        else:
             self.print_ps_console(source)
 
-    def export(self):
+    def export(self, offline=False, minify=False, compress=False):
         """
         Export the PuzzleScript game to HTML or update a gist.
 
         If the project doesn't have a gist, compiles game to an HTML file.
         If the project has a gist it updates the 'readme.txt' and 'script.txt'
         files on the gist.
+
+        Args:
+            offline (bool, optional): If True, build the HTML file from the
+                cached engine without contacting it. Defaults to False.
+            minify (bool, optional): If True, remove comments and redundant
+                whitespace from the game in the HTML file, unless the build
+                already did. Defaults to False.
+            compress (bool, optional): If True, also write gzip and brotli
+                compressed copies of the HTML file. Defaults to False.
         """
         if not self.config["gist_id"]:
             # If project doesn't have a gist, create an HTML file
             print("Writing game to html file")
+            # The Build extension alone decides whether builds are minified
+            built_minified = Build(self.config["Build"]).minifies_script()
             self.filename = build_html(
                 self.config["engine"],
                 read_file(path.join("bin", "script.txt")),
+                offline=offline,
+                minify=minify and not built_minified,
+                compress=compress,
             )
         else:
             # If project has a gist, update the gist files
@@ -151,54 +233,214 @@ class PSBSProject:
             url += self.config["gist_id"]
         run_in_browser(url)
 
+    def watch(self, verify=False, poll=False):
+        """
+        Rebuild the project whenever its files change.
+
+        The project is built once, then src, the configuration, user
+        extensions and every other file the build read are watched. Each
+        burst of changes rebuilds the project in this process, reusing the
+        template environment, extensions and their caches, until
+        interrupted. Changes to the configuration or user extensions reload
+        them first.
+
+        Args:
+            verify (bool or str, optional): Verify each build, see build.
+                Defaults to False.
+            poll (bool, optional): If True, poll for changes rather than use
+                inotify. Defaults to False.
+        """
+        self.build(verify=verify, force=True)
+        self.__watch(verify, poll)
+
+    def serve(self, port=8000, verify=False, poll=False):
+        """
+        Play the game in a web browser, reloading it whenever it changes.
+
+        The project is built and served from a local web server, using the
+        standalone template from the local mirror of the engine, then
+        watched as with the watch method. Each build that changes the game
+        sends it to the tabs playing it, which recompile it in place.
+
+        Args:
+            port (int, optional): The port to serve the game on. Defaults to
+                8000.
+            verify (bool or str, optional): Verify each build, see build.
+                Defaults to False.
+            poll (bool, optional): If True, poll for changes rather than use
+                inotify. Defaults to False.
+        """
+        self.build(verify=verify, force=True)
+        script_path = path.join("bin", "script.txt")
+        engine = EngineCache(self.config["engine"])
+        engine.ensure()
+        server = DevServer(
+            engine.read("standalone_inlined.txt").decode("UTF-8"),
+            self.config["engine"],
+            read_file(script_path),
+            port=port,
+        )
+
+        def publish():
+            if server.publish(read_file(script_path)):
+                tabs = server.listeners()
+                plural = "" if tabs == 1 else "s"
+                print(f"Sent game to {tabs} open tab{plural}")
+
+        print(f"Serving game at {server.url}")
+        run_in_browser(server.url)
+        try:
+            self.__watch(verify, poll, on_build=publish)
+        finally:
+            server.close()
+
+    def __watch(self, verify, poll, on_build=None):
+        """
+        Rebuild the project whenever its files change, until interrupted.
+
+        Args:
+            verify (bool or str): Verify each build, see build.
+            poll (bool): If True, poll for changes rather than use inotify.
+            on_build (callable, optional): Called after each successful
+                build. Defaults to None.
+        """
+
+        def reload_files():
+            return {
+                path.normpath(filename)
+                for filename in [
+                    self.__config_filename,
+                    *self.config["user_extensions"],
+                ]
+            }
+
+        watcher = FileWatcher(
+            ["src"],
+            [*reload_files(), *self.__template.get_inputs()],
+            poll=poll,
+        )
+        method = "polling" if watcher.polling else "inotify"
+        print(f"Watching for changes with {method}, press Ctrl+C to stop")
+        try:
+            while True:
+                changes = watcher.wait()
+                start = perf_counter()
+                try:
+                    if changes & reload_files():
+                        print("Reloading configuration")
+                        self.config = get_config(
+                            config_file=self.__config_filename
+                        )
+                        self.__template = None
+                        watcher.watch_files(reload_files())
+                    self.build(verify=verify)
+                    if on_build is not None:
+                        on_build()
+                except PSBSError as err:
+                    print(err)
+                    continue
+                if self.__template is not None:
+                    watcher.watch_files(self.__template.get_inputs())
+                print(f"Built in {(perf_counter() - start) * 1000:.1f} ms")
+        except KeyboardInterrupt:
+            print("Stopped watching")
+        finally:
+            watcher.close()
+
+    def analyze(self, top=10, runtime=False):
+        """
+        Print an estimate of how far the rules of the built game expand, or
+        of the memory its levels use when it is played.
+
+        Args:
+            top (int, optional): The number of rules, groups or levels to
+                list. Defaults to 10.
+            runtime (bool, optional): If True, estimate the runtime cost of
+                the levels against the runtime_budgets in the configuration
+                rather than the rule expansion. Defaults to False.
+
+        Raises:
+            PSBSError: If the game can't be analyzed.
+        """
+        print("Analyzing script.txt")
+        start = perf_counter()
+        parser = PSParser(read_file(path.join("bin", "script.txt")))
+        try:
+            if runtime:
+                report = runtime_report(
+                    parser, self.config["runtime_budgets"], top=top
+                )
+            else:
+                report = rule_report(parser, top=top)
+        except PSParser.ParseError as err:
+            raise PSBSError(f"Unable to analyze game:\n  {err}") from err
+        print(report)
+        print(f"Analyzed in {(perf_counter() - start) * 1000:.1f} ms")
+
     def print_ps_console(self, source):
         """
         Print the PuzzleScript console output using a headless browser.
 
+        The browser is kept running between calls, see BrowserPool, and the
+        editor is loaded from the local engine mirror, see EngineCache.
+
         Args:
             source (str): The PuzzleScript source code to be evaluated.
 
+        Returns:
+            list: A ConsoleMessage for each message printed, with its text,
+            severity and line.
+
         Raises:
             PSBSError: If an error occurs during the console output retrieval.
         """
-
-        async def run_in_psfork():
-            try:
-                # Attempt to launch headless browser
-                browser = await launch()
-            except OSError as err:
-                err_message = [
-                    f"Failed to launch headless Chromium instance\n  {err}",
-                    "On Windows this may be caused by this issue:",
-                    "https://github.com/pyppeteer/pyppeteer/issues/248",
-                ]
-                raise PSBSError("\n".join(err_message)) from err
-
-            # Load editor.html from PuzzleScript engine
-            page = await browser.newPage()
-            editor_url = url_join(self.config["engine"], "editor.html")
-            await page.goto(editor_url)
-
-            # Insert source and compile
-            await page.evaluate("editor.setValue(" + dumps(source) + ")")
-            await page.evaluate('compile(["restart"])')
-
-            # Retrieve and format compilation messages
-            for message in await page.querySelectorAll(
-                "div#consoletextarea div"
-            ):
-                message_text = await page.evaluate(
-                    "(element) => element.textContent", message
+        # Compile in a warm editor page from the shared browser pool, with
+        # the editor served from the local engine mirror
+        engine = EngineCache(self.config["engine"])
+        engine.ensure()
+        editor_url = engine.url("editor.html")
+        messages = BrowserPool.shared().compile(editor_url, source)
+
+        # Format compilation messages
+        output = []
+        for message in messages:
+            if message.text.startswith("too many errors"):
+                raise PSBSError(message.text)
+            if message.text.startswith("Rule Assembly"):
+                message = message._replace(
+                    text=message.text.split("===========")[-1]
                 )
-                if message_text.startswith("too many errors"):
-                    raise PSBSError(message_text)
-                if message_text.startswith("Rule Assembly"):
-                    print(message_text.split("===========")[-1])
-                elif message_text != "=================================":
-                    print(message_text)
-
-        # Run async function
-        get_event_loop().run_until_complete(run_in_psfork())
+            elif message.text == "=================================":
+                continue
+            print(message.text)
+            output.append(message)
+        return output
+
+    @staticmethod
+    def print_static_problems(source):
+        """
+        Print the problems found in the source by the static verifier.
+
+        This checks for the most common compile errors without a browser or
+        network connection, see verifier.verify.
+
+        Args:
+            source (str): The PuzzleScript source code to be verified.
+
+        Raises:
+            PSBSError: If the source can't be parsed.
+        """
+        print("Verifying script.txt")
+        try:
+            problems = verify_source(PSParser(source))
+        except PSParser.ParseError as err:
+            raise PSBSError(f"Unable to verify source:\n  {err}") from err
+        for problem in problems:
+            print(problem)
+        if problems:
+            print(f"Found {len(problems)} problems")
+        else:
+            print("No problems found")
 
     @staticmethod
     def create(project_name, gist_id=None, file=None, new_gist=False):
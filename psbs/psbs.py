@@ -19,10 +19,12 @@ Functions:
 from argparse import ArgumentParser
 from sys import stderr
 
-from .project import PSBSProject
-from .token import get_token, set_token
+from . import daemon
 from .errors import PSBSError
 
+# The project and the rest of PSBS are imported by the commands which use
+# them, so commands handed to psbsd don't wait for their dependencies to load
+
 
 def _main():
     _CLIParser().parse_args()
@@ -56,8 +58,12 @@ class _CLIParser:
             "build": "Build project in current working directory",
             "export": "Build project then export to game",
             "run": "Build project, export, then run in web browser",
+            "watch": "Build project then rebuild it whenever it changes",
+            "serve": "Build project, play it locally and reload it on changes",
+            "analyze": "Build project then estimate rule expansion",
             "new": "Create a new project",
             "token": "Check or set GitHub auth token",
+            "engine": "Update the local copy of the PuzzleScript engine",
             "help": "Display help dialog",
         }
 
@@ -72,8 +78,12 @@ class _CLIParser:
         commands["build"].set_defaults(func=self.build_project)
         commands["export"].set_defaults(func=self.export_project)
         commands["run"].set_defaults(func=self.run_project)
+        commands["watch"].set_defaults(func=self.watch_project)
+        commands["serve"].set_defaults(func=self.serve_project)
+        commands["analyze"].set_defaults(func=self.analyze_project)
         commands["new"].set_defaults(func=self.new_project)
         commands["token"].set_defaults(func=self.token)
+        commands["engine"].set_defaults(func=self.engine)
         commands["help"].set_defaults(func=self.print_help)
 
         # Set the default function for no given command.
@@ -87,6 +97,60 @@ class _CLIParser:
             action="store_true",
         )
 
+        # Add the "--offline" option to subcommands which export.
+        for exporting_command in [commands["export"], commands["run"]]:
+            exporting_command.add_argument(
+                "--offline",
+                "-o",
+                help="Export from the cached engine without contacting it",
+                action="store_true",
+            )
+            exporting_command.add_argument(
+                "--minify",
+                "-m",
+                help="Remove comments and whitespace from the exported game",
+                action="store_true",
+            )
+            exporting_command.add_argument(
+                "--compress",
+                "-z",
+                help="Also write .gz and .br copies of the exported html file",
+                action="store_true",
+            )
+
+        # Add the "--poll" option to subcommands which watch.
+        for watching_command in [commands["watch"], commands["serve"]]:
+            watching_command.add_argument(
+                "--poll",
+                "-p",
+                help="Poll for changes instead of using inotify",
+                action="store_true",
+            )
+
+        # Add arguments specific to the "serve" subcommand.
+        commands["serve"].add_argument(
+            "--port",
+            "-P",
+            help="Port to serve the game on, defaults to 8000",
+            type=int,
+            default=8000,
+        )
+
+        # Add arguments specific to the "analyze" subcommand.
+        commands["analyze"].add_argument(
+            "--top",
+            "-t",
+            help="Number of rules, groups or levels to list",
+            type=int,
+            default=10,
+        )
+        commands["analyze"].add_argument(
+            "--runtime",
+            "-r",
+            help="Estimate the runtime cost of levels instead of rules",
+            action="store_true",
+        )
+
         # Add arguments specific to the "new" subcommand.
         commands["new"].add_argument("name", type=str)
         commands["new"].add_argument(
@@ -120,6 +184,20 @@ class _CLIParser:
             type=str,
         )
 
+        # Add arguments specific to the "engine" subcommand.
+        commands["engine"].add_argument(
+            "action",
+            choices=["update"],
+            help="Download the engine into the local cache",
+            type=str,
+        )
+        commands["engine"].add_argument(
+            "--url",
+            "-u",
+            help="Engine to update instead of the project's engine",
+            type=str,
+        )
+
         # Add arguments specific to the "help" subcommand.
         commands["help"].add_argument(
             "topic",
@@ -129,17 +207,38 @@ class _CLIParser:
             type=str,
         )
 
+        # Add the "--force" option to subcommands which build.
+        for building_command in [
+            commands["build"],
+            commands["run"],
+            commands["export"],
+        ]:
+            building_command.add_argument(
+                "--force",
+                "-f",
+                help="Build even if nothing has changed since the last build",
+                action="store_true",
+            )
+
         # Add the "--verify" option to relevant subcommands.
         for verifiable_command in [
             commands["build"],
             commands["run"],
             commands["export"],
+            commands["watch"],
+            commands["serve"],
         ]:
             verifiable_command.add_argument(
                 "--verify",
                 "-v",
-                help="Verify compilation and show PuzzleScript console output",
-                action="store_true",
+                help=(
+                    "Verify compilation and show PuzzleScript console output,"
+                    " or check for common errors offline with 'static'"
+                ),
+                nargs="?",
+                const="browser",
+                default=False,
+                choices=["browser", "static"],
             )
 
         # Return the dictionary containing subcommands and their parsers.
@@ -159,11 +258,43 @@ class _CLIParser:
         """
         args = self.parser.parse_args()
         try:
-            args.func(args)
+            if not self.send_to_daemon(args):
+                args.func(args)
         except PSBSError as err:
             print(err, file=stderr)
             raise SystemExit(1) from err
 
+    def send_to_daemon(self, args):
+        """
+        Hand a build or export to psbsd, if it is running.
+
+        Args:
+            args: Parsed command-line arguments.
+
+        Returns:
+            bool: True if psbsd ran the command, False if it should be run
+            here.
+
+        Raises:
+            PSBSError: If psbsd reports an error.
+        """
+        if args.command not in ["build", "export"]:
+            return False
+        options = {"verify": args.verify, "force": args.force}
+        if args.command == "export":
+            options.update(
+                offline=args.offline,
+                minify=args.minify,
+                compress=args.compress,
+            )
+        result = daemon.request(args.command, options)
+        if result is None:
+            return False
+        print(f"Handled by psbsd in {result['milliseconds']:.1f} ms")
+        if result["status"] == "error":
+            raise PSBSError(result["error"])
+        return True
+
     def build_project(self, args):
         """
         Build the project and return the project object.
@@ -174,8 +305,10 @@ class _CLIParser:
         Returns:
             PSBSProject: The project object after building.
         """
+        from .project import PSBSProject
+
         project = PSBSProject()
-        project.build(verify=args.verify)
+        project.build(verify=args.verify, force=args.force)
         return project
 
     def export_project(self, args):
@@ -189,7 +322,9 @@ class _CLIParser:
             PSBSProject: The project object after building and exporting.
         """
         project = self.build_project(args)
-        project.export()
+        project.export(
+            offline=args.offline, minify=args.minify, compress=args.compress
+        )
         return project
 
     def run_project(self, args):
@@ -205,6 +340,54 @@ class _CLIParser:
         project = self.export_project(args)
         project.run()
 
+    def watch_project(self, args):
+        """
+        Build the project, then rebuild it whenever its files change.
+
+        Args:
+            args: Parsed command-line arguments.
+
+        Returns:
+            None
+        """
+        from .project import PSBSProject
+
+        PSBSProject().watch(verify=args.verify, poll=args.poll)
+
+    def serve_project(self, args):
+        """
+        Build the project and play it in a web browser, rebuilding and
+        reloading it whenever its files change.
+
+        Args:
+            args: Parsed command-line arguments.
+
+        Returns:
+            None
+        """
+        from .project import PSBSProject
+
+        PSBSProject().serve(
+            port=args.port, verify=args.verify, poll=args.poll
+        )
+
+    def analyze_project(self, args):
+        """
+        Build the project and estimate how far its rules expand, or the
+        runtime cost of its levels.
+
+        Args:
+            args: Parsed command-line arguments.
+
+        Returns:
+            None
+        """
+        from .project import PSBSProject
+
+        project = PSBSProject()
+        project.build()
+        project.analyze(top=args.top, runtime=args.runtime)
+
     def new_project(self, args):
         """
         Create a new project using provided arguments.
@@ -215,6 +398,8 @@ class _CLIParser:
         Returns:
             None
         """
+        from .project import PSBSProject
+
         PSBSProject.create(
             args.name,
             gist_id=args.gist_id,
@@ -232,11 +417,29 @@ class _CLIParser:
         Returns:
             None
         """
+        from .token import get_token, set_token
+
         if args.token:
             set_token(args.token)
         else:
             print(get_token(verbose=True))
 
+    def engine(self, args):
+        """
+        Update the local copy of the project's PuzzleScript engine.
+
+        Args:
+            args: Parsed command-line arguments.
+
+        Returns:
+            None
+        """
+        from .engine import EngineCache
+        from .project import PSBSProject
+
+        engine_url = args.url or PSBSProject().config["engine"]
+        EngineCache(engine_url).update()
+
     def print_help(self, args):
         """
         Display help information based on provided arguments.
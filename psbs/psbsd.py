@@ -0,0 +1,265 @@
+"""
+PSBSD
+
+This file provides the psbsd build daemon, which keeps projects loaded and
+builds them on request so that builds don't pay for starting PSBS.
+
+Each project directory the daemon is asked about gets a PSBSProject which is
+kept between requests, so its template environment, extensions, loaded
+images and the headless browser used to verify it stay warm. A project is
+loaded again if its configuration or user extensions change. Requests are
+handled one at a time in the project's directory, see daemon.py for the
+protocol.
+
+Usage:
+    psbsd [--socket PATH]
+
+Functions:
+    _main: Entry point for the psbsd daemon.
+"""
+
+import json
+import traceback
+from argparse import ArgumentParser
+from contextlib import redirect_stderr, redirect_stdout
+from os import chdir, getcwd, makedirs, path, stat, unlink
+from signal import SIGTERM, default_int_handler, signal
+from socket import AF_UNIX, SOCK_STREAM, socket
+from socketserver import StreamRequestHandler, UnixStreamServer
+from sys import stderr
+from time import perf_counter
+
+from .daemon import COMMANDS, socket_path
+from .errors import PSBSError
+from .project import PSBSProject
+from .utils import package_version
+
+
+def _main():
+    parser = ArgumentParser(
+        description="PSBS build daemon, keeps projects loaded between builds"
+    )
+    parser.add_argument(
+        "--socket",
+        "-s",
+        help="Socket to listen on, defaults to psbsd.sock in the user data "
+        "directory",
+        type=str,
+    )
+    args = parser.parse_args()
+    # Stop as cleanly when terminated as when interrupted
+    signal(SIGTERM, default_int_handler)
+    try:
+        BuildDaemon(args.socket or socket_path()).serve()
+    except PSBSError as err:
+        print(err, file=stderr)
+        raise SystemExit(1) from err
+
+
+class BuildDaemon:
+    """
+    A daemon which builds, exports and verifies projects on request.
+
+    Args:
+        socket_filename (str): The path of the Unix socket to listen on.
+
+    Attributes:
+        socket_filename (str): The path of the Unix socket to listen on.
+
+    Methods:
+        serve(): Handle requests until interrupted.
+        handle(message, output): Run a request and return its result.
+    """
+
+    def __init__(self, socket_filename):
+        self.socket_filename = socket_filename
+        self.__projects = {}
+
+    def serve(self):
+        """
+        Handle requests until interrupted.
+
+        Raises:
+            PSBSError: If the daemon is already running or the socket can't
+            be created.
+        """
+        self.__remove_stale_socket()
+        try:
+            makedirs(path.dirname(self.socket_filename) or ".", exist_ok=True)
+            server = UnixStreamServer(
+                self.socket_filename, _DaemonRequestHandler
+            )
+        except OSError as err:
+            raise PSBSError(
+                f"Error: Unable to listen on {self.socket_filename}\n  {err}"
+            ) from err
+        server.build_daemon = self
+        print(
+            f"psbsd {package_version('psbs')} listening on "
+            f"{self.socket_filename}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopped psbsd")
+        finally:
+            server.server_close()
+            unlink(self.socket_filename)
+
+    def handle(self, message, output):
+        """
+        Run a request in its project directory and return its result.
+
+        Args:
+            message (dict): The request, see daemon.py.
+            output (callable): Called with each piece of output the request
+                prints.
+
+        Returns:
+            dict: The result, with the status, error message and
+            milliseconds taken.
+        """
+        if message.get("psbs") != package_version("psbs"):
+            return {"status": "version", "error": None, "milliseconds": 0}
+        start = perf_counter()
+        command = message.get("command")
+        directory = str(message.get("directory"))
+        error = None
+        working_directory = getcwd()
+        stream = _OutputStream(output)
+        try:
+            with redirect_stdout(stream), redirect_stderr(stream):
+                if command not in COMMANDS:
+                    raise PSBSError(f"Error: Unknown command {command}")
+                chdir(directory)
+                self.__run(command, directory, message.get("options") or {})
+        except PSBSError as err:
+            error = str(err)
+        except OSError as err:
+            error = f"Error: Unable to build {directory}\n  {err}"
+        except Exception as err:
+            # Keep the daemon running whatever goes wrong in a build
+            traceback.print_exc()
+            error = f"Error: psbsd failed to {command} {directory}\n  {err!r}"
+        finally:
+            chdir(working_directory)
+        milliseconds = (perf_counter() - start) * 1000
+        status = "error" if error else "ok"
+        print(f"{command} {directory}: {status} in {milliseconds:.1f} ms")
+        return {
+            "status": status,
+            "error": error,
+            "milliseconds": milliseconds,
+        }
+
+    def __run(self, command, directory, options):
+        """
+        Run a command in a project, loading the project if needed.
+
+        Args:
+            command (str): The command, one of COMMANDS.
+            directory (str): The project directory, the current working
+                directory.
+            options (dict): The command's options.
+        """
+        project = self.__project(directory)
+        verify = options.get("verify", False)
+        if command == "verify":
+            verify = verify or "browser"
+        project.build(verify=verify, force=options.get("force", False))
+        if command == "export":
+            project.export(
+                offline=options.get("offline", False),
+                minify=options.get("minify", False),
+                compress=options.get("compress", False),
+            )
+
+    def __project(self, directory):
+        """
+        Get the loaded project in a directory, loading it if it hasn't been
+        loaded or its configuration or user extensions have changed since.
+
+        Args:
+            directory (str): The project directory, the current working
+                directory.
+
+        Returns:
+            PSBSProject: The project.
+        """
+        if directory in self.__projects:
+            project, state = self.__projects[directory]
+            if state == _config_state(project):
+                return project
+            print("Reloading configuration")
+        project = PSBSProject()
+        self.__projects[directory] = (project, _config_state(project))
+        return project
+
+    def __remove_stale_socket(self):
+        """
+        Remove the socket left by a daemon which didn't shut down cleanly.
+
+        Raises:
+            PSBSError: If another daemon is listening on the socket.
+        """
+        if not path.exists(self.socket_filename):
+            return
+        with socket(AF_UNIX, SOCK_STREAM) as connection:
+            try:
+                connection.connect(self.socket_filename)
+            except OSError:
+                unlink(self.socket_filename)
+                return
+        raise PSBSError(
+            f"Error: psbsd is already running on {self.socket_filename}"
+        )
+
+
+class _DaemonRequestHandler(StreamRequestHandler):
+    # Read a request, then send its output and result back as they come
+
+    def handle(self):
+        def output(text):
+            self.wfile.write(_encode({"output": text}))
+
+        try:
+            message = json.loads(self.rfile.readline())
+            if not isinstance(message, dict):
+                raise ValueError("Request is not a JSON object")
+            result = self.server.build_daemon.handle(message, output)
+            self.wfile.write(_encode(result))
+        except (OSError, ValueError):
+            pass
+
+
+class _OutputStream:
+    # A file-like object which passes everything written to it on
+
+    def __init__(self, output):
+        self.output = output
+
+    def write(self, text):
+        if text:
+            self.output(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _config_state(project):
+    # The size and modification time of the files a project is loaded from
+    filenames = ["config.yaml", *project.config["user_extensions"]]
+    state = []
+    for filename in filenames:
+        try:
+            status = stat(filename)
+            state.append((filename, status.st_size, status.st_mtime_ns))
+        except OSError:
+            state.append((filename, None, None))
+    return state
+
+
+def _encode(message):
+    # A message as a line of JSON
+    return json.dumps(message).encode("UTF-8") + b"\n"
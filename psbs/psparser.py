@@ -6,6 +6,117 @@ PuzzleScript source code.
 """
 
 import re
+from collections.abc import Mapping
+from functools import cached_property, partial
+from itertools import islice
+
+import numpy
+
+from .gamemodel import (
+    GameModel,
+    LevelRecord,
+    Rule,
+    Span,
+    code_points,
+    is_whitespace,
+)
+
+_MESSAGE_PATTERN = re.compile(r"[Mm][Ee][Ss][Ss][Aa][Gg][Ee] ")
+_PAREN_PATTERN = re.compile(r"[()]")
+# Section headers, the lookahead skipping most lines without trying each
+# name at them
+_HEADER_PATTERN = re.compile(
+    r"^(?=[tmolscrw])(tags|mappings|objects|legend|sounds|collisionlayers"
+    r"|rules|winconditions|levels) *$",
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+# Lines with content other than whitespace and "=" separators
+_CONTENT_LINE_PATTERN = re.compile(
+    r"^(?!(?:[^\S\n]|=)*$)[^\n]*", flags=re.MULTILINE
+)
+# Lines in the levels section which hold a message
+_MESSAGE_LINE_PATTERN = re.compile(
+    r"^[^\S\n]*[Mm][Ee][Ss][Ss][Aa][Gg][Ee](?!\S)", flags=re.MULTILINE
+)
+# Where a message line may start, each confirmed against the pattern above
+_MESSAGE_WORD_PATTERN = re.compile(r"[Mm][Ee][Ss][Ss][Aa][Gg][Ee]")
+# The message a rule ends with
+_RULE_MESSAGE_PATTERN = re.compile(
+    r"(?<!\S)message(?!\S)", flags=re.IGNORECASE
+)
+# Runs of whitespace within a line
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# Separators and spaces at the start of lines, which are removed when
+# splitting sections. Only non-empty matches, as an empty one at every line
+# removes nothing and takes as long as the rest.
+_SEPARATOR_PATTERN = re.compile(r"^(?:=+ *| +)", flags=re.MULTILINE)
+# Runs of content lines, as used for objects and levels
+_CONTENT_BLOCK_PATTERN = re.compile(
+    r"(?:^(?!(?:[^\S\n]|=)*$)[^\n]*(?:\n|\Z))+", flags=re.MULTILINE
+)
+# Tokens of a rule, arrows, brackets, cell separators, ellipses and words
+_RULE_TOKEN_PATTERN = re.compile(
+    r"->|\[|\]|\||\.\.\.|(?:(?!->)[^\s\[\]|])+"
+)
+
+_RULE_PREFIXES = {"+", "late", "rigid", "random"}
+_RULE_DIRECTIONS = {
+    "up",
+    "down",
+    "left",
+    "right",
+    "horizontal",
+    "vertical",
+    "orthogonal",
+}
+_CELL_MODIFIERS = {
+    "no",
+    "stationary",
+    "moving",
+    "up",
+    "down",
+    "left",
+    "right",
+    ">",
+    "<",
+    "^",
+    "v",
+    "action",
+    "randomdir",
+    "random",
+    "horizontal",
+    "vertical",
+    "orthogonal",
+    "perpendicular",
+    "parallel",
+}
+
+
+class _LazySections(Mapping):
+    """
+    The cleaned content of each section, each cleaned when it is first
+    read, as most uses only need a few sections and the levels usually
+    take longest to clean.
+
+    Args:
+        cleaners (dict): A function for each section which returns its
+            cleaned content.
+    """
+
+    def __init__(self, cleaners):
+        self.__cleaners = cleaners
+        self.__cleaned = {}
+
+    def __getitem__(self, section):
+        if section not in self.__cleaned:
+            self.__cleaned[section] = self.__cleaners[section]()
+        return self.__cleaned[section]
+
+    def __iter__(self):
+        return iter(self.__cleaners)
+
+    def __len__(self):
+        return len(self.__cleaners)
 
 
 class PSParser:
@@ -16,14 +127,23 @@ class PSParser:
     sections of PuzzleScript source code.
     It can parse sections like prelude, objects, legend, collisionlayers.
 
+    Everything but the source is parsed lazily the first time it is used
+    and then cached on the instance.
+
     Attributes:
         source (str): The input PuzzleScript source code.
         source_tree (dict): A dictionary containing parsed sections of the
         PuzzleScript source.
-        sections (dict): A dictionary containing cleaned content of each
+        sections (Mapping): A dictionary containing cleaned content of each
         section in the PuzzleScript source.
         prelude_options (dict): A dictionary containing prelude options and
         their values.
+        objects (dict): The parsed objects, see get_objects.
+        glyphs (dict): The resolved glyphs, see get_glyphs.
+        legend (dict): The resolved legend, see get_legend.
+        rules (list): The parsed rules, see get_rules.
+        model (GameModel): Spans locating each object, legend entry,
+        collision layer, rule, win condition and level in the source.
 
     Methods:
         get_engine(input_str): Extracts the engine URL from the input readme
@@ -34,20 +154,144 @@ class PSParser:
         section of PuzzleScript source.
         get_glyphs(self): Extracts and organizes glyphs and their associated
         sprite data.
+        get_legend(self): Extracts and resolves the legend definitions.
+        get_rules(self): Extracts and parses rules from the 'rules' section.
+        reparse(self, source): Parses a new version of the source, reusing
+        unchanged sections.
+        edit(self, start, end, text): Parses the source after an edit.
+        read_through(self, section): Reads the source up to the end of a
+        section.
+        iter_levels(levels, line=1): Streams the levels of a levels section.
+        minify(input_str): Removes comments and redundant whitespace.
     """
 
     def __init__(self, source):
         self.source = source
-        self.source_tree = self.split_ps()
 
-        # Extract and clean the content of each section
-        self.sections = {
-            section: PSParser.__clean("\n".join(content))
-            for section, content in self.source_tree.items()
+    @cached_property
+    def source_tree(self):
+        """dict: The sections of the source as split by split_ps."""
+        return self.split_ps()
+
+    @cached_property
+    def sections(self):
+        """Mapping: The cleaned content of each section."""
+        return _LazySections(
+            {
+                section: partial(PSParser.__clean, "\n".join(content))
+                for section, content in self.source_tree.items()
+            }
+        )
+
+    @cached_property
+    def prelude_options(self):
+        """dict: The prelude options and their values."""
+        if "sections" in self.__dict__:
+            return self.__parse_prelude(self.sections["prelude"])
+        # Avoid splitting the whole source when only the prelude is needed
+        return self.__parse_prelude(PSParser.__clean(self.__read_prelude()))
+
+    @cached_property
+    def objects(self):
+        """dict: The parsed objects, see get_objects."""
+        return self.__parse_objects()
+
+    @cached_property
+    def glyphs(self):
+        """dict: The resolved glyphs, see get_glyphs."""
+        return self.__parse_glyphs()
+
+    @cached_property
+    def legend(self):
+        """dict: The resolved legend, see get_legend."""
+        return self.__parse_legend()
+
+    @cached_property
+    def rules(self):
+        """list: The parsed rules, see get_rules."""
+        return self.__parse_rules()
+
+    @cached_property
+    def __headers(self):
+        # The name, start and end of each section header. The redacted copy
+        # of the source they are found in is only kept while looking.
+        return PSParser.__find_headers(PSParser.redact_comments(self.source))
+
+    @cached_property
+    def model(self):
+        """GameModel: Spans locating each entry of the game in the source."""
+        return self.__build_model()
+
+    def reparse(self, source):
+        """
+        Parse a new version of the source, reusing work from this parse.
+
+        The new source is split into sections and any section whose text is
+        unchanged keeps its cleaned content. Objects are reused when the
+        objects section is unchanged and glyphs when the legend and
+        collisionlayers are too. Only results this parser has already
+        computed can be reused, everything else stays lazy.
+
+        Args:
+            source (str): The new PuzzleScript source code.
+
+        Returns:
+            PSParser: A parser for the new source.
+        """
+        parser = PSParser(source)
+        if "source_tree" not in self.__dict__:
+            return parser
+
+        old_tree = self.source_tree
+        new_tree = parser.source_tree
+        changed = {
+            section
+            for section in old_tree.keys() | new_tree.keys()
+            if old_tree.get(section) != new_tree.get(section)
         }
 
-        # Parse the prelude section to extract options
-        self.prelude_options = self.__parse_prelude(self.sections["prelude"])
+        if "sections" in self.__dict__:
+            parser.sections = _LazySections(
+                {
+                    section: (
+                        partial(PSParser.__clean, "\n".join(content))
+                        if section in changed
+                        else partial(self.sections.__getitem__, section)
+                    )
+                    for section, content in new_tree.items()
+                }
+            )
+        if "prelude" not in changed and "prelude_options" in self.__dict__:
+            parser.prelude_options = self.prelude_options
+
+        # Objects and glyphs only depend on the prelude for case sensitivity
+        case_changed = ("case_sensitive" in self.prelude_options) != (
+            "case_sensitive" in parser.prelude_options
+        )
+        if case_changed or "objects" in changed:
+            return parser
+        if "objects" in self.__dict__:
+            parser.objects = self.objects
+        if "legend" in self.__dict__ and "legend" not in changed:
+            parser.legend = self.legend
+        glyphs_changed = bool(changed & {"legend", "collisionlayers"})
+        if "glyphs" in self.__dict__ and not glyphs_changed:
+            parser.glyphs = self.glyphs
+        return parser
+
+    def edit(self, start, end, text):
+        """
+        Parse the source after replacing part of it, see reparse.
+
+        Args:
+            start (int): The offset the replaced text starts at.
+            end (int): The offset the replaced text ends at, exclusive.
+            text (str): The text to insert in its place.
+
+        Returns:
+            PSParser: A parser for the edited source.
+        """
+        return self.reparse(self.source[:start] + text + self.source[end:])
 
     @staticmethod
     def __parse_prelude(prelude_section):
@@ -89,42 +333,218 @@ class PSParser:
         Returns:
             str: The input source code with comments redacted.
         """
-        depth = 0  # Number to track depth of nested comments
+        return PSParser.__redact_comments(input_str, redact_char)[0]
+
+    @staticmethod
+    def __redact_comments(input_str, redact_char, depth=0, index=0):
+        """
+        Redact comments, carrying on from the end of earlier input.
+
+        Args:
+            input_str (str): The input PuzzleScript source code.
+            redact_char (str): The character used for redacting comments.
+            depth (int, optional): The depth of nested comments at the start
+                of the input. Defaults to 0.
+            index (int, optional): The number of characters of earlier
+                input, which must end with a newline. Defaults to 0.
+
+        Returns:
+            tuple: The input with comments redacted and the depth of nested
+            comments at the end of it.
+        """
+        length = len(input_str)
         output = []
         in_a_message = False
+        position = 0
+
+        # A message starts once the last 8 output characters read "message ".
+        # Redacted characters can only take part in that when the redact_char
+        # is a single character which appears in "message ", otherwise they
+        # are stood in for by a newline which can never match.
+        marker_char = redact_char if len(redact_char) == 1 else "\n"
+        check_tail = marker_char.lower() in "message "
+        # The last 8 output characters, as seen by the marker
+        tail = "\n" if index else ""
+
+        def redact(chunk, char):
+            # Replace every character but newlines with char
+            if "\n" not in chunk:
+                return char * len(chunk)
+            return "\n".join(char * len(line) for line in chunk.split("\n"))
+
+        def find_message(start, stop, chunk_tail):
+            # Find the first position in [start, stop] where a message begins
+            # straight after a change in depth, chunk_tail holds the output
+            # up to start followed by the next 7 characters as they would be
+            # output
+            offset = start - len(tail)
+            match = _MESSAGE_PATTERN.search(
+                chunk_tail,
+                max(max(start, 9 - index) - offset - 8, 0),
+                min(start + 7, stop, length - 1) - offset,
+            )
+            return match.end() + offset if match else None
+
+        while position < length:
+            if in_a_message:
+                # Messages run unchanged until the end of the line
+                end = input_str.find("\n", position)
+                end = length if end == -1 else end + 1
+                chunk = input_str[position:end]
+                output.append(chunk)
+                in_a_message = False
+            elif depth == 0:
+                # Outside of comments, copy up to the next opening parenthesis
+                end = input_str.find("(", position)
+                end = length if end == -1 else end
+                message_start = None
+                if check_tail:
+                    upcoming = input_str[position : position + 7]
+                    message_start = find_message(
+                        position, end, tail + upcoming
+                    )
+                if message_start is None:
+                    # Outside of comments the output matches the input
+                    match = _MESSAGE_PATTERN.search(
+                        input_str,
+                        max(position, 1 - index),
+                        min(end, length - 1),
+                    )
+                    message_start = match.end() if match else None
+                if message_start is not None:
+                    end = message_start
+                    in_a_message = True
+                chunk = input_str[position:end]
+                output.append(chunk)
+                if not in_a_message and end < length:
+                    # Redact the opening parenthesis and enter the comment
+                    output.append(redact_char)
+                    chunk = chunk[-7:] + marker_char
+                    depth = 1
+                    end += 1
+            else:
+                # Inside a comment, find the parenthesis which closes it
+                end = length
+                comment_depth = depth
+                for match in _PAREN_PATTERN.finditer(input_str, position):
+                    depth += 1 if match.group() == "(" else -1
+                    if depth == 0:
+                        end = match.end()
+                        break
+                if check_tail:
+                    upcoming = redact(
+                        input_str[position : position + 7], marker_char
+                    )
+                    message_start = find_message(
+                        position, end - 1, tail + upcoming
+                    )
+                    if message_start is not None:
+                        end = message_start
+                        in_a_message = True
+                        chunk = input_str[position:end]
+                        depth = (
+                            comment_depth + chunk.count("(") - chunk.count(")")
+                        )
+                chunk = input_str[position:end]
+                output.append(redact(chunk, redact_char))
+                chunk = redact(chunk[-8:], marker_char)
+            tail = (tail + chunk[-8:])[-8:]
+            position = end
+
+        return "".join(output), depth
+
+    @staticmethod
+    def minify(input_str):
+        """
+        Minify PuzzleScript source code by removing comments and redundant
+        whitespace.
 
-        # Iterate through each character in the input source code.
-        for character in input_str:
-            # Check if the last 8 characters are "message " to identify if
-            # we are currently inside a message.
-            if len(output) > 8 and "".join(output[-8:]).lower() == "message ":
-                in_a_message = True
+        Comments are removed, each line is stripped of leading and trailing
+        whitespace and runs of blank lines are collapsed into one, as a
+        single blank line is all it takes to separate objects and levels.
+        Runs of whitespace within lines are collapsed into single spaces,
+        except in the prelude, the levels and messages, which are kept as
+        they are written.
 
-            # When a newline is encountered, we are no longer in a message.
-            if character == "\n":
-                in_a_message = False
+        Args:
+            input_str (str): The input PuzzleScript source code.
 
-            # If an opening parenthesis is encountered and we are not inside a
-            # message, increment the depth.
-            if character == "(" and not in_a_message:
-                depth += 1
+        Returns:
+            str: The minified source code.
+        """
+        output = []
+        section = "prelude"
+        for line in PSParser.redact_comments(input_str, "").splitlines():
+            line = line.strip()
+            if _HEADER_PATTERN.fullmatch(line):
+                section = line.lower()
+            elif section not in ("prelude", "levels"):
+                message = _RULE_MESSAGE_PATTERN.search(line)
+                end = message.start() if message else len(line)
+                line = _WHITESPACE_PATTERN.sub(" ", line[:end]) + line[end:]
+            if line or (output and output[-1]):
+                output.append(line)
+        return "\n".join(output).strip()
 
-            # If the depth is greater than 0 and the character is not a
-            # newline and we are not inside a message, append the redact_char
-            # to the output list.
-            if depth > 0 and character != "\n" and not in_a_message:
-                output.append(redact_char)
-            else:
-                # If none of the above conditions are met, append the character
-                # to the output list.
-                output.append(character)
+    @staticmethod
+    def iter_levels(levels, line=1):
+        """
+        Stream the levels of a levels section one at a time.
+
+        Lines are read and have their comments redacted one at a time, so
+        only the level being built is held in memory. Messages after the last
+        level are yielded in a final record with no rows.
 
-            # When a closing parenthesis is encountered and we are not inside a
-            # message, decrement the depth, ensuring it stays non-negative.
-            if character == ")" and not in_a_message:
-                depth = max(depth - 1, 0)
+        Args:
+            levels (str or file): The levels section, as a string or a file
+                object to read lines from.
+            line (int, optional): The line number of the first line.
+                Defaults to 1.
+
+        Yields:
+            LevelRecord: The rows, preceding messages and line of each level.
+        """
 
-        return "".join(output)
+        def string_lines(input_str):
+            start = 0
+            while start < len(input_str):
+                end = input_str.find("\n", start) + 1 or len(input_str)
+                yield input_str[start:end]
+                start = end
+
+        if isinstance(levels, str):
+            levels = string_lines(levels)
+
+        depth = 0
+        index = 0
+        rows = []
+        messages = []
+        first_line = None
+        for line_number, text in enumerate(levels, start=line):
+            if depth or "(" in text:
+                redacted, depth = PSParser.__redact_comments(
+                    text, "", depth, index
+                )
+            else:
+                # Without any comments the line is left as it is
+                redacted = text
+            index += len(text)
+            redacted = redacted.strip()
+            if _MESSAGE_LINE_PATTERN.match(redacted):
+                if rows:
+                    yield LevelRecord(rows, messages, first_line)
+                    rows, messages = [], []
+                messages.append(redacted[7:].strip())
+            elif redacted:
+                if not rows:
+                    first_line = line_number
+                rows.append(redacted)
+            elif rows:
+                # A blank line ends the level
+                yield LevelRecord(rows, messages, first_line)
+                rows, messages = [], []
+        if rows or messages:
+            yield LevelRecord(rows, messages, first_line if rows else None)
 
     @staticmethod
     def __clean(input_str):
@@ -191,26 +611,18 @@ class PSParser:
             "levels": [],
         }
 
-        # Splitting the source into sections based on section headers
-        section_headers = list(sections.keys())[1:]
-        headers = re.finditer(
-            r"^(" + "|".join(section_headers) + ") *$",
-            PSParser.redact_comments(self.source),
-            flags=re.IGNORECASE | re.MULTILINE,
-        )
-
-        # Extract content for each section
+        # Extract content for each section, split at the section headers
         section = "prelude"
         start = 0
-        for header in headers:
-            content = self.source[start : header.span()[0]]
-            content = re.sub(r"^(=*) *", "", content, flags=re.MULTILINE)
+        for name, header_start, header_end in self.__headers:
+            content = self.source[start:header_start]
+            content = _SEPARATOR_PATTERN.sub("", content)
             sections[section].append(content.strip())
-            section = header.group().strip().lower()
-            start = header.span()[1]
+            section = name
+            start = header_end
         # Extract content for the last section
         content = self.source[start:]
-        content = re.sub(r"^(=*) *", "", content, flags=re.MULTILINE)
+        content = _SEPARATOR_PATTERN.sub("", content)
         sections[section].append(content.strip())
 
         # Remove optional sections if they are empty
@@ -220,11 +632,221 @@ class PSParser:
 
         return sections
 
+    @staticmethod
+    def __find_headers(redacted):
+        """
+        Find the section headers in a source.
+
+        Args:
+            redacted (str): The source with comments redacted by spaces.
+
+        Returns:
+            list: The lowercase name, start and end offset of each header.
+        """
+        return [
+            (header.group().strip().lower(), header.start(), header.end())
+            for header in _HEADER_PATTERN.finditer(redacted)
+        ]
+
+    @staticmethod
+    def __find_levels(redacted, start, end):
+        """
+        Find the levels and messages in a levels section.
+
+        Every line of the section is reduced at once to the first and last
+        character on it other than whitespace. Levels are
+        the runs of content lines between blank lines and messages, and
+        like messages are trimmed of the whitespace around them.
+
+        Args:
+            redacted (str): The source with comments redacted by spaces.
+            start (int): The offset the section starts at.
+            end (int): The offset the section ends at.
+
+        Returns:
+            tuple: The start and end offset of each level, one after
+            another, then the same for each message.
+        """
+        # A newline after the last line keeps every line from being empty
+        codes = code_points(redacted[start:end] + "\n")
+        line_starts = numpy.flatnonzero(codes == 10)[:-1] + 1
+        line_starts = numpy.concatenate(([0], line_starts))
+        visible = ~is_whitespace(codes)
+        positions = numpy.arange(start, start + len(codes))
+        line_first = numpy.minimum.reduceat(
+            numpy.where(visible, positions, end), line_starts
+        )
+        line_end = (
+            numpy.maximum.reduceat(
+                numpy.where(visible, positions, start - 1), line_starts
+            )
+            + 1
+        )
+        content = numpy.logical_or.reduceat(
+            visible & (codes != ord("=")), line_starts
+        )
+        message = numpy.zeros(len(line_starts), dtype=bool)
+        for word in _MESSAGE_WORD_PATTERN.finditer(redacted, start, end):
+            line = numpy.searchsorted(
+                line_starts, word.start() - start, side="right"
+            ) - 1
+            line_start = start + int(line_starts[line])
+            if _MESSAGE_LINE_PATTERN.match(redacted, line_start, end):
+                message[line] = True
+        # Runs of level rows, broken by blank lines and messages
+        level = content & ~message
+        before = numpy.concatenate(([False], level[:-1]))
+        after = numpy.concatenate((level[1:], [False]))
+        levels = numpy.column_stack(
+            (
+                line_first[numpy.flatnonzero(level & ~before)],
+                line_end[numpy.flatnonzero(level & ~after)],
+            )
+        )
+        message = numpy.flatnonzero(message)
+        messages = numpy.column_stack((line_first[message], line_end[message]))
+        return levels.ravel(), messages.ravel()
+
+    def read_through(self, section):
+        """
+        Read the source up to the end of a section without splitting the
+        rest of it.
+
+        Comments are redacted from a growing prefix of the source until it
+        contains the header after the section, which is enough as redacting
+        a prefix gives the same result as the start of the full redaction.
+        Parsing the prefix gives the same results for the section and those
+        before it as parsing the whole source, at the same offsets.
+
+        Args:
+            section (str): The lowercase name of the section.
+
+        Returns:
+            str: The source up to the header after the section, or the whole
+            source if there is no section or header after it.
+        """
+        length = 4096
+        while True:
+            prefix = self.source[:length]
+            complete = length >= len(self.source)
+            found = section == "prelude"
+            for header in _HEADER_PATTERN.finditer(
+                PSParser.redact_comments(prefix)
+            ):
+                # A header at the very end of the prefix may continue past it
+                if not complete and header.end() >= len(prefix):
+                    break
+                if found:
+                    return prefix[: header.start()]
+                found = header.group().strip().lower() == section
+            if complete:
+                return self.source
+            length *= 2
+
+    def __read_prelude(self):
+        """
+        Read the prelude without splitting the rest of the source.
+
+        Returns:
+            str: The content of the prelude section.
+        """
+        content = self.read_through("prelude")
+        content = _SEPARATOR_PATTERN.sub("", content)
+        return content.strip()
+
+    def __build_model(self):
+        """
+        Build the offset based model of the source.
+
+        Comments are redacted with spaces so offsets into the redacted
+        source match offsets into the original, then each section is
+        scanned for its entries without copying any of it.
+
+        Returns:
+            GameModel: The model of the source.
+        """
+        model = GameModel(self.source)
+        # Only kept while the model is built, so it can be freed afterwards
+        redacted = PSParser.redact_comments(self.source)
+        if "_PSParser__headers" not in self.__dict__:
+            self.__headers = PSParser.__find_headers(redacted)
+
+        def trimmed(start, end):
+            # Narrow a span to exclude surrounding whitespace
+            text = redacted[start:end]
+            stripped = text.strip()
+            if not stripped:
+                return start, start
+            start += len(text) - len(text.lstrip())
+            return start, start + len(stripped)
+
+        def add_lines(span_list, start, end):
+            for line in _CONTENT_LINE_PATTERN.finditer(redacted, start, end):
+                span_list.append(*trimmed(*line.span()))
+
+        # Find the content of each section between its headers
+        section = "prelude"
+        start = 0
+        blocks = []
+        for name, header_start, header_end in self.__headers:
+            blocks.append((section, start, header_start))
+            section = name
+            start = header_end
+        blocks.append((section, start, len(self.source)))
+
+        for section, start, end in blocks:
+            # The section runs from its first to its last content line, the
+            # last found by stepping back over the blank lines after it
+            content = _CONTENT_LINE_PATTERN.search(redacted, start, end)
+            content_start = content_end = start
+            if content:
+                content_start = content_end = content.start()
+            while content and end > content_start:
+                line_start = max(redacted.rfind("\n", start, end) + 1, start)
+                line = _CONTENT_LINE_PATTERN.match(redacted, line_start, end)
+                if line:
+                    content_end = line.end()
+                    break
+                end = line_start - 1
+            model.sections.setdefault(section, model.new_span_list())
+            model.sections[section].append(
+                *trimmed(content_start, content_end)
+            )
+            if section == "objects":
+                for block in _CONTENT_BLOCK_PATTERN.finditer(
+                    redacted, start, end
+                ):
+                    model.objects.append(*trimmed(*block.span()))
+            elif section == "levels":
+                levels, messages = PSParser.__find_levels(redacted, start, end)
+                model.levels.extend(levels)
+                model.messages.extend(messages)
+            elif section in (
+                "legend",
+                "collisionlayers",
+                "rules",
+                "winconditions",
+            ):
+                add_lines(getattr(model, section), start, end)
+        return model
+
     def get_objects(self):
         """
         Extract and parse objects from the 'objects' section of PuzzleScript
         source.
 
+        The result is cached, later calls return the same dictionary.
+
+        Returns:
+            dict: A dictionary containing parsed objects, their properties,
+            and synonyms.
+        """
+        return self.objects
+
+    def __parse_objects(self):
+        """
+        Parse the objects section, see get_objects.
+
         Returns:
             dict: A dictionary containing parsed objects, their properties,
             and synonyms.
@@ -238,6 +860,9 @@ class PSParser:
         ps_objects = {}
 
         for object_str in object_strs:
+            # An empty objects section has nothing to parse
+            if not object_str:
+                continue
             try:
                 # Split object string into lines
                 name, colors, *body = object_str.splitlines()
@@ -267,8 +892,8 @@ class PSParser:
                     "body": body,
                     "synonyms": synonyms,
                 }
-            # Handle incomplete object strings
-            except IndexError:
+            # Handle incomplete object strings, such as a name on its own
+            except (IndexError, ValueError):
                 print("Warning: unable to parse object:")
                 print(object_str)
 
@@ -279,18 +904,32 @@ class PSParser:
         Extract and organize glyphs and their associated sprite data based on
         PuzzleScript legend, objects, and collisionlayers.
 
+        The result is cached, later calls return the same dictionary.
+
+        Returns:
+            dict: A dictionary containing glyph definitions with resolved
+            properties and order.
+
+        Raises:
+            PSParser.ParseError: If a glyph uses an object which is missing
+            from collisionlayers.
+        """
+        return self.glyphs
+
+    def __parse_glyphs(self):
+        """
+        Resolve the glyphs, see get_glyphs.
+
         Returns:
             dict: A dictionary containing glyph definitions with resolved
             properties and order.
         """
         # Retrieve relevant sections and objects
-        legend = self.sections["legend"]
-        ps_objects = self.get_objects()
+        ps_objects = self.objects
         collisionlayers = self.sections["collisionlayers"]
-
-        synonyms = {}  # Dictionary to store synonyms
-        properties = {}  # Properties apply to collisionlayers
-        aggregates = {}  # Aggregates apply to glyphs
+        synonyms = self.legend["synonyms"]
+        properties = self.legend["properties"]
+        aggregates = self.legend["aggregates"]
 
         # Handle case sensitivity
         background_name = next(
@@ -298,9 +937,103 @@ class PSParser:
             "background",
         )
         if "case_sensitive" not in self.prelude_options:
-            legend = legend.lower()
             collisionlayers = collisionlayers.lower()
 
+        # Create glyphs dictionary
+        glyphs = {
+            synonym: aggregates.get(synonyms[synonym], [synonyms[synonym]])
+            for synonym in synonyms
+            if len(synonym) == 1
+        }
+
+        # Update glyphs dictionary with single-character aggregates
+        glyphs.update(
+            {key: value for key, value in aggregates.items() if len(key) == 1}
+        )
+
+        # Build collision order based on resolved synonyms and properties
+        collision_order = [
+            synonyms.get(inner_object, inner_object)
+            for collision_object in re.split(
+                r",\s*|\s+", collisionlayers, flags=re.MULTILINE
+            )
+            for inner_object in properties.get(
+                collision_object, [collision_object]
+            )
+        ]
+
+        # Rank objects by their first position in collisionlayers
+        collision_rank = {}
+        for rank, object_name in enumerate(collision_order):
+            collision_rank.setdefault(object_name, rank)
+
+        # Sprite data for each object, shared between glyphs
+        sprites = {}
+
+        # Construct glyph objects with resolved properties and order
+        for glyph, object_names in glyphs.items():
+            if background_name not in object_names:
+                object_names = object_names + [background_name]
+            for object_name in object_names:
+                if object_name not in collision_rank:
+                    raise self.ParseError(
+                        "Can't find object in collisionlayers:\n"
+                        f"  {object_name!r} is not in list"
+                    )
+            object_names = sorted(object_names, key=collision_rank.__getitem__)
+
+            for object_name in object_names:
+                if object_name not in sprites:
+                    sprites[object_name] = "\n".join(
+                        [
+                            ps_objects[object_name]["colors"],
+                            ps_objects[object_name]["body"],
+                        ]
+                    ).strip()
+            glyphs[glyph] = [
+                sprites[object_name] for object_name in object_names
+            ]
+        return glyphs
+
+    def get_legend(self):
+        """
+        Extract and resolve the definitions in the 'legend' section of
+        PuzzleScript source.
+
+        Synonyms map every name, including each object, to the object it
+        stands for. Properties ("or") and aggregates ("and") map their name
+        to the objects they are made of, with any definitions they use
+        expanded. The result is cached, later calls return the same
+        dictionary.
+
+        Returns:
+            dict: A dictionary with 'synonyms', 'properties' and 'aggregates'
+            dictionaries.
+
+        Raises:
+            PSParser.ParseError: If the definitions refer back to themselves.
+        """
+        return self.legend
+
+    def __parse_legend(self):
+        """
+        Resolve the legend, see get_legend.
+
+        Returns:
+            dict: A dictionary with 'synonyms', 'properties' and 'aggregates'
+            dictionaries.
+        """
+        legend = self.sections["legend"]
+        ps_objects = self.objects
+
+        synonyms = {}  # Dictionary to store synonyms
+        properties = {}  # Properties apply to collisionlayers
+        aggregates = {}  # Aggregates apply to glyphs
+
+        # Handle case sensitivity
+        if "case_sensitive" not in self.prelude_options:
+            legend = legend.lower()
+
         # Extract information from the legend section
         for key, values in re.findall(
             r"^(\S+) += +(\S+(?: +(?:and|or) +\S+)*)$",
@@ -334,95 +1067,226 @@ class PSParser:
         }
 
         # Resolve properties and aggregates using synonyms
-        properties = self.__resolve_dict(properties, synonyms)
-        aggregates = self.__resolve_dict(aggregates, synonyms)
-
-        # Create glyphs dictionary
-        glyphs = {
-            synonym: aggregates.get(synonyms[synonym], [synonyms[synonym]])
-            for synonym in synonyms
-            if len(synonym) == 1
+        return {
+            "synonyms": synonyms,
+            "properties": self.__resolve_dict(properties, synonyms),
+            "aggregates": self.__resolve_dict(aggregates, synonyms),
         }
 
-        # Update glyphs dictionary with single-character aggregates
-        glyphs.update(
-            {key: value for key, value in aggregates.items() if len(key) == 1}
-        )
+    def get_rules(self):
+        """
+        Extract and parse rules from the 'rules' section of PuzzleScript
+        source.
 
-        # Build collision order based on resolved synonyms and properties
-        collision_order = [
-            synonyms.get(inner_object, inner_object)
-            for collision_object in re.split(
-                r",\s*|\s+", collisionlayers, flags=re.MULTILINE
-            )
-            for inner_object in properties.get(
-                collision_object, [collision_object]
-            )
-        ]
+        Rules which can't be parsed are skipped with a warning. The result
+        is cached, later calls return the same list.
 
-        # Construct glyph objects with resolved properties and order
-        for glyph in glyphs:
-            if background_name not in glyphs[glyph]:
-                glyphs[glyph].append(background_name)
-            try:
-                glyphs[glyph].sort(key=collision_order.index)
-            except ValueError as err:
-                raise self.ParseError(
-                    f"Can't find object in collisionlayers:\n  {err}"
+        Returns:
+            list: A Rule for each rule, in the order they appear.
+        """
+        return self.rules
+
+    def __parse_rules(self):
+        """
+        Parse the rules section, see get_rules.
+
+        Returns:
+            list: A Rule for each rule, in the order they appear.
+        """
+        lowercase = "case_sensitive" not in self.prelude_options
+        rules = []
+        group = -1
+
+        for block in self.model.sections.get("rules", ()):
+            # Redact comments in place so offsets still match the source
+            redacted, _ = PSParser.__redact_comments(
+                self.source[block.start : block.end], " ", index=block.start
+            )
+            for line in _CONTENT_LINE_PATTERN.finditer(redacted):
+                text = line.group().strip()
+                if text.lower() in ("startloop", "endloop"):
+                    continue
+                try:
+                    rule = PSParser.__parse_rule(line.group(), lowercase)
+                except PSParser.ParseError:
+                    print("Warning: unable to parse rule:")
+                    print(text)
+                    continue
+                if "+" not in rule.prefixes or group < 0:
+                    group += 1
+                start = block.start + line.start()
+                start += len(line.group()) - len(line.group().lstrip())
+                rules.append(
+                    rule._replace(
+                        group=group, span=Span(start, start + len(text))
+                    )
                 )
+        return rules
 
-            glyphs[glyph] = [
-                "\n".join(
-                    [
-                        ps_objects[object_name]["colors"],
-                        ps_objects[object_name]["body"],
-                    ]
-                ).strip()
-                for object_name in glyphs[glyph]
-            ]
-        return glyphs
+    @staticmethod
+    def __parse_rule(line, lowercase):
+        """
+        Parse a single line of the rules section.
+
+        Args:
+            line (str): The line with comments redacted.
+            lowercase (bool): Whether object names should be lowercased.
+
+        Returns:
+            Rule: The rule, without its group or span.
+
+        Raises:
+            PSParser.ParseError: If the line isn't a valid rule.
+        """
+        tokens = _RULE_TOKEN_PATTERN.findall(line)
+        words = [token.lower() for token in tokens]
+        names = words if lowercase else tokens
+        position = 0
+
+        def parse_side():
+            # Read bracketed rows of cells up to the next non bracket token
+            nonlocal position
+            rows = []
+            while position < len(words) and words[position] == "[":
+                row, cell, modifier = [], [], ""
+                position += 1
+                while True:
+                    if position == len(words):
+                        raise PSParser.ParseError("Unclosed '[' in rule")
+                    word = words[position]
+                    if word in ("|", "]"):
+                        if modifier:
+                            # A trailing modifier is an object after all
+                            cell.append(("", names[position - 1]))
+                        row.append(tuple(cell))
+                        cell, modifier = [], ""
+                        if word == "]":
+                            break
+                    elif word in ("[", "->"):
+                        raise PSParser.ParseError(f"Unexpected '{word}'")
+                    elif modifier:
+                        cell.append((modifier, names[position]))
+                        modifier = ""
+                    elif word in _CELL_MODIFIERS:
+                        modifier = word
+                    else:
+                        cell.append(("", names[position]))
+                    position += 1
+                position += 1
+                rows.append(tuple(row))
+            return tuple(rows)
+
+        prefixes, directions = [], []
+        while position < len(words) and words[position] != "[":
+            if words[position] in _RULE_PREFIXES:
+                prefixes.append(words[position])
+            elif words[position] in _RULE_DIRECTIONS:
+                directions.append(words[position])
+            else:
+                raise PSParser.ParseError(f"Unexpected '{words[position]}'")
+            position += 1
+
+        lhs = parse_side()
+        if not lhs or words[position : position + 1] != ["->"]:
+            raise PSParser.ParseError("Rule has no '->'")
+        position += 1
+        rhs = parse_side()
+
+        commands, message = [], None
+        for index, word in enumerate(words[position:], position):
+            if word == "message":
+                # The message is the rest of the line after the keyword
+                match = next(
+                    islice(_RULE_TOKEN_PATTERN.finditer(line), index, None)
+                )
+                message = line[match.end() :].strip()
+                break
+            if word in ("[", "]", "|", "->"):
+                raise PSParser.ParseError(f"Unexpected '{word}' in rule")
+            commands.append(word)
+
+        if rhs and [len(row) for row in rhs] != [len(row) for row in lhs]:
+            raise PSParser.ParseError("Rule sides don't match")
+        if not (rhs or commands or message is not None):
+            raise PSParser.ParseError("Rule has no right hand side")
+        return Rule(
+            tuple(prefixes),
+            tuple(directions),
+            lhs,
+            rhs,
+            tuple(commands),
+            message,
+            None,
+            None,
+        )
 
     @staticmethod
-    def __resolve_dict(input_dict, synonyms=None):
+    def __resolve_dict(input_dict, synonyms):
         """
-        Private utility method to recursively resolve references in a dict.
+        Private utility method to resolve references in a dict.
 
-        This method recursively resolves synonyms in a given dictionary. It
-        iterates through the dictionary, replacing values with their
-        corresponding values from synonyms or from the dictionary itself.
+        Each key is expanded once, in dependency order, by replacing values
+        which are keys of the dictionary with their own expansion and
+        following synonyms for all other values. Expansions are memoized so
+        shared definitions are only resolved once.
 
         Args:
             input_dict (dict): The dictionary to be resolved.
-            synonyms (dict, optional): A dict containing synonym mappings.
-            Defaults to None.
+            synonyms (dict): A dict containing synonym mappings.
 
         Returns:
             dict: The resolved dictionary with synonyms replaced by their
             corresponding values.
+
+        Raises:
+            PSParser.ParseError: If the definitions refer back to themselves.
         """
-        output = {}
 
-        while True:  # Continue resolving until no changes occur
-            changed = False
+        def raise_cycle(chain, name):
+            chain = chain[chain.index(name) :] + [name]
+            raise PSParser.ParseError(
+                "Circular definition in legend:\n  " + " -> ".join(chain)
+            )
 
-            # Iterate through items in the input_dict
-            for key, values in input_dict.items():
-                resolved_values = []
+        def follow_synonyms(name):
+            chain = []
+            while name not in input_dict and synonyms.get(name, name) != name:
+                if name in chain:
+                    raise_cycle(chain, name)
+                chain.append(name)
+                name = synonyms[name]
+            return name
 
-                # Iterate through values of the current key
+        output = {}
+        for root in input_dict:
+            if root in output:
+                continue
+            # Depth first expansion with an explicit stack of
+            # (key, remaining values, expanded values) so that deep
+            # hierarchies can't exhaust the recursion limit
+            path = [root]
+            on_path = {root}
+            stack = [(root, iter(input_dict[root]), [])]
+            while stack:
+                key, values, expanded = stack[-1]
                 for value in values:
-                    if value in input_dict:
-                        resolved_values.extend(input_dict[value])
-                        changed = True
-                    elif synonyms:
-                        # Use synonyms if value is not in input_dict
-                        resolved_values.append(synonyms.get(value, value))
-
-                output[key] = resolved_values
-
-            # If no changes occurred in this iteration, exit the loop
-            if not changed:
-                return output
-
-            # Set input_dict to output to continue with updated values
-            input_dict = output
+                    value = follow_synonyms(value)
+                    if value not in input_dict:
+                        expanded.append(value)
+                    elif value in output:
+                        expanded.extend(output[value])
+                    elif value in on_path:
+                        raise_cycle(path, value)
+                    else:
+                        # Expand the dependency before carrying on
+                        path.append(value)
+                        on_path.add(value)
+                        stack.append((value, iter(input_dict[value]), []))
+                        break
+                else:
+                    output[key] = expanded
+                    stack.pop()
+                    on_path.discard(path.pop())
+                    if stack:
+                        stack[-1][2].extend(expanded)
+        return output
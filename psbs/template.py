@@ -4,7 +4,9 @@ TEMPLATE
 This file provides a class for rendering PSBS templates with Jinja2.
 
 The Template class in this module offers functionality for rendering Jinja2
-templates with PSBS extensions, and post-processing steps.
+templates with PSBS extensions, and post-processing steps. Compiled
+templates can be kept in a bytecode cache between builds, so only templates
+which have been edited since the last build are compiled again.
 
 Example:
     template = Template("my_template.pss", config)
@@ -12,12 +14,14 @@ Example:
 
 """
 
-from os import path
+from os import listdir, makedirs, path
+from shutil import rmtree
 import traceback
 
 import jinja2
 from .extension import Extension
 from .errors import PSBSError
+from .utils import package_version
 
 
 class Template:
@@ -31,6 +35,8 @@ class Template:
         filename (str): The filename of the main template file.
         config (dict): A configuration dictionary containing extension
         settings.
+        cache_dir (str, optional): The directory to keep compiled templates
+        in between builds. Defaults to None, for no cache.
 
     Attributes:
         file (str): The basename of the template file.
@@ -40,17 +46,18 @@ class Template:
 
     Methods:
         render(): Renders the template and applies post-processing.
+        get_inputs(): Returns the files read by rendering the template.
         postprocess(input_str): Applies post-processing to the input string.
         make_template(src_tree): Generates a template as a string from a
         source tree.
     """
 
-    def __init__(self, filename, config):
+    def __init__(self, filename, config, cache_dir=None):
         self.file = path.basename(filename)
 
         # Set up Jinja2 environment with custom delimiters and extensions.
         self.jinja_env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(path.dirname(filename)),
+            loader=_RecordingLoader(path.dirname(filename)),
             autoescape=False,
             block_start_string="(%",
             block_end_string="%)",
@@ -62,10 +69,12 @@ class Template:
             trim_blocks=True,
             lstrip_blocks=True,
             keep_trailing_newline=True,
+            bytecode_cache=_bytecode_cache(cache_dir) if cache_dir else None,
         )
 
         # List to store post-processing functions.
         self.postprocessing_steps = []
+        self.__extensions = []
 
         # Load user extensions and prepare them for the template environment.
         user_extensions = config["user_extensions"]
@@ -73,6 +82,7 @@ class Template:
         for extension in extensions:
             config.setdefault(extension.__name__, {})
             ext_object = extension(config[extension.__name__])
+            self.__extensions.append(ext_object)
 
             # Update template environment with extension methods and filters.
             self.jinja_env.globals.update(ext_object.methods)
@@ -91,6 +101,12 @@ class Template:
         This method renders the template, handles errors, and applies
         post-processing.
         """
+        # Only record the files this render reads, as the template and its
+        # extensions are kept for later builds
+        self.jinja_env.loader.requested.clear()
+        for ext_object in self.__extensions:
+            ext_object.inputs.clear()
+
         # Attempt to render the template.
         try:
             template = self.jinja_env.get_template(self.file)
@@ -112,6 +128,19 @@ class Template:
         output = self.postprocess(output)
         return output
 
+    def get_inputs(self):
+        """
+        Get the files read by rendering the template.
+
+        Returns:
+            list: The path of every template loaded, or looked for and not
+            found, and of every file registered by an extension.
+        """
+        inputs = list(self.jinja_env.loader.requested)
+        for ext_object in self.__extensions:
+            inputs.extend(ext_object.inputs)
+        return list(dict.fromkeys(inputs))
+
     def postprocess(self, input_str):
         """
         Apply post-processing steps to the input string.
@@ -160,3 +189,61 @@ class Template:
                 # Include the current source file
                 lines.append(f'(% include "{src_filename}" +%)')
         return "\n".join(lines).strip()
+
+
+class _RecordingLoader(jinja2.FileSystemLoader):
+    # A FileSystemLoader which records the path of every template it is
+    # asked for, including those which don't exist yet. Templates Jinja has
+    # cached are recorded when it checks they are up to date.
+
+    def __init__(self, searchpath):
+        super().__init__(searchpath)
+        self.requested = []
+
+    def get_source(self, environment, template):
+        try:
+            source, filename, uptodate = super().get_source(
+                environment, template
+            )
+        except jinja2.exceptions.TemplateNotFound:
+            self.requested.append(
+                path.join(self.searchpath[0], *template.split("/"))
+            )
+            raise
+        self.requested.append(filename)
+
+        def recorded_uptodate():
+            self.requested.append(filename)
+            return uptodate()
+
+        return source, filename, recorded_uptodate
+
+
+def _bytecode_cache(cache_dir):
+    """
+    Get a bytecode cache for compiled templates.
+
+    Templates are cached under their name and checked against a hash of
+    their source, so edited templates are compiled again. The cache is
+    kept in a subdirectory for the installed versions of PSBS and Jinja,
+    and caches for other versions are removed.
+
+    Args:
+        cache_dir (str): The directory to keep the cache in.
+
+    Returns:
+        jinja2.BytecodeCache: The cache, or None if it can't be created.
+    """
+    key = "-".join(
+        f"{package}-{package_version(package)}"
+        for package in ("psbs", "jinja2")
+    )
+    try:
+        makedirs(path.join(cache_dir, key), exist_ok=True)
+        for entry in listdir(cache_dir):
+            if entry != key:
+                rmtree(path.join(cache_dir, entry), ignore_errors=True)
+    except OSError as err:
+        print(f"Warning: unable to use template cache\n  {err}")
+        return None
+    return jinja2.FileSystemBytecodeCache(path.join(cache_dir, key))
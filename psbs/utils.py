@@ -6,6 +6,7 @@ parsing, directory creation, web browsing, and URL manipulation.
 """
 
 import webbrowser
+from importlib.metadata import PackageNotFoundError, version
 from os import mkdir
 
 import yaml
@@ -43,14 +44,18 @@ def write_file(filename, data):
 
     Args:
         filename (str): The path to the file to be written.
-        data (str): The data to be written to the file.
+        data (str or iterable): The data to be written to the file, either
+            as a string or as chunks of strings which are written in turn.
 
     Raises:
         SystemExit: If there is an error writing the file.
     """
     try:
         with open(filename, "w", encoding="UTF-8") as file:
-            file.write(data)
+            if isinstance(data, str):
+                file.write(data)
+            else:
+                file.writelines(data)
     except IOError as err:
         raise PSBSError(
             "Error: Unable to read input file, is this a text file?"
@@ -122,6 +127,22 @@ def make_dir(directory):
         ) from err
 
 
+def package_version(name):
+    """
+    Get the installed version of a package.
+
+    Args:
+        name (str): The name of the package.
+
+    Returns:
+        str: The version, or "unknown" if the package isn't installed.
+    """
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
 def run_in_browser(url):
     """
     Open a URL in the default web browser.
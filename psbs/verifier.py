@@ -0,0 +1,263 @@
+"""
+VERIFIER
+
+This file provides a static verifier for PuzzleScript games.
+
+It looks for the most common mistakes the PuzzleScript compiler reports,
+such as undefined objects, objects missing from collisionlayers, unknown
+glyphs in levels, malformed sprites and bad colours. It works from the
+parsed game alone, so unlike verifying in a headless browser it needs
+neither a browser nor a network connection, and every problem comes with
+the line and column it was found at.
+
+Example:
+    for problem in verify(PSParser(source)):
+        print(problem)
+
+"""
+
+import re
+from collections import namedtuple
+from contextlib import redirect_stdout
+from io import StringIO
+
+import numpy
+
+from .gamemodel import Span, code_points
+from .psparser import PSParser
+
+# The colour names understood by PuzzleScript
+_COLOR_NAMES = {
+    "black",
+    "white",
+    "gray",
+    "grey",
+    "lightgray",
+    "lightgrey",
+    "darkgray",
+    "darkgrey",
+    "red",
+    "darkred",
+    "lightred",
+    "brown",
+    "darkbrown",
+    "lightbrown",
+    "orange",
+    "yellow",
+    "green",
+    "darkgreen",
+    "lightgreen",
+    "blue",
+    "lightblue",
+    "darkblue",
+    "purple",
+    "pink",
+    "transparent",
+}
+_HEX_COLOR_PATTERN = re.compile(
+    r"#(?:[0-9a-f]{3,4}|[0-9a-f]{6}|[0-9a-f]{8})", flags=re.IGNORECASE
+)
+_SPRITE_ROW_PATTERN = re.compile(r"[.0-9]*")
+_WORD_PATTERN = re.compile(r"[^\s,]+")
+# Whitespace levels may contain between and around their rows
+_LEVEL_SPACE = {"\n", " ", "\t"}
+
+
+class Problem(namedtuple("Problem", ["line", "column", "message"])):
+    """
+    A problem found in a game.
+
+    Attributes:
+        line (int): The line the problem is on.
+        column (int): The column the problem is at.
+        message (str): A description of the problem.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return f"line {self.line}, column {self.column}: {self.message}"
+
+
+def verify(parser):
+    """
+    Look for mistakes in a game without compiling it.
+
+    Args:
+        parser (PSParser): The parser for the game.
+
+    Returns:
+        list: A Problem for each mistake found, ordered by location.
+    """
+    model = parser.model
+    lowercase = "case_sensitive" not in parser.prelude_options
+    problems = []
+
+    def report(offset, message):
+        problems.append(Problem(*model.location(offset), message))
+
+    def words(span):
+        # Each word of a span and the offset it starts at
+        text = PSParser.redact_comments(model.text(span))
+        if lowercase:
+            text = text.lower()
+        for word in _WORD_PATTERN.finditer(text):
+            yield word.group(), span.start + word.start()
+
+    # Malformed objects are skipped by the parser with a warning, they are
+    # reported as problems by _verify_object instead
+    with redirect_stdout(StringIO()):
+        ps_objects = parser.get_objects()
+        try:
+            legend = parser.get_legend()
+        except PSParser.ParseError as err:
+            sections = model.sections.get("legend")
+            report(sections[0].start if sections else 0, str(err))
+            legend = {"synonyms": {}, "properties": {}, "aggregates": {}}
+    defined = (
+        legend["synonyms"].keys()
+        | legend["properties"].keys()
+        | legend["aggregates"].keys()
+    )
+
+    # Check the colours and sprite of each object
+    for span in model.objects:
+        _verify_object(model, span, report)
+
+    # Check every name used in the legend is defined
+    for span in model.legend:
+        for index, (word, offset) in enumerate(words(span)):
+            if index < 2 or word in ("and", "or"):
+                continue
+            if word not in defined:
+                report(offset, f"Undefined object '{word}' in legend")
+
+    # Check every object is in a collision layer, and nothing else is
+    layered = set()
+    for span in model.collisionlayers:
+        for word, offset in words(span):
+            if word not in defined:
+                report(offset, f"Undefined object '{word}' in collisionlayers")
+                continue
+            name = legend["synonyms"].get(word, word)
+            layered.update(legend["properties"].get(name, [name]))
+    for span in model.objects:
+        name = model.text(span).split(None, 1)[0]
+        if lowercase:
+            name = name.lower()
+        if name in ps_objects and name not in layered:
+            report(span.start, f"Object '{name}' is not in collisionlayers")
+
+    # Check every glyph used in a level is defined
+    glyphs = {
+        name
+        for name in legend["synonyms"].keys() | legend["aggregates"].keys()
+        if len(name) == 1
+    }
+    # Most games use no unknown glyphs, which all levels at once tell
+    unknown = _level_characters(model, lowercase) - glyphs - _LEVEL_SPACE
+    if unknown:
+        for span in model.levels:
+            text = _level_text(model.text(span), lowercase)
+            for glyph in sorted(unknown & set(text), key=text.index):
+                report(
+                    span.start + text.index(glyph),
+                    f"Unknown glyph '{glyph}' in level",
+                )
+
+    problems.sort()
+    return problems
+
+
+def _level_characters(model, lowercase):
+    """
+    Find every character used in the levels of a game, in one pass over the
+    part of the source they span.
+
+    Args:
+        model (GameModel): The model of the game.
+        lowercase (bool): Whether to lowercase the characters.
+
+    Returns:
+        set: The characters the levels contain outside of comments.
+    """
+    if not model.levels:
+        return set()
+    spans = numpy.asarray(model.levels.offsets, dtype=numpy.int64)
+    start, end = spans[0], spans[-1]
+    text = model.text(Span(int(start), int(end)))
+    if "(" in text:
+        text = PSParser.redact_comments(text)
+    # Mark where each level starts and ends, then count what lies within
+    bounds = numpy.zeros(end - start + 1, dtype=numpy.int8)
+    bounds[spans[0::2] - start] = 1
+    bounds[spans[1::2] - start] = -1
+    within = numpy.cumsum(bounds[:-1], dtype=numpy.int8).view(bool)
+    counts = numpy.bincount(code_points(text)[within])
+    characters = "".join(map(chr, numpy.flatnonzero(counts)))
+    return set(characters.lower() if lowercase else characters)
+
+
+def _level_text(text, lowercase):
+    # Level text with comments redacted, lowercased if the game is case
+    # insensitive
+    if "(" in text:
+        text = PSParser.redact_comments(text)
+    return text.lower() if lowercase else text
+
+
+def _verify_object(model, span, report):
+    """
+    Check the colours and sprite of an object.
+
+    Args:
+        model (GameModel): The model of the game.
+        span (Span): The span of the object.
+        report (function): Called with the offset and message of each
+            problem found.
+    """
+    text = PSParser.redact_comments(model.text(span))
+    lines = text.split("\n")
+    offsets = [span.start]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+    name = lines[0].split()[0]
+    if len(lines) < 2 or not lines[1].strip():
+        report(span.start, f"Object '{name}' has no colours")
+        return
+
+    colors = lines[1].split()
+    for color in re.finditer(r"\S+", lines[1]):
+        if color.group().lower() not in _COLOR_NAMES and not (
+            _HEX_COLOR_PATTERN.fullmatch(color.group())
+        ):
+            report(
+                offsets[1] + color.start(),
+                f"Bad colour '{color.group()}' in object '{name}'",
+            )
+
+    sprite = [
+        (line.strip(), offsets[index] + len(line) - len(line.lstrip()))
+        for index, line in enumerate(lines[2:], 2)
+        if line.strip()
+    ]
+    if not sprite:
+        return
+    if len({len(row) for row, _ in sprite}) > 1:
+        report(sprite[0][1], f"Sprite rows of object '{name}' differ in width")
+    for row, offset in sprite:
+        if not _SPRITE_ROW_PATTERN.fullmatch(row):
+            column = _SPRITE_ROW_PATTERN.match(row).end()
+            report(
+                offset + column,
+                f"Bad pixel '{row[column]}' in sprite of object '{name}'",
+            )
+            continue
+        for column, pixel in enumerate(row):
+            if pixel != "." and int(pixel) >= len(colors):
+                report(
+                    offset + column,
+                    f"Sprite of object '{name}' uses colour {pixel} but "
+                    f"only {len(colors)} are defined",
+                )
+                break
@@ -0,0 +1,362 @@
+"""
+WATCHER
+
+This file provides a class for waiting on changes to a project's files.
+
+On Linux changes are reported by inotify, so waiting costs nothing until a
+file is saved. Elsewhere, or if inotify can't be used, the watched files
+are polled for changes to their size and modification time instead.
+Editors often save a file in several steps, or save several files at once,
+so changes are collected until the files have been quiet for a moment and
+then reported together.
+
+Example:
+    watcher = FileWatcher(["src"], ["config.yaml"])
+    while True:
+        for filename in watcher.wait():
+            print(f"{filename} changed")
+
+"""
+
+import ctypes
+import ctypes.util
+import struct
+import sys
+from os import O_CLOEXEC, O_NONBLOCK, close, fsencode, read, scandir, stat
+from os import path
+from select import select
+from time import monotonic, sleep
+
+# The inotify events which mean a file's content may have changed
+_IN_MODIFY = 0x2
+_IN_ATTRIB = 0x4
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_ISDIR = 0x40000000
+_IN_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+# Each inotify event starts with its watch, mask, cookie and name length
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """
+    Wait for changes to files and directories.
+
+    Args:
+        directories (list): Directories to watch, along with everything in
+            them.
+        files (list, optional): Individual files to watch, which don't have
+            to exist yet. Defaults to None.
+        poll (bool, optional): If True, poll for changes even if inotify is
+            available. Defaults to False.
+        interval (float, optional): The seconds between polls. Defaults to
+            0.2.
+        debounce (float, optional): The seconds files must be quiet for
+            before changes are reported. Defaults to 0.05.
+
+    Attributes:
+        directories (list): The directories being watched.
+        files (set): The individual files being watched.
+        polling (bool): True if changes are found by polling rather than
+            reported by inotify.
+        interval (float): The seconds between polls.
+        debounce (float): The seconds files must be quiet for before changes
+            are reported.
+
+    Methods:
+        watch_files(files): Watch more individual files.
+        wait(timeout=None): Wait for files to change.
+        close(): Stop watching.
+    """
+
+    def __init__(
+        self, directories, files=None, poll=False, interval=0.2, debounce=0.05
+    ):
+        self.directories = [path.normpath(name) for name in directories]
+        self.files = set()
+        # inotify reports the path a directory was first watched by, so
+        # watches are kept by real path and mapped back to the paths given
+        self.__real_directories = {
+            path.realpath(directory): directory
+            for directory in self.directories
+        }
+        self.__real_files = {}
+        self.interval = interval
+        self.debounce = debounce
+        self.__fd = None
+        self.__watches = {}
+        self.__snapshot = {}
+        self.polling = poll or not self.__start_inotify()
+        for directory in self.directories:
+            self.__watch_directory(directory)
+        self.watch_files(files or [])
+
+    def watch_files(self, files):
+        """
+        Watch more individual files.
+
+        Args:
+            files (list): The paths of the files.
+        """
+        for filename in files:
+            filename = path.normpath(filename)
+            if filename in self.files:
+                continue
+            self.files.add(filename)
+            if self.polling:
+                self.__snapshot[filename] = _file_state(filename)
+            else:
+                real_filename = _real_path(filename)
+                self.__real_files.setdefault(real_filename, set()).add(
+                    filename
+                )
+                self.__add_watch(path.dirname(real_filename))
+
+    def wait(self, timeout=None):
+        """
+        Wait for files to change.
+
+        Once a file has changed, changes are collected until no more have
+        been made for the debounce time.
+
+        Args:
+            timeout (float, optional): The most seconds to wait for a
+                change. Defaults to None, to wait for as long as it takes.
+
+        Returns:
+            set: The paths of the files which changed, which is empty if the
+            timeout ran out first.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        changed = set()
+        while True:
+            if changed:
+                wait_time = self.debounce
+            elif deadline is None:
+                wait_time = None
+            else:
+                wait_time = max(deadline - monotonic(), 0)
+            changes = self.__read_changes(wait_time)
+            if changes:
+                changed |= changes
+            elif changed or (deadline is not None and monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        """
+        Stop watching.
+        """
+        if self.__fd is not None:
+            close(self.__fd)
+            self.__fd = None
+
+    def __read_changes(self, timeout):
+        """
+        Wait for changes, by inotify or polling.
+
+        Args:
+            timeout (float): The most seconds to wait, or None to wait until
+                there is a change.
+
+        Returns:
+            set: The paths of the files which changed.
+        """
+        if self.polling:
+            deadline = None if timeout is None else monotonic() + timeout
+            while True:
+                changes = self.__poll()
+                if changes or (
+                    deadline is not None and monotonic() >= deadline
+                ):
+                    return changes
+                wait_time = self.interval
+                if deadline is not None:
+                    wait_time = min(wait_time, max(deadline - monotonic(), 0))
+                sleep(wait_time)
+
+        if not select([self.__fd], [], [], timeout)[0]:
+            return set()
+        data = read(self.__fd, 65536)
+        changes = set()
+        offset = 0
+        while offset < len(data):
+            watch, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0").decode(
+                sys.getfilesystemencoding(), "surrogateescape"
+            )
+            offset += length
+            directory = self.__watches.get(watch)
+            if directory is None or not name:
+                continue
+            filename = path.join(directory, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and self.__recursive(
+                    filename
+                ):
+                    # Watch new directories, and anything already in them
+                    self.__watch_directory(filename)
+                    for new_filename in _walk(filename):
+                        changes |= self.__given_paths(new_filename)
+                continue
+            changes |= self.__given_paths(filename)
+        return changes
+
+    def __poll(self):
+        """
+        Compare the state of every watched file with the last poll.
+
+        Returns:
+            set: The paths of the files which changed.
+        """
+        snapshot = {
+            filename: _file_state(filename)
+            for directory in self.directories
+            for filename in _walk(directory)
+        }
+        for filename in self.files:
+            snapshot[filename] = _file_state(filename)
+        changes = {
+            filename
+            for filename in snapshot.keys() | self.__snapshot.keys()
+            if snapshot.get(filename) != self.__snapshot.get(filename)
+        }
+        self.__snapshot = snapshot
+        return changes
+
+    def __start_inotify(self):
+        """
+        Start an inotify instance.
+
+        Returns:
+            bool: True if inotify can be used.
+        """
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(
+                ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+            )
+            fd = libc.inotify_init1(O_NONBLOCK | O_CLOEXEC)
+        except (OSError, AttributeError):
+            return False
+        if fd < 0:
+            return False
+        self.__libc = libc
+        self.__fd = fd
+        return True
+
+    def __watch_directory(self, directory):
+        """
+        Watch a directory and every directory in it.
+
+        Args:
+            directory (str): The path of the directory.
+        """
+        if self.polling:
+            for filename in _walk(directory):
+                self.__snapshot[filename] = _file_state(filename)
+            return
+        self.__add_watch(directory)
+        try:
+            entries = list(scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                self.__watch_directory(entry.path)
+
+    def __add_watch(self, directory):
+        """
+        Add an inotify watch on a directory.
+
+        Args:
+            directory (str): The path of the directory.
+        """
+        directory = path.realpath(directory)
+        if directory in self.__watches.values():
+            return
+        watch = self.__libc.inotify_add_watch(
+            self.__fd, fsencode(directory), _IN_MASK
+        )
+        if watch >= 0:
+            self.__watches[watch] = directory
+
+    def __recursive(self, filename):
+        """
+        Check whether a path is inside one of the watched directories.
+
+        Args:
+            filename (str): The real path to check.
+
+        Returns:
+            bool: True if the path is inside a watched directory.
+        """
+        return any(
+            filename.startswith(directory + path.sep)
+            for directory in self.__real_directories
+        )
+
+    def __given_paths(self, filename):
+        """
+        Get the paths a changed file is watched by, as they were given.
+
+        Args:
+            filename (str): The real path of the file.
+
+        Returns:
+            set: The paths of the file as an individual file and inside
+            each watched directory it is in.
+        """
+        given = set(self.__real_files.get(filename, ()))
+        for real_directory, directory in self.__real_directories.items():
+            if filename.startswith(real_directory + path.sep):
+                given.add(
+                    path.normpath(
+                        path.join(
+                            directory, path.relpath(filename, real_directory)
+                        )
+                    )
+                )
+        return given
+
+
+def _walk(directory):
+    # Yield the path of every file in a directory and its subdirectories
+    try:
+        entries = list(scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(entry.path)
+        else:
+            yield path.normpath(entry.path)
+
+
+def _real_path(filename):
+    # The path of a file with the directory it is in resolved, leaving the
+    # file itself alone as a symbolic link's changes are reported by its name
+    return path.join(
+        path.realpath(path.dirname(filename) or "."), path.basename(filename)
+    )
+
+
+def _file_state(filename):
+    # The size and modification time of a file, or None if it doesn't exist
+    try:
+        status = stat(filename)
+    except OSError:
+        return None
+    return status.st_size, status.st_mtime_ns
@@ -29,6 +29,9 @@ setup(
         'numpy',
         'pyppeteer'
     ],
+    extras_require={
+        'brotli': ['brotli']
+    },
 
     classifiers=[
         'Intended Audience :: Developers',
@@ -40,7 +43,8 @@ setup(
     ],
     entry_points={
         'console_scripts': [
-            'psbs=psbs.psbs:_main'
+            'psbs=psbs.psbs:_main',
+            'psbsd=psbs.psbsd:_main'
         ],
     },
 )
@@ -0,0 +1,17 @@
+"""
+Fixtures shared by the tests.
+"""
+
+from os import path
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def example():
+    # The source of the example game new projects start from
+    with open(
+        path.join(path.dirname(__file__), "..", "psbs", "example.txt"),
+        encoding="UTF-8",
+    ) as file:
+        return file.read()
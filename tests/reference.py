@@ -0,0 +1,94 @@
+"""
+REFERENCE
+
+This file keeps original implementations which the faster ones must match
+exactly: the character by character PSParser.redact_comments and the
+placeholder replacement build_html did one placeholder at a time. It is
+used by the tests and benchmarks, not by PSBS itself.
+"""
+
+from json import dumps
+
+from psbs.psparser import PSParser
+
+
+def redact_comments(input_str, redact_char=" "):
+    """
+    Redact comments from a PuzzleScript source code while preserving
+    message content.
+
+    Args:
+        input_str (str): The input PuzzleScript source code.
+        redact_char (str, optional): The character used for redacting
+            comments. Defaults to " ".
+
+    Returns:
+        str: The input source code with comments redacted.
+    """
+    depth = 0  # Number to track depth of nested comments
+    output = []
+    in_a_message = False
+
+    # Iterate through each character in the input source code.
+    for character in input_str:
+        # Check if the last 8 characters are "message " to identify if
+        # we are currently inside a message.
+        if len(output) > 8 and "".join(output[-8:]).lower() == "message ":
+            in_a_message = True
+
+        # When a newline is encountered, we are no longer in a message.
+        if character == "\n":
+            in_a_message = False
+
+        # If an opening parenthesis is encountered and we are not inside a
+        # message, increment the depth.
+        if character == "(" and not in_a_message:
+            depth += 1
+
+        # If the depth is greater than 0 and the character is not a
+        # newline and we are not inside a message, append the redact_char
+        # to the output list.
+        if depth > 0 and character != "\n" and not in_a_message:
+            output.append(redact_char)
+        else:
+            # If none of the above conditions are met, append the character
+            # to the output list.
+            output.append(character)
+
+        # When a closing parenthesis is encountered and we are not inside a
+        # message, decrement the depth, ensuring it stays non-negative.
+        if character == ")" and not in_a_message:
+            depth = max(depth - 1, 0)
+
+    return "".join(output)
+
+
+def fill_placeholders(standalone_html, source, engine):
+    """
+    Fill in the placeholders of a standalone HTML template, replacing each
+    placeholder in turn.
+
+    Args:
+        standalone_html (str): The standalone inlined HTML template.
+        source (str): The PuzzleScript source code.
+        engine (str): The base URL of the PuzzleScript engine.
+
+    Returns:
+        str: The filled in template.
+    """
+    prelude_options = PSParser(source).prelude_options
+    replacements = {
+        "__GAMETITLE__": prelude_options.get("title", "My Game"),
+        "__AUTHOR__": prelude_options.get("author", ""),
+        "__HOMEPAGE__": prelude_options.get("homepage", engine),
+        "__HOMEPAGE_STRIPPED_PROTOCOL__": prelude_options.get(
+            "homepage", engine
+        ).split("://", 1)[-1],
+        "___BGCOLOR___": prelude_options.get("background_color", "black"),
+        "___TEXTCOLOR___": prelude_options.get("text_color", "lightblue"),
+        '"__GAMEDAT__"': dumps(source),
+        "__GAMEDAT__": dumps(source),
+    }
+    for placeholder, value in replacements.items():
+        standalone_html = standalone_html.replace(placeholder, value)
+    return standalone_html
@@ -0,0 +1,31 @@
+"""
+Tests for the runtime cost estimates.
+"""
+
+from psbs.analyzer import runtime_costs
+from psbs.psparser import PSParser
+
+def test_widths_match_level_rows(example):
+    parser = PSParser(example)
+    rows = [
+        record.rows
+        for record in PSParser.iter_levels(parser.sections["levels"])
+        if record.rows
+    ]
+    costs = runtime_costs(parser)
+    assert list(costs.heights) == [len(level) for level in rows]
+    assert list(costs.widths) == [
+        max(len(row) for row in level) for level in rows
+    ]
+
+
+def test_indentation_and_comments_are_not_cells(example):
+    levels = example.index("LEVELS")
+    source = example[:levels] + (
+        "LEVELS\n\n"
+        "    #.(wall)#.   (a very long trailing comment)\n"
+        "\t..#.\n"
+    )
+    costs = runtime_costs(PSParser(source))
+    assert list(costs.widths) == [4]
+    assert list(costs.heights) == [2]
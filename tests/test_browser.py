@@ -0,0 +1,40 @@
+"""
+Tests for returning pages to the browser pool.
+"""
+
+import asyncio
+
+from psbs.browser import BrowserPool
+
+
+class _Page:
+    # A page which compiles every game without messages
+
+    def __init__(self):
+        self.closed = False
+
+    async def evaluate(self, script, *args):
+        await asyncio.sleep(0)
+        return []
+
+    async def close(self):
+        await asyncio.sleep(0.01)
+        self.closed = True
+
+    def isClosed(self):
+        return self.closed
+
+
+def test_pages_beyond_the_pool_are_closed_by_compile(monkeypatch):
+    pool = BrowserPool(max_pages=0)
+    pages = []
+
+    async def acquire(editor_url):
+        pages.append(_Page())
+        return pages[-1]
+
+    monkeypatch.setattr(pool, "_BrowserPool__acquire", acquire)
+    monkeypatch.setattr(pool, "_BrowserPool__browser_alive", lambda: True)
+    assert pool.compile("editor.html", "title Game") == []
+    # Closed before compile returned, not left to a task on the loop
+    assert [page.closed for page in pages] == [True]
@@ -0,0 +1,63 @@
+"""
+Tests for the local engine mirror.
+"""
+
+from os import listdir, makedirs, path
+
+import pytest
+
+from psbs import engine as engine_module
+from psbs.engine import EngineCache
+
+ENGINE = "https://engine.example/"
+
+
+class _Response:
+    # The parts of a requests response the engine cache reads
+
+    def __init__(self, content):
+        self.status_code = 200 if content is not None else 404
+        self.headers = {}
+        self.content = content
+
+
+@pytest.fixture(name="files")
+def files_fixture(monkeypatch):
+    # The files the engine serves, by name
+    files = {
+        "editor.html": b"<script src='js/compiler.js'></script>",
+        "play.html": b"<link href='css/play.css'>",
+        "standalone_inlined.txt": b"<title>__GAMETITLE__</title>",
+        "js/compiler.js": b"compile v1",
+        "css/play.css": b"body {}",
+    }
+
+    def get(url, headers=None, timeout=None):
+        return _Response(files.get(url[len(ENGINE) :]))
+
+    monkeypatch.setattr(engine_module, "get", get)
+    return files
+
+
+def test_changed_script_gives_new_version(tmp_path, files):
+    cache = EngineCache(ENGINE, str(tmp_path))
+    first = cache.update()
+    files["js/compiler.js"] = b"compile v2"
+    second = cache.update()
+    assert second != first
+    assert cache.read("js/compiler.js") == b"compile v2"
+    assert first not in listdir(cache.directory)
+
+
+def test_unchanged_engine_keeps_its_version(tmp_path, files):
+    cache = EngineCache(ENGINE, str(tmp_path))
+    assert cache.update() == cache.update()
+
+
+def test_downloads_in_progress_are_kept(tmp_path, files):
+    cache = EngineCache(ENGINE, str(tmp_path))
+    cache.update()
+    makedirs(path.join(cache.directory, ".download-other"))
+    files["play.html"] = b"<p>"
+    cache.update()
+    assert ".download-other" in listdir(cache.directory)
@@ -0,0 +1,36 @@
+"""
+Tests for deciding whether exported games are minified.
+"""
+
+import pytest
+
+import psbs.project
+from psbs.project import PSBSProject
+
+
+@pytest.mark.parametrize(
+    "build, minify, expected",
+    [
+        # Release builds are minified once, by the build
+        ({"name": "release"}, True, False),
+        ({"name": "release"}, False, False),
+        ({"name": "release", "minify": False}, True, True),
+        ({"name": "debug"}, True, True),
+        ({"name": "debug"}, False, False),
+    ],
+)
+def test_export_minifies_once(tmp_path, monkeypatch, build, minify, expected):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "bin").mkdir()
+    (tmp_path / "bin" / "script.txt").write_text("title Game\n")
+    options = "\n".join(f"  {key}: {value}" for key, value in build.items())
+    (tmp_path / "config.yaml").write_text(f"Build:\n{options}\n")
+    exported = {}
+
+    def build_html(engine, source, **kwargs):
+        exported.update(kwargs)
+        return "game.html"
+
+    monkeypatch.setattr(psbs.project, "build_html", build_html)
+    PSBSProject("config.yaml").export(minify=minify)
+    assert exported["minify"] is expected
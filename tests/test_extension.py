@@ -0,0 +1,60 @@
+"""
+Tests for loading extensions.
+"""
+
+from psbs.extension import Extension
+
+_USER_EXTENSION = """
+from psbs.extension import Extension
+
+
+class Shout(Extension):
+    def __init__(self, config):
+        super().__init__(config)
+        self.register_post(lambda text: text + "{suffix}")
+"""
+
+
+def write_extension(directory, suffix):
+    filename = directory / "shout.py"
+    filename.write_text(_USER_EXTENSION.format(suffix=suffix))
+    return str(filename)
+
+
+def user_classes(extensions):
+    return [
+        extension
+        for extension in extensions
+        if extension.__name__ == "Shout"
+    ]
+
+
+def test_reloaded_user_extension_replaces_old_version(tmp_path):
+    filename = write_extension(tmp_path, "!")
+    old = user_classes(Extension.get_extensions([filename]))
+    write_extension(tmp_path, "?")
+    new = user_classes(Extension.get_extensions([filename]))
+    assert len(old) == 1
+    assert len(new) == 1
+    assert new[0] is not old[0]
+    assert new[0]({}).post[0]("a") == "a?"
+
+
+def test_user_extensions_stay_with_their_project(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    filename = write_extension(project, "!")
+    assert len(user_classes(Extension.get_extensions([filename]))) == 1
+    assert user_classes(Extension.get_extensions([])) == []
+
+
+def test_user_extension_named_like_a_builtin(tmp_path):
+    filename = tmp_path / "images.py"
+    filename.write_text(_USER_EXTENSION.format(suffix="!"))
+    names = [
+        extension.__name__
+        for extension in Extension.get_extensions([str(filename)])
+    ]
+    assert "Images" in names and "Shout" in names
+    names = [extension.__name__ for extension in Extension.get_extensions()]
+    assert "Images" in names and "Shout" not in names
@@ -0,0 +1,87 @@
+"""
+Tests for the offset based game model.
+"""
+
+import pytest
+
+from psbs.gamemodel import Span, SpanList
+from psbs.psparser import PSParser
+
+
+def texts(model, spans):
+    return [model.text(span) for span in spans]
+
+
+def first_lines(model, spans):
+    return [text.split("\n")[0] for text in texts(model, spans)]
+
+
+def test_spans_cover_each_entry(example):
+    model = PSParser(example).model
+    assert first_lines(model, model.objects) == [
+        "Background",
+        "Target",
+        "Wall",
+        "Player",
+        "Crate",
+    ]
+    assert texts(model, model.legend)[-2:] == [
+        "@ = Crate and Target",
+        "O = Target",
+    ]
+    assert texts(model, model.collisionlayers) == [
+        "Background",
+        "Target",
+        "Player, Wall, Crate",
+    ]
+    assert texts(model, model.rules) == [
+        "[ > Player | Crate ] -> [ > Player | > Crate ]"
+    ]
+    assert texts(model, model.winconditions) == ["all Target on Crate"]
+    assert first_lines(model, model.levels) == ["####..", "######"]
+    assert texts(model, model.messages) == []
+
+
+def test_messages_and_comments_in_levels(example):
+    levels = example.index("LEVELS")
+    source = example[:levels] + (
+        "LEVELS\n\n"
+        "  #.#  (first)\n"
+        "#P.#\n"
+        "message Well  done (really)\n"
+        "#*O#\n"
+        "\n"
+        "(a comment\n"
+        "on two lines)\n"
+        "  MESSAGE\tlast\n"
+    )
+    model = PSParser(source).model
+    # Spans are trimmed of whitespace and comments, messages keep theirs
+    assert texts(model, model.levels) == ["#.#  (first)\n#P.#", "#*O#"]
+    assert texts(model, model.messages) == [
+        "message Well  done (really)",
+        "MESSAGE\tlast",
+    ]
+    assert model.location(model.levels[0].start) == (89, 3)
+    assert model.location(model.messages[-1].end) == (96, 15)
+
+
+def test_location_of_each_line(example):
+    model = PSParser(example).model
+    lines = example.split("\n")
+    offset = 0
+    for number, line in enumerate(lines, start=1):
+        assert model.location(offset) == (number, 1)
+        assert model.location(offset + len(line)) == (number, len(line) + 1)
+        offset += len(line) + 1
+
+
+def test_span_list():
+    spans = SpanList("I")
+    spans.append(1, 3)
+    spans.extend([5, 8, 9, 9])
+    assert list(spans) == [Span(1, 3), Span(5, 8), Span(9, 9)]
+    assert len(spans) == 3
+    assert spans[-1] == Span(9, 9)
+    with pytest.raises(IndexError):
+        spans[3]
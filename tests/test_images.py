@@ -0,0 +1,63 @@
+"""
+Tests for compacting duplicate sprites in the images extension.
+"""
+
+import pytest
+
+from psbs.extensions.images import Images
+
+# A copy of the target's sprite, added before it
+_DUPLICATE = "Ring\nred\n.....\n.000.\n.0.0.\n.000.\n.....\n\n"
+
+
+def images(copy_duplicates):
+    return Images(
+        {"alpha": False, "max_colors": 10, "copy_duplicates": copy_duplicates}
+    )
+
+
+def add_objects(example, text):
+    return example.replace("Target\ndarkblue", text + "Target\ndarkblue")
+
+
+def test_duplicates_are_replaced_with_copies(example):
+    source = add_objects(example, _DUPLICATE)
+    output = images(True).compact_duplicate_sprites(source)
+    assert "Target copy:Ring\ndarkblue\n\n" in output
+
+
+@pytest.mark.parametrize("copy_duplicates", [False, True])
+def test_object_without_colours_is_skipped(example, copy_duplicates, capsys):
+    # The parser warns about the object, the rest are still compacted
+    source = add_objects(example, _DUPLICATE + "Half\n\n")
+    output = images(copy_duplicates).compact_duplicate_sprites(source)
+    assert ("Target copy:Ring" in output) == copy_duplicates
+    assert "unable to parse object" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("copy_duplicates", [False, True])
+def test_unparsable_objects_are_left_alone(example, copy_duplicates, capsys):
+    source = add_objects(
+        example, _DUPLICATE + "Half copy:nothing\nred\n\n"
+    )
+    output = images(copy_duplicates).compact_duplicate_sprites(source)
+    assert output == source
+    assert "unable to parse objects" in capsys.readouterr().out
+
+
+def test_sprites_with_comments_are_left_alone(example):
+    # Replacing the sprite would drop the end of the comment
+    source = add_objects(example, _DUPLICATE).replace(
+        "Target\ndarkblue\n.....",
+        "Target\ndarkblue (a ring\ndrawn twice) .....",
+    )
+    assert images(True).compact_duplicate_sprites(source) == source
+
+
+def test_only_the_objects_are_parsed(example):
+    # A broken levels section doesn't get in the way of the objects
+    source = add_objects(example, _DUPLICATE)
+    source += "\n(unterminated comment\nmessage ("
+    output = images(True).compact_duplicate_sprites(source)
+    assert "Target copy:Ring\ndarkblue\n\n" in output
+    assert output.endswith("\n(unterminated comment\nmessage (")
@@ -0,0 +1,47 @@
+"""
+Tests for resolving the legend.
+"""
+
+import pytest
+
+from psbs.psparser import PSParser
+
+
+def get_legend(example, definitions):
+    source = example.replace("O = Target", "O = Target\n" + definitions)
+    return PSParser(source).get_legend()
+
+
+def test_definitions_are_expanded(example):
+    legend = get_legend(
+        example, "Pushable = Crate or Player\nStack = @ and Wall\nS = Stack"
+    )
+    assert legend["synonyms"]["o"] == "target"
+    assert legend["properties"]["pushable"] == ["crate", "player"]
+    assert legend["aggregates"]["stack"] == ["crate", "target", "wall"]
+    assert legend["synonyms"]["s"] == "stack"
+
+
+@pytest.mark.parametrize(
+    "definitions, chain",
+    [
+        ("A = B\nB = A\nC = A or Crate", "a -> b -> a"),
+        ("A = B or Crate\nB = C or Wall\nC = A or Player", "a -> b -> c -> a"),
+        ("A = A and Crate", "a -> a"),
+        ("X = Y\nY = Z and Crate\nZ = X and Wall", "y -> z -> y"),
+    ],
+)
+def test_cycles_are_reported(example, definitions, chain):
+    with pytest.raises(PSParser.ParseError) as err:
+        get_legend(example, definitions)
+    assert str(err.value) == "Circular definition in legend:\n  " + chain
+
+
+def test_deep_definitions_are_expanded(example):
+    # Deeper than the recursion limit
+    definitions = "\n".join(
+        f"K{index} = K{index + 1} and Crate" for index in range(3000)
+    )
+    legend = get_legend(example, definitions + "\nK3000 = Wall and Player")
+    assert legend["aggregates"]["k0"][:3] == ["wall", "player", "crate"]
+    assert len(legend["aggregates"]["k0"]) == 3002
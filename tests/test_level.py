@@ -0,0 +1,38 @@
+"""
+Tests for the NumPy backed Level type.
+"""
+
+from psbs.level import Level
+
+
+def test_text_round_trip():
+    text = "#####\n#.P.#\n#####"
+    level = Level.from_text(f"\n  {text}\n\n")
+    assert (level.height, level.width) == (3, 5)
+    assert level.to_text() == text
+    assert Level.from_text("ωλ\nλω").to_text() == "ωλ\nλω"
+
+
+def test_ragged_rows_are_padded_with_empty_cells():
+    level = Level.from_rows(["###", "#", "##"])
+    assert level.width == 3
+    assert list(level.cells[1]) == [ord("#"), 0, 0]
+    assert level.to_text() == "###\n#\n##"
+
+
+def test_stacking_levels_of_different_sizes():
+    small = Level.from_text("ab\ncd")
+    tall = Level.from_text("1\n2\n3")
+    assert Level.hstack([small, tall]).to_text() == "ab1\ncd2\n3"
+    assert Level.vstack([small, tall]).to_text() == "ab\ncd\n1\n2\n3"
+    assert Level.hstack([]).to_text() == ""
+
+
+def test_pad_and_crop():
+    level = Level.from_text("P")
+    padded = level.pad(1, 1, 1, 1, glyph="#")
+    assert padded.to_text() == "###\n#P#\n###"
+    assert padded.crop(1, 1, 1, 1) == level
+    assert padded.crop(top=2).to_text() == "###"
+    # Empty cells added by padding are left out of the text
+    assert level.pad(right=2, bottom=1).to_text() == "P\n"
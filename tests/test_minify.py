@@ -0,0 +1,53 @@
+"""
+Tests for PSParser.minify.
+"""
+
+from psbs.psparser import PSParser
+
+def levels(parser):
+    # The rows and messages of each level, wherever they are in the source
+    return [
+        (record.rows, record.messages)
+        for record in PSParser.iter_levels(parser.sections["levels"])
+    ]
+
+
+def test_example_game_is_unchanged(example):
+    source = example.replace("[ > Player", "(push) [   >  Player")
+    parser = PSParser(source)
+    minified = PSParser(PSParser.minify(source))
+    assert minified.prelude_options == parser.prelude_options
+    assert minified.objects == parser.objects
+    assert minified.legend == parser.legend
+    assert [rule._replace(span=None) for rule in minified.rules] == [
+        rule._replace(span=None) for rule in parser.rules
+    ]
+    assert levels(minified) == levels(parser)
+    assert len(PSParser.minify(source)) < len(source)
+
+
+def test_comments_in_rows_are_removed(example):
+    levels = example.index("LEVELS")
+    source = example[:levels] + "LEVELS\n\n  #.#(row note)#  \n#..P\n"
+    assert PSParser.minify(source).endswith("LEVELS\n\n#.##\n#..P")
+
+
+def test_whitespace_is_collapsed_outside_levels_and_messages():
+    source = (
+        "title My  Game\n\n"
+        "RULES\n\n"
+        "[  >  Player  |  Crate ]  ->  [ > Player | > Crate ]  message "
+        "Push  it  along\n\n"
+        "LEVELS\n\n"
+        "message Well   done\n"
+        "#  #\n"
+    )
+    assert PSParser.minify(source) == (
+        "title My  Game\n\n"
+        "RULES\n\n"
+        "[ > Player | Crate ] -> [ > Player | > Crate ] message "
+        "Push  it  along\n\n"
+        "LEVELS\n\n"
+        "message Well   done\n"
+        "#  #"
+    )
@@ -0,0 +1,74 @@
+"""
+Tests that PSParser.redact_comments matches the original implementation.
+"""
+
+import random
+
+import pytest
+
+from psbs.psparser import PSParser
+
+from .reference import redact_comments as reference_redact_comments
+
+# Pieces random sources are made of, chosen to hit nested comments, message
+# markers split across comments and lines, and mixed case
+_PIECES = [
+    "m",
+    "e",
+    "s",
+    "a",
+    "g",
+    "M",
+    "E",
+    "S",
+    " ",
+    "(",
+    ")",
+    "\n",
+    "x",
+    "message ",
+    "MESSAGE ",
+    "message(",
+    "(message ",
+    "mess",
+    "age ",
+]
+
+# Redact characters, including ones which can take part in "message "
+_REDACT_CHARS = ["", " ", "e", "s", "xx", "\n", "m", "E"]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_matches_reference_on_random_sources(seed):
+    # 6 seeds of 10,000 sources each, every one with every redact_char
+    rng = random.Random(seed)
+    for _ in range(10000):
+        source = "".join(
+            rng.choice(_PIECES) for _ in range(rng.randint(0, 32))
+        )
+        for redact_char in _REDACT_CHARS:
+            assert PSParser.redact_comments(
+                source, redact_char
+            ) == reference_redact_comments(source, redact_char), (
+                source,
+                redact_char,
+            )
+
+
+@pytest.mark.parametrize("redact_char", [" ", ""])
+def test_matches_reference_on_example_game(example, redact_char):
+    source = example.replace("[ > Player", "(push (crates)) [ > Player")
+    source += "\nmessage well done (really)\n(level comment)\n"
+    assert PSParser.redact_comments(
+        source, redact_char
+    ) == reference_redact_comments(source, redact_char)
+
+
+def test_keeps_messages_and_newlines():
+    source = "a (b\n(c) d) e\nmessage (kept)\n(gone)"
+    assert PSParser.redact_comments(source) == (
+        "a   \n       e\nmessage (kept)\n      "
+    )
+    assert PSParser.redact_comments(source, "") == (
+        "a \n e\nmessage (kept)\n"
+    )
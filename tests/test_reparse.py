@@ -0,0 +1,106 @@
+"""
+Tests that PSParser.edit and PSParser.reparse give the same results as
+parsing the edited source from scratch.
+"""
+
+import random
+
+import pytest
+
+from psbs.psparser import PSParser
+
+# Edits which change one section each, or the case sensitivity of all of
+# them, or which sections there are
+_EDITS = [
+    ("Crate move", "Crate move"),
+    ("all Target on Crate", "some Target on Crate"),
+    ("title Simple", "title Hard"),
+    ("orange\n0000", "red\n0000"),
+    ("@ = Crate and Target", "@ = Crate and Target\nq = Wall"),
+    ("Player, Wall, Crate", "Player, Wall"),
+    ("homepage", "case_sensitive\nhomepage"),
+    ("#..*.#", "#.**.#"),
+    ("=======\nLEGEND", "(x)\n=======\nLEGEND"),
+    ("Crate\nOrange", "Crate Box\nOrange"),
+    ("[ > Player", "late [ > Player"),
+]
+
+# Characters random edits insert, chosen to break and mend the structure
+_CHARACTERS = ["\n", " ", "(", ")", "=", "#", ".", "a", "P", "*"]
+
+# The results reparse reuses from the previous parse
+_ATTRIBUTES = [
+    "source_tree",
+    "sections",
+    "prelude_options",
+    "objects",
+    "legend",
+    "glyphs",
+]
+
+
+def parse_results(parser):
+    # Every result reparse can reuse, or the error computing it raised
+    results = {}
+    for attribute in _ATTRIBUTES:
+        try:
+            results[attribute] = getattr(parser, attribute)
+        except Exception as err:
+            # Errors must match too
+            results[attribute] = (type(err).__name__, str(err))
+    return results
+
+
+def random_edit(rng, source):
+    # A scripted edit if one applies, otherwise a random one
+    if rng.random() < 0.6:
+        old, new = rng.choice(_EDITS)
+        start = source.find(old)
+        if start >= 0:
+            return start, start + len(old), new
+    start = rng.randrange(len(source) + 1)
+    end = min(start + rng.randint(0, 3), len(source))
+    text = "".join(rng.choice(_CHARACTERS) for _ in range(rng.randint(0, 3)))
+    return start, end, text
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_edits_match_full_parse(example, seed):
+    # 10 seeds of 100 chains of 3 edits, 3,000 edits in all
+    rng = random.Random(seed)
+    for _ in range(100):
+        source = example
+        parser = PSParser(source)
+        parse_results(parser)
+        for _ in range(3):
+            start, end, text = random_edit(rng, source)
+            parser = parser.edit(start, end, text)
+            source = source[:start] + text + source[end:]
+            assert parser.source == source
+            assert parse_results(parser) == parse_results(PSParser(source))
+
+
+def test_reparse_of_partly_parsed_source(example):
+    # Only what has been computed is reused, the rest stays lazy
+    parser = PSParser(example)
+    parser.get_objects()
+    source = example.replace("title Simple", "title Hard")
+    new_parser = parser.reparse(source)
+    assert parse_results(new_parser) == parse_results(PSParser(source))
+
+
+def test_unchanged_sections_are_reused(example):
+    parser = PSParser(example)
+    parser.get_glyphs()
+    start = example.find("Crate move")
+    new_parser = parser.edit(start, start + len("Crate"), "Crate")
+    assert new_parser.objects is parser.objects
+    assert new_parser.glyphs is parser.glyphs
+    assert new_parser.sections["levels"] is parser.sections["levels"]
+
+    start = example.find("Player, Wall, Crate")
+    new_parser = parser.edit(
+        start, start + len("Player, Wall, Crate"), "Crate, Wall, Player"
+    )
+    assert new_parser.objects is parser.objects
+    assert new_parser.glyphs is not parser.glyphs
@@ -0,0 +1,84 @@
+"""
+Tests for parsing the rules section.
+"""
+
+from psbs.gamemodel import Rule, Span
+from psbs.psparser import PSParser
+
+_RULE = "[ > Player | Crate ] -> [ > Player | > Crate ]"
+
+
+def parse_rules(example, rules):
+    source = example.replace(_RULE, rules)
+    return source, PSParser(source).get_rules()
+
+
+def test_example_rule(example):
+    rules = PSParser(example).get_rules()
+    start = example.index(_RULE)
+    assert rules == [
+        Rule(
+            prefixes=(),
+            directions=(),
+            lhs=((((">", "player"),), (("", "crate"),)),),
+            rhs=((((">", "player"),), ((">", "crate"),)),),
+            commands=(),
+            message=None,
+            group=0,
+            span=Span(start, start + len(_RULE)),
+        )
+    ]
+
+
+def test_prefixes_ellipses_commands_and_messages(example):
+    _, rules = parse_rules(
+        example,
+        "late down [ up Player | ... | Crate ] -> [ | ... | no Crate ] "
+        "again message Well [done]",
+    )
+    (rule,) = rules
+    assert rule.prefixes == ("late",)
+    assert rule.directions == ("down",)
+    assert rule.lhs == (
+        ((("up", "player"),), (("", "..."),), (("", "crate"),)),
+    )
+    assert rule.rhs == (((), (("", "..."),), (("no", "crate"),)),)
+    assert rule.commands == ("again",)
+    # Brackets in a message are part of its text
+    assert rule.message == "Well [done]"
+
+
+def test_groups_spans_and_loops(example):
+    source, rules = parse_rules(
+        example,
+        "startloop\n"
+        "[ Crate ] -> [ Wall ]\n"
+        "+ [ Wall ] -> [ Crate ] (back again)\n"
+        "endloop\n"
+        "[ Player ] -> [ ]",
+    )
+    assert [rule.group for rule in rules] == [0, 0, 1]
+    # Spans leave out the comment after a rule
+    assert [source[rule.span.start : rule.span.end] for rule in rules] == [
+        "[ Crate ] -> [ Wall ]",
+        "+ [ Wall ] -> [ Crate ]",
+        "[ Player ] -> [ ]",
+    ]
+
+
+def test_case_sensitive_names(example):
+    source = example.replace("title", "case_sensitive\ntitle", 1)
+    rules = PSParser(source).get_rules()
+    assert rules[0].lhs == ((((">", "Player"),), (("", "Crate"),)),)
+
+
+def test_bad_rules_are_skipped_with_a_warning(example, capsys):
+    _, rules = parse_rules(
+        example,
+        "[ Player ] ->\n"
+        "[ Player | Crate ] -> [ Player ]\n"
+        "[ Player -> [ ]\n"
+        "[ Crate ] -> [ Wall ]",
+    )
+    assert [rule.rhs for rule in rules] == [(((("", "wall"),),),)]
+    assert capsys.readouterr().out.count("unable to parse rule") == 3
@@ -0,0 +1,47 @@
+"""
+Tests for recording the files a template reads.
+"""
+
+import json
+from os import path, stat, utime
+
+from psbs.manifest import BuildManifest
+from psbs.template import Template
+
+
+def render_inputs(template, directory):
+    # Render, then read back the inputs the manifest records
+    template.render()
+    manifest = BuildManifest(str(directory / ".manifest.json"))
+    manifest.save(template.get_inputs(), [])
+    with open(manifest.filename, encoding="UTF-8") as file:
+        return set(json.load(file)["inputs"])
+
+
+def write_later(filename, text):
+    # Write a file with a later modification time, so Jinja reloads it
+    modified = stat(filename).st_mtime_ns
+    filename.write_text(text)
+    utime(filename, ns=(modified + 10**9, modified + 10**9))
+
+
+def test_dropped_include_leaves_the_manifest(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("a", "b"):
+        (src / f"{name}.pss").write_text(name)
+    main = src / "main.pss"
+    main.write_text('(% include "a.pss" %)\n(% include "b.pss" %)\n')
+    template = Template(str(main), {"user_extensions": []})
+    files = {name: path.join(str(src), name) for name in ("main.pss", "a.pss")}
+    dropped = path.join(str(src), "b.pss")
+
+    first = render_inputs(template, tmp_path)
+    assert first == {*files.values(), dropped}
+
+    write_later(main, '(% include "a.pss" %)\n')
+    second = render_inputs(template, tmp_path)
+    assert second == set(files.values())
+
+    # Templates Jinja kept from the last render are still recorded
+    assert render_inputs(template, tmp_path) == second
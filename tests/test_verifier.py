@@ -0,0 +1,32 @@
+"""
+Tests for the static verifier.
+"""
+
+from psbs.psparser import PSParser
+from psbs.verifier import verify
+
+def test_example_has_no_problems(example):
+    assert verify(PSParser(example)) == []
+
+
+def test_object_without_colours_is_reported(example, capsys):
+    source = example.replace("Target\ndarkblue", "Half\n\nTarget\ndarkblue")
+    problems = verify(PSParser(source))
+    assert [str(problem) for problem in problems] == [
+        "line 17, column 1: Object 'Half' has no colours"
+    ]
+    # The parser's warning about the object stays out of the output
+    assert capsys.readouterr().out == ""
+
+
+def test_redacted_source_is_not_kept(example):
+    parser = PSParser(example.replace("[ > Player", "(push) [ > Player"))
+    verify(parser)
+    kept = [
+        name
+        for name, value in vars(parser).items()
+        if name != "source"
+        and isinstance(value, str)
+        and len(value) == len(parser.source)
+    ]
+    assert kept == []
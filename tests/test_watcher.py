@@ -0,0 +1,52 @@
+"""
+Tests for waiting on changes to files.
+"""
+
+from os import makedirs, path
+
+import pytest
+
+from psbs.watcher import FileWatcher
+
+
+@pytest.fixture(name="project")
+def project_fixture(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    makedirs(path.join("src", "levels"))
+    for filename in ("l1.tmx", "tileset.tsx"):
+        with open(path.join("src", "levels", filename), "w") as file:
+            file.write("old")
+    return tmp_path
+
+
+def append(filename):
+    with open(filename, "a") as file:
+        file.write(" and new")
+
+
+@pytest.mark.parametrize("poll", [False, True])
+def test_relative_and_absolute_paths_to_one_directory(project, poll):
+    level = path.join("src", "levels", "l1.tmx")
+    tileset = path.abspath(path.join("src", "levels", "tileset.tsx"))
+    watcher = FileWatcher(["src"], [tileset], poll=poll, interval=0.01)
+    try:
+        append(level)
+        assert watcher.wait(timeout=2) == {level}
+        append(tileset)
+        assert watcher.wait(timeout=2) == {
+            path.join("src", "levels", "tileset.tsx"),
+            tileset,
+        }
+    finally:
+        watcher.close()
+
+
+def test_files_in_new_directories_are_reported(project):
+    watcher = FileWatcher(["src"])
+    try:
+        makedirs(path.join("src", "new"))
+        assert watcher.wait(timeout=0.2) == set()
+        append(path.join("src", "new", "l2.tmx"))
+        assert watcher.wait(timeout=2) == {path.join("src", "new", "l2.tmx")}
+    finally:
+        watcher.close()